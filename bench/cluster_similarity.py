@@ -0,0 +1,96 @@
+# bench/cluster_similarity.py
+"""近似重复聚合的相似度与吞吐基准（rss_cluster.py）
+
+    python bench/cluster_similarity.py
+
+1. 同一报道的改写标题 / 不同报道的标题：MinHash 估计值、精确 Jaccard，
+   以及 64 位 SimHash 的汉明距离（对比两种方案能否分开两类标题）
+2. StoryIndex 在 12 小时窗口内 find + add 的吞吐
+"""
+import hashlib
+import random
+import sys
+import time
+from itertools import combinations
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rss_cluster import Story, StoryIndex, minhash, similarity, story_tokens  # noqa: E402
+
+# 同一报道在不同来源的标题
+PARAPHRASES = [
+    ("Israel and Hamas agree to ceasefire deal in Gaza", "Israel, Hamas agree ceasefire deal for Gaza"),
+    ("Israel and Hamas agree to ceasefire deal in Gaza", "Hamas and Israel agree to Gaza ceasefire deal"),
+    ("Magnitude 7.1 earthquake hits off coast of Japan", "Earthquake of magnitude 7.1 strikes off Japan coast"),
+    ("UK inflation falls to 3.9% in November", "UK inflation drops to 3.9 percent in November"),
+    ("Fed holds interest rates steady, signals three cuts in 2024", "Federal Reserve holds rates steady and signals three cuts in 2024"),
+    ("Apple unveils Vision Pro headset at WWDC", "Apple unveils its Vision Pro headset at WWDC event"),
+    ("日本首相宣布解散众议院", "日本首相宣布解散众议院 提前大选"),
+    ("美联储维持利率不变", "美联储宣布维持利率不变"),
+]
+# 同一组里常见的不同报道
+UNRELATED = [
+    "Israel and Hamas agree to ceasefire deal in Gaza",
+    "Magnitude 7.1 earthquake hits off coast of Japan",
+    "UK inflation falls to 3.9% in November",
+    "Fed holds interest rates steady, signals three cuts in 2024",
+    "Apple unveils Vision Pro headset at WWDC",
+    "Israel strikes Gaza as ceasefire talks stall",
+    "Japan coast guard plane collides with airliner at Haneda",
+    "UK unemployment rises to 4.2% in November",
+    "日本首相宣布解散众议院",
+    "美联储维持利率不变",
+]
+
+
+def jaccard(a, b):
+    ta, tb = story_tokens(a), story_tokens(b)
+    return len(ta & tb) / len(ta | tb)
+
+
+def simhash(text):
+    weights = [0] * 64
+    for token in story_tokens(text):
+        h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def compare(pairs):
+    rows = []
+    for a, b in pairs:
+        rows.append((similarity(minhash(a), minhash(b)), jaccard(a, b), bin(simhash(a) ^ simhash(b)).count("1")))
+    return rows
+
+
+def report(name, rows):
+    minhash_scores = [r[0] for r in rows]
+    jaccards = [r[1] for r in rows]
+    distances = [r[2] for r in rows]
+    print(
+        f"{name:<8} {len(rows):>3} 对  MinHash {min(minhash_scores):.2f}~{max(minhash_scores):.2f}  "
+        f"Jaccard {min(jaccards):.2f}~{max(jaccards):.2f}  SimHash 汉明距离 {min(distances)}~{max(distances)}"
+    )
+
+
+def throughput(n=5000, window=43200):
+    rng = random.Random(1)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    titles = [" ".join(rng.sample(vocabulary, 8)) for _ in range(n)]
+    signatures = [minhash(t) for t in titles]
+    index = StoryIndex(window)
+    start = time.perf_counter()
+    for i, signature in enumerate(signatures):
+        now = i * 20.0  # 每 20 秒一条，窗口内约 2160 条
+        if index.find(signature, now) is None:
+            index.add(Story(signature, str(i), "u", "src", "l", now))
+    elapsed = time.perf_counter() - start
+    print(f"StoryIndex find+add: {n} 条 {elapsed:.2f}s（{n / elapsed:.0f} 条/秒），窗口内 {len(index)} 条")
+
+
+if __name__ == "__main__":
+    report("改写", compare(PARAPHRASES))
+    report("不同报道", compare([p for p in combinations(UNRELATED, 2) if minhash(p[0]) and minhash(p[1])]))
+    throughput()
@@ -0,0 +1,107 @@
+# bench/pg_round_trips.py
+"""PostgresStorage 批量写入的语句数与网络往返数（不需要 PostgreSQL 服务）
+
+    python bench/pg_round_trips.py [仓库目录]
+
+用只计数的假连接池代替 asyncpg，重放一次批量模式的运行：30 个订阅源各 20 条新条目，
+每个订阅源 flush 一次，最后写运行时间、把 600 条标记为已发送、保存 5 个镜像的健康度。
+往返数 = 每次 execute / fetch 一次，executemany 按行数计语句、按一次计往返，事务的 BEGIN / COMMIT 各一次。
+
+默认测当前目录的 rss_storage.py；要和旧版本比较，先检出到其它目录再把目录作为参数：
+    git worktree add /tmp/rss-old <commit> && python bench/pg_round_trips.py /tmp/rss-old
+"""
+import asyncio
+import importlib
+import sys
+import time
+from pathlib import Path
+
+FEEDS = 30
+ENTRIES = 20
+MIRRORS = 5
+
+
+class CountingConnection:
+    def __init__(self, stats):
+        self.stats = stats
+
+    async def execute(self, sql, *args):
+        self._count(1)
+
+    async def executemany(self, sql, rows):
+        self._count(len(rows))
+
+    async def fetch(self, sql, *args):
+        self._count(1)
+        return []
+
+    async def fetchval(self, sql, *args):
+        self._count(1)
+
+    async def fetchrow(self, sql, *args):
+        self._count(1)
+
+    def _count(self, statements):
+        self.stats["statements"] += statements
+        self.stats["round_trips"] += 1
+
+    def transaction(self):
+        return CountingTransaction(self.stats)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class CountingTransaction:
+    def __init__(self, stats):
+        self.stats = stats
+
+    async def __aenter__(self):
+        self.stats["round_trips"] += 1  # BEGIN
+
+    async def __aexit__(self, *exc):
+        self.stats["round_trips"] += 1  # COMMIT / ROLLBACK
+
+
+class CountingPool(CountingConnection):
+    def acquire(self):
+        return CountingConnection(self.stats)
+
+
+async def replay(rss_storage):
+    stats = {"statements": 0, "round_trips": 0}
+    db = rss_storage.PostgresStorage("postgresql://bench")
+    db.pool = CountingPool(stats)
+    entry_ids = []
+    now = time.time()
+    for f in range(FEEDS):
+        for e in range(ENTRIES):
+            entry_id = f"{f}-{e}"
+            entry_ids.append(entry_id)
+            await db.add_pending_message("G", f"https://feed/{f}", entry_id, f"{entry_id}-hash", "title", "标题",
+                                         "https://link", "summary", now, "feed")
+            await db.save_status("G", f"https://feed/{f}", entry_id, f"{entry_id}-hash", now)
+        await db.flush()
+    await db.save_last_run_time("G", now)
+    await db.flush()
+    await db.mark_pending_as_sent("G", entry_ids)
+    await db.save_mirror_health({
+        f"mirror{i}.example": {"ewma_latency": 1.0, "error_rate": 0.0, "last_failure": 0.0, "samples": 1}
+        for i in range(MIRRORS)
+    })
+    return stats
+
+
+def main():
+    root = Path(sys.argv[1] if len(sys.argv) > 1 else Path(__file__).resolve().parent.parent).resolve()
+    sys.path.insert(0, str(root))
+    rss_storage = importlib.import_module("rss_storage")
+    stats = asyncio.run(replay(rss_storage))
+    print(f"{root}: {FEEDS}x{ENTRIES} 条，语句 {stats['statements']}，往返 {stats['round_trips']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# bench/status_memory.py
+"""rss_status 加载的内存峰值与耗时：十六进制 TEXT + 全量 set[str]（旧）对比 16 字节 BLOB + 按需 HashIndex（新）
+
+    python bench/status_memory.py [条目数]
+
+生成两份同样内容的库（默认 200000 条，分布在 4 个组、200 个订阅源）：
+- before：entry_url / entry_content_hash 为 64 位十六进制文本，启动时
+  SELECT feed_url, entry_url FROM rss_status 全部读入 {feed_url: set[str]}（旧 load_status），
+  各组内容哈希读入 HashIndex
+- after：当前 rss_storage.SQLiteStorage 建的 BLOB 表，EntryStatus 逐个订阅源、逐个组加载
+  （按最坏情况，本次运行用到了全部订阅源）
+每种方式在单独的子进程里运行，报告 tracemalloc 峰值、加载结束时仍占用的内存、进程最大 RSS 增量和耗时。
+RSS 增量包含 SQLite 的 mmap 与页缓存（SQLITE_MMAP_SIZE / SQLITE_CACHE_KB），库文件越小这部分越小，
+但不随 Python 对象的缩减等比例下降；Python 堆的变化看 tracemalloc 一栏。
+"""
+import asyncio
+import hashlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+GROUPS = 4
+FEEDS = 200
+
+
+def rows(n):
+    for i in range(n):
+        feed = i % FEEDS
+        entry_id = hashlib.sha256(f"entry-{i}".encode()).hexdigest()
+        content_hash = hashlib.sha256(f"content-{i}".encode()).hexdigest()
+        yield f"G{feed % GROUPS}", f"https://feed/{feed}", entry_id, content_hash, float(i)
+
+
+async def build(path, n, blob):
+    import aiosqlite
+    from rss_dedup import hash_bytes
+    from rss_storage import SQLiteStorage
+
+    if blob:
+        db = SQLiteStorage(path)
+        await db.open()
+        await db.ensure_initialized()
+        await db.conn.executemany(
+            "INSERT INTO rss_status (feed_group, feed_url, entry_url, entry_content_hash, entry_timestamp) VALUES (?, ?, ?, ?, ?)",
+            ((g, u, hash_bytes(e), hash_bytes(c), t) for g, u, e, c, t in rows(n)),
+        )
+        await db.conn.commit()
+        await db.close()
+        return
+    async with aiosqlite.connect(path) as conn:
+        # user-010 之前的表结构
+        await conn.execute("""CREATE TABLE rss_status (
+            feed_group TEXT, feed_url TEXT, entry_url TEXT, entry_content_hash TEXT, entry_timestamp REAL,
+            PRIMARY KEY (feed_group, feed_url, entry_url))""")
+        await conn.execute("CREATE UNIQUE INDEX idx_group_content_hash ON rss_status(feed_group, entry_content_hash)")
+        await conn.executemany("INSERT INTO rss_status VALUES (?, ?, ?, ?, ?)", rows(n))
+        await conn.commit()
+
+
+async def load_before(path):
+    import aiosqlite
+    from rss_dedup import HashIndex
+
+    async with aiosqlite.connect(path) as conn:
+        async with conn.execute("SELECT feed_url, entry_url FROM rss_status") as c:
+            status = {}
+            for feed_url, entry_url in await c.fetchall():
+                status.setdefault(feed_url, set()).add(entry_url)
+        groups = {}
+        for g in range(GROUPS):
+            async with conn.execute("SELECT entry_content_hash FROM rss_status WHERE feed_group = ?", (f"G{g}",)) as c:
+                groups[g] = HashIndex(row[0] for row in await c.fetchall())
+    return status, groups
+
+
+async def load_after(path):
+    from rss_dedup import EntryStatus
+    from rss_storage import SQLiteStorage
+
+    db = SQLiteStorage(path)
+    await db.open()
+    try:
+        status = EntryStatus(db)
+        for feed in range(FEEDS):
+            await status.entry_ids(f"https://feed/{feed}")
+        for g in range(GROUPS):
+            await status.content_hashes(f"G{g}")
+    finally:
+        await db.close()
+    return status
+
+
+def measure(mode, path):
+    """子进程中运行：输出 峰值字节 保留字节 RSS增量KB 秒"""
+    import aiosqlite, rss_dedup, rss_storage  # noqa: F401  导入开销不计入
+    load = load_before if mode == "before" else load_after
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    result = asyncio.run(load(path))
+    elapsed = time.perf_counter() - started
+    rss_delta = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    del result
+    tracemalloc.start()
+    result = asyncio.run(load(path))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(peak, current, rss_delta, elapsed)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], sys.argv[3])
+        return
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for mode in ("before", "after"):
+            path = str(Path(tmp) / f"{mode}.db")
+            asyncio.run(build(path, n, blob=mode == "after"))
+            size = Path(path).stat().st_size
+            out = subprocess.run([sys.executable, __file__, "--measure", mode, path], capture_output=True, text=True, check=True)
+            peak, current, rss_delta, elapsed = out.stdout.split()
+            results[mode] = (int(peak), float(elapsed))
+            print(f"{mode:6} {n} 条：tracemalloc 峰值 {int(peak) / 2**20:7.1f} MB，加载后占用 {int(current) / 2**20:6.1f} MB，"
+                  f"最大 RSS 增量 {int(rss_delta) / 1024:7.1f} MB，耗时 {float(elapsed):.2f}s，库文件 {size / 2**20:.1f} MB")
+        (peak_b, time_b), (peak_a, time_a) = results["before"], results["after"]
+        print(f"峰值内存 {peak_b / peak_a:.1f}x，加载耗时 {time_b / time_a:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
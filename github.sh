@@ -19,6 +19,15 @@ DOWNLOAD_TARGETS=(
     # 单个文件示例rss
      "https://raw.githubusercontent.com/penggan00/rss/main/rss.py|$HOME/rss"
      "https://raw.githubusercontent.com/penggan00/rss/main/rss_config.py|$HOME/rss"
+     "https://raw.githubusercontent.com/penggan00/rss/main/rss_parser.py|$HOME/rss"
+     "https://raw.githubusercontent.com/penggan00/rss/main/rss_websub.py|$HOME/rss"
+     "https://raw.githubusercontent.com/penggan00/rss/main/rss_dedup.py|$HOME/rss"
+     "https://raw.githubusercontent.com/penggan00/rss/main/rss_cluster.py|$HOME/rss"
+     "https://raw.githubusercontent.com/penggan00/rss/main/rss_storage.py|$HOME/rss"
+     "https://raw.githubusercontent.com/penggan00/rss/main/rss_translation.py|$HOME/rss"
+     "https://raw.githubusercontent.com/penggan00/rss/main/tencent_tmt.py|$HOME/rss"
+     "https://raw.githubusercontent.com/penggan00/rss/main/script_lang.py|$HOME/rss"
+     "https://raw.githubusercontent.com/penggan00/rss/main/tg_delivery.py|$HOME/rss"
      "https://raw.githubusercontent.com/penggan00/rss/main/gpt.py|$HOME/rss"
      "https://raw.githubusercontent.com/penggan00/rss/main/qq.py|$HOME/rss"
      "https://raw.githubusercontent.com/penggan00/rss/main/mail.py|$HOME/rss"
@@ -6,6 +6,8 @@ import imaplib
 import email
 import pdfplumber
 import tempfile
+import json
+import hashlib
 from email.header import decode_header
 import logging
 import sys
@@ -14,19 +16,19 @@ from bs4 import BeautifulSoup
 from md2tgmd import escape
 from dotenv import load_dotenv
 import asyncio
-from tencentcloud.common import credential
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
 from pathlib import Path
-from telegram import Bot
 from telegram.constants import ParseMode
-# 加载环境变量
+# 加载环境变量（下面的本地模块在导入时读取）
 load_dotenv()
+from tencent_tmt import get_translator, tmt_executor
+import script_lang
+import tg_delivery
 
 # 获取当前脚本所在的绝对目录
 current_dir = Path(__file__).parent.absolute()
 log_file_path = current_dir / "mail.log"
+# 每封邮件已发送到的聊天；部分聊天发送失败时邮件保持未读，下次只补发给失败的聊天
+delivery_state_path = current_dir / "mail_delivery.json"
 
 # 配置日志
 logging.basicConfig(
@@ -270,8 +272,8 @@ class EmailToTelegramBot:
             'chat_ids': self._parse_chat_ids(os.getenv('TELEGRAM_CHAT_ID', ''))
         }
         
-        # 初始化Telegram Bot
-        self.bot = Bot(token=self.telegram_config['bot_token'])
+        # Telegram Bot 在首次发送时由 tg_delivery.get_bot 创建（共用连接池，需在事件循环内初始化）
+        self.bot = None
         
         # 验证必要配置
         self._validate_config()
@@ -288,24 +290,54 @@ class EmailToTelegramBot:
         self.h.ignore_tables = False
         self.h.mark_code = True
             
+    async def _get_bot(self):
+        """按令牌复用 tg_delivery 中已初始化的 Bot"""
+        if self.bot is None:
+            self.bot = await tg_delivery.get_bot(self.telegram_config['bot_token'])
+        return self.bot
+
     def _parse_chat_ids(self, chat_ids_str):
-        """解析聊天ID，只支持单个ID"""
+        """解析聊天ID，支持逗号分隔的多个ID"""
         if not chat_ids_str:
             logging.error("TELEGRAM_CHAT_ID 环境变量为空")
             return []
         
-        # 只取第一个ID，忽略逗号分隔的其他ID
-        chat_id = chat_ids_str.split(',')[0].strip()
+        # 清理聊天ID，去掉引号、空项和重复项
+        chat_ids = []
+        for chat_id in chat_ids_str.split(','):
+            chat_id = chat_id.replace('"', '').replace("'", "").strip()
+            if chat_id and chat_id not in chat_ids:
+                chat_ids.append(chat_id)
         
-        if not chat_id:
+        if not chat_ids:
             logging.error("聊天ID格式错误")
-            return []
-        
-        # 清理聊天ID
-        chat_id = str(chat_id).replace('"', '').replace("'", "").strip()
-        
-     #   logging.info(f"使用的聊天ID: {chat_id}")
-        return [chat_id]
+        return chat_ids
+    
+    def _load_delivery_state(self):
+        """读取各邮件已发送到的聊天 {邮件标识: [聊天ID]}"""
+        try:
+            with open(delivery_state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.error(f"读取发送状态失败: {e}")
+            return {}
+    
+    def _save_delivery_state(self, state):
+        try:
+            with open(delivery_state_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logging.error(f"保存发送状态失败: {e}")
+    
+    def _email_key(self, msg, email_data):
+        """邮件标识：Message-ID，没有时用主题、发件人、日期的哈希"""
+        message_id = (msg.get('Message-ID') or '').strip()
+        if message_id:
+            return message_id
+        raw = f"{email_data['subject']}\0{email_data['from']}\0{email_data['date']}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
     
     def _validate_config(self):
         """验证配置是否完整"""
@@ -1387,9 +1419,10 @@ class EmailToTelegramBot:
 
         try:
             # 首先尝试发送MarkdownV2格式
-            await self.bot.send_message(
-                chat_id=chat_id,
-                text=escaped_content,
+            await tg_delivery.send_message(
+                await self._get_bot(),
+                chat_id,
+                escaped_content,
                 parse_mode=ParseMode.MARKDOWN_V2,
                 disable_web_page_preview=True
             )
@@ -1408,9 +1441,10 @@ class EmailToTelegramBot:
             # 清理内容，移除Markdown特殊字符但保留基本格式
             plain_text = self._convert_to_plaintext(original_content)
             
-            await self.bot.send_message(
-                chat_id=chat_id,
-                text=plain_text,
+            await tg_delivery.send_message(
+                await self._get_bot(),
+                chat_id,
+                plain_text,
                 parse_mode=None,  # 不使用Markdown
                 disable_web_page_preview=True
             )
@@ -1457,8 +1491,21 @@ class EmailToTelegramBot:
         
         return text.strip()
     
-    async def send_to_all_chats_async(self, markdown_content):
-        """将消息发送到单个配置的聊天"""
+    async def _send_parts_to_chat(self, message_parts, chat_id):
+        """按顺序把各部分发送到一个聊天，某部分失败则停止"""
+        for i, part in enumerate(message_parts):
+      #      print(f"\n🚀 正在发送到聊天 {chat_id} - 第 {i+1}/{len(message_parts)} 部分")
+            success = await self.send_to_telegram_async(part, chat_id)
+            if not success:
+                logging.error(f"聊天 {chat_id} 的第 {i+1} 部分发送失败")
+                return False
+        return True
+
+    async def send_to_all_chats_async(self, markdown_content, delivery_key=None):
+        """将消息同时发送到所有配置的聊天，全部成功返回 True
+
+        delivery_key 为邮件标识：记录已发送成功的聊天，重试时只发送给之前失败的聊天。
+        """
         message_parts = self.split_message(markdown_content)
         
         # 打印分段信息
@@ -1469,32 +1516,29 @@ class EmailToTelegramBot:
             print(part[:200] + "..." if len(part) > 200 else part)
             print("-" * 40)
         
-        # 只发送到第一个聊天ID
         if not self.telegram_config['chat_ids']:
             logging.error("没有配置聊天ID")
             return False
         
-        chat_id = self.telegram_config['chat_ids'][0]
-        chat_success = True
+        state = self._load_delivery_state() if delivery_key else {}
+        delivered = set(state.get(delivery_key, []))
+        targets = [chat_id for chat_id in self.telegram_config['chat_ids'] if chat_id not in delivered]
+        if delivered:
+            print(f"🔁 已发送到 {len(delivered)} 个聊天，补发给 {targets}")
         
-        for i, part in enumerate(message_parts):
-      #      print(f"\n🚀 正在发送到聊天 {chat_id} - 第 {i+1}/{len(message_parts)} 部分")
-            success = await self.send_to_telegram_async(part, chat_id)
-            if not success:
-                chat_success = False
-                logging.error(f"聊天 {chat_id} 的第 {i+1} 部分发送失败")
-                break
-            
-            # 短暂延迟避免速率限制
-            if i < len(message_parts) - 1:
-                await asyncio.sleep(1)
+        # 各聊天并发发送，同一聊天内按顺序；限频由 tg_delivery 按聊天控制
+        results = await asyncio.gather(*(self._send_parts_to_chat(message_parts, chat_id) for chat_id in targets))
+        delivered.update(chat_id for chat_id, ok in zip(targets, results) if ok)
+        all_success = all(results)
         
-        if chat_success:
-            pass
-        else:
-            logging.error(f"消息发送到聊天 {chat_id} 失败")
+        if delivery_key:
+            if all_success:
+                state.pop(delivery_key, None)
+            else:
+                state[delivery_key] = sorted(delivered)
+            self._save_delivery_state(state)
         
-        return chat_success
+        return all_success
 
     async def process_single_email_async(self, mail, email_id):
         """异步处理单封邮件"""
@@ -1508,6 +1552,7 @@ class EmailToTelegramBot:
             # 解析邮件
             msg = email.message_from_bytes(msg_data[0][1])
             email_data = self.extract_email_content(msg)
+            delivery_key = self._email_key(msg, email_data)
             
           #  print(f"\n📧 处理邮件:")
          #   print(f"   主题: {email_data['subject']}")
@@ -1529,7 +1574,7 @@ class EmailToTelegramBot:
                     markdown_content = self.convert_email_to_markdown(email_data)
                     markdown_content = "🏦 中国银行信用卡邮件（无PDF附件）\n\n" + markdown_content
                 
-                success = await self.send_to_all_chats_async(markdown_content)
+                success = await self.send_to_all_chats_async(markdown_content, delivery_key)
             
             # 检查是否是建设银行信用卡邮件
             elif self.is_ccb_credit_card_email(email_data):
@@ -1542,13 +1587,13 @@ class EmailToTelegramBot:
                 print(markdown_content)
                 print("="*80)
                 
-                success = await self.send_to_all_chats_async(markdown_content)
+                success = await self.send_to_all_chats_async(markdown_content, delivery_key)
             
             else:
                 # 正常处理其他邮件
                 print(f"📧 普通邮件，正常处理")
                 markdown_content = self.convert_email_to_markdown(email_data)
-                success = await self.send_to_all_chats_async(markdown_content)
+                success = await self.send_to_all_chats_async(markdown_content, delivery_key)
             
             if success:
                 # 标记为已读
@@ -2308,21 +2353,8 @@ class EmailToTelegramBot:
                 pass
 
     def is_mainly_chinese(self, text):
-        """检测文本是否主要是中文"""
-        if not text:
-            return True
-        
-        # 计算中文字符的比例
-        chinese_pattern = re.compile(r'[\u4e00-\u9fff]')
-        chinese_chars = len(chinese_pattern.findall(text))
-        total_chars = len(text)
-        
-        # 避免除零错误
-        if total_chars == 0:
-            return True
-        
-        # 如果中文字符超过10%的比例，则无需翻译
-        return (chinese_chars / total_chars) > 0.1
+        """检测文本是否主要是中文：中文字符超过10%的比例则无需翻译"""
+        return script_lang.is_mainly_chinese(text, ratio=0.1)
     
     def translate_content_sync_safe(self, text):
         """安全翻译，支持长文本分段且保护URL"""
@@ -2333,6 +2365,8 @@ class EmailToTelegramBot:
         segments = self.split_text_around_urls(text)
         final_segments = []
         
+        # 纯文本片段提交到翻译线程池并行翻译，按原顺序拼接
+        executor = tmt_executor()
         for segment in segments:
             if self.contains_url_or_code(segment):
                 # URL部分直接保留
@@ -2341,14 +2375,12 @@ class EmailToTelegramBot:
                 # 纯文本部分需要检查长度并可能分段
                 if len(segment.encode('utf-8')) <= 1900:
                     # 短文本直接翻译
-                    translated = self.translate_segment_safe(segment)
-                    final_segments.append(translated)
+                    final_segments.append(executor.submit(self.translate_segment_safe, segment))
                 else:
                     # 长文本需要进一步分段翻译
-                    segmented_translation = self.translate_long_text_safe(segment)
-                    final_segments.append(segmented_translation)
+                    final_segments.append(executor.submit(self.translate_long_text_safe, segment))
         
-        return ''.join(final_segments)
+        return ''.join(part if isinstance(part, str) else part.result() for part in final_segments)
 
     def translate_long_text_safe(self, long_text):
         """安全地翻译长文本（分段处理）"""
@@ -2456,19 +2488,8 @@ class EmailToTelegramBot:
             return text
         
         try:
-            cred = credential.Credential(TENCENTCLOUD_SECRET_ID, TENCENTCLOUD_SECRET_KEY)
-            http_profile = HttpProfile(endpoint="tmt.tencentcloudapi.com")
-            client_profile = ClientProfile(httpProfile=http_profile)
-            client = tmt_client.TmtClient(cred, TENCENT_REGION, client_profile)
-            
-            req = models.TextTranslateRequest()
-            req.SourceText = text
-            req.Source = "auto"
-            req.Target = "zh"
-            req.ProjectId = 0
-            
-            resp = client.TextTranslate(req)
-            return resp.TargetText
+            # 复用常驻客户端（keep-alive），不再每个片段新建连接
+            return get_translator(TENCENTCLOUD_SECRET_ID, TENCENTCLOUD_SECRET_KEY, TENCENT_REGION).translate(text)
             
         except Exception as e:
             logging.error(f"翻译片段失败: {e}")
@@ -2482,7 +2503,10 @@ async def main_async():
     processor = EmailToTelegramBot()
     
     # 处理未读邮件
-    success = await processor.process_all_unread_emails_async()
+    try:
+        success = await processor.process_all_unread_emails_async()
+    finally:
+        await tg_delivery.close_bots()
     
     if success:
         pass
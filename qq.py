@@ -1,7 +1,6 @@
 # source rss_venv/bin/activate
 # pip install psutil python-dotenv tencentcloud-sdk-python python-telegram-bot aiosqlite
 import os
-import re
 import asyncio
 import psutil
 import time
@@ -36,8 +35,9 @@ logging.getLogger('telegram').setLevel(logging.WARNING)
 logging.getLogger('tencentcloud').setLevel(logging.WARNING)
 logging.getLogger('aiosqlite').setLevel(logging.WARNING)
 
-# 加载环境变量
+# 加载环境变量（script_lang 在导入时读取）
 load_dotenv()
+from script_lang import detect_language
 
 # ============================================================
 # 配置类
@@ -297,26 +297,6 @@ cache = AsyncTranslationCache()
 # ============================================================
 # 语言检测
 # ============================================================
-def detect_language(text: str) -> str:
-    """检测文本语言"""
-    if not text or not isinstance(text, str):
-        return 'unknown'
-    clean_text = re.sub(r'[^\w\u4e00-\u9fff]', '', text, flags=re.UNICODE)
-    if not clean_text:
-        return 'unknown'
-    char_stats = {
-        'zh': len(re.findall(r'[\u4e00-\u9fff]', clean_text)),
-        'ja': len(re.findall(r'[\u3040-\u30ff\u31f0-\u31ff]', clean_text)),
-        'ko': len(re.findall(r'[\uac00-\ud7af\u1100-\u11ff]', clean_text)),
-        'ru': len(re.findall(r'[\u0400-\u04FF]', clean_text)),
-        'en': len(re.findall(r'[a-zA-Z]', clean_text)),
-    }
-    dominant_lang, dominant_ratio = max(
-        ((lang, count / len(clean_text)) for lang, count in char_stats.items()),
-        key=lambda x: x[1]
-    )
-    return dominant_lang if dominant_ratio > 0.4 else 'other'
-
 def get_translation_direction(text: str) -> Tuple[str, str]:
     """获取翻译方向"""
     lang = detect_language(text)
@@ -1,5 +1,5 @@
 #source rss_venv/bin/activate
-#pip install aiohttp pytz aiosqlite python-dotenv feedparser python-telegram-bot tenacity md2tgmd tencentcloud-sdk-python langdetect
+#pip install aiohttp pytz aiosqlite python-dotenv feedparser python-telegram-bot tenacity md2tgmd tencentcloud-sdk-python
 import asyncio
 import aiohttp
 import logging
@@ -10,30 +10,37 @@ import pytz
 import fcntl
 import time
 import signal
-import aiosqlite
 import sys
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 from feedparser import parse
-from telegram import Bot
 from telegram.error import BadRequest
 from urllib.parse import urlparse
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from md2tgmd import escape
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
 from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
-from collections import defaultdict
-from langdetect import detect, LangDetectException
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+
+# ========== 环境加载 ==========
+# 下面的本地模块在导入时读取环境变量，先加载 .env
+load_dotenv()
+
 from rss_config import RSS_GROUPS
+from rss_parser import FastFeedParser
+from rss_websub import WebSubManager
+from rss_dedup import EntryStatus
+from rss_cluster import Story, minhash, signature_bytes
+from rss_storage import Storage, create_storage
+from rss_translation import TranslationCache
+from tencent_tmt import TranslationUnavailable, TranslatorChain, classify_error, get_translator
+from script_lang import is_need_translate
+import tg_delivery
+from tg_delivery import get_bot
 
 # ========== 全局退出标志 ==========
 SHOULD_EXIT = False
-# ========== 环境加载 ==========
-load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent
 LOCK_FILE = BASE_DIR / "rss.lock"
 DATABASE_FILE = BASE_DIR / "rss.db"
@@ -46,376 +53,76 @@ def clean_old_log():
         if size_mb > 10:  # 超过10MB
             log_file.unlink()  # 直接删除
 
-logging.basicConfig(
-    filename=BASE_DIR / "rss.log",
-    level=logging.WARNING,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    encoding="utf-8"
-)
+def setup_logging():
+    """日志写入 rss.log；只在作为脚本运行时调用，测试和 bench 导入本模块时不创建日志文件"""
+    logging.basicConfig(
+        filename=BASE_DIR / "rss.log",
+        level=logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        encoding="utf-8"
+    )
+
 logger = logging.getLogger(__name__)
 
-TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID").split(",")
+# 逗号分隔的多个聊天，每条消息并发发送到全部聊天（见 fan_out）
+TELEGRAM_CHAT_ID = [chat_id.strip() for chat_id in os.getenv("TELEGRAM_CHAT_ID").split(",") if chat_id.strip()]
 TENCENTCLOUD_SECRET_ID = os.getenv("TENCENTCLOUD_SECRET_ID")
 TENCENTCLOUD_SECRET_KEY = os.getenv("TENCENTCLOUD_SECRET_KEY")
 TENCENT_REGION = os.getenv("TENCENT_REGION", "na-siliconvalley")
 TENCENT_SECRET_ID = os.getenv("TENCENT_SECRET_ID")
 TENCENT_SECRET_KEY = os.getenv("TENCENT_SECRET_KEY")
-semaphore = asyncio.Semaphore(2)
+# 批量翻译每次请求的条数和总字符数上限（TextTranslateBatch 总长度需低于 6000 字符）
+TRANSLATE_BATCH_SIZE = int(os.getenv("TRANSLATE_BATCH_SIZE", "50"))
+TRANSLATE_BATCH_CHARS = int(os.getenv("TRANSLATE_BATCH_CHARS", "5000"))
+# 抓取并发：全局上限 + 每个主机的自适应并发（AIMD）
+FETCH_GLOBAL_LIMIT = int(os.getenv("FETCH_GLOBAL_LIMIT", "8"))
+FETCH_HOST_INITIAL = float(os.getenv("FETCH_HOST_INITIAL", "2"))
+FETCH_HOST_MAX = int(os.getenv("FETCH_HOST_MAX", "4"))
+FETCH_SLOW_SECONDS = float(os.getenv("FETCH_SLOW_SECONDS", "5"))
 BACKUP_DOMAINS_STR = os.getenv("BACKUP_DOMAINS", "")
 BACKUP_DOMAINS = [domain.strip() for domain in BACKUP_DOMAINS_STR.split(",") if domain.strip()]
+# 镜像对冲请求：首个镜像超过该延迟（成功延迟的分位数，限定在上下限内）仍未响应时请求下一个
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.9"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "1"))
+HEDGE_MAX_DELAY = float(os.getenv("HEDGE_MAX_DELAY", "10"))
+# 计算对冲延迟分位数时保留的最近成功请求数（常驻模式下不随运行时间增长）
+HEDGE_SAMPLES = int(os.getenv("HEDGE_SAMPLES", "200"))
+# 精简解析模式（组配置 "fast_parser": True）：连续遇到该数量的已处理条目后停止下载
+FAST_PARSER_STOP_AFTER = int(os.getenv("FAST_PARSER_STOP_AFTER", "5"))
+# 自适应轮询（组配置 min_interval / max_interval）：按近N天发布频率和每次抓取的新条目数调整单个订阅源的轮询间隔
+ADAPTIVE_HISTORY_DAYS = float(os.getenv("ADAPTIVE_HISTORY_DAYS", "7"))
+ADAPTIVE_TARGET_NEW = float(os.getenv("ADAPTIVE_TARGET_NEW", "1"))
+# WebSub 推送（仅常驻模式）：配置公网回调地址后，声明了 hub 的订阅源改为由 hub 推送，租约过期后恢复轮询
+WEBSUB_CALLBACK_URL = os.getenv("WEBSUB_CALLBACK_URL")
+WEBSUB_LISTEN_HOST = os.getenv("WEBSUB_LISTEN_HOST", "0.0.0.0")
+WEBSUB_LISTEN_PORT = int(os.getenv("WEBSUB_LISTEN_PORT", "8080"))
+WEBSUB_LEASE_SECONDS = int(os.getenv("WEBSUB_LEASE_SECONDS", "864000"))
+# 近似重复聚合（组配置 cluster_window 开启）：标题词集合 Jaccard 相似度阈值
+CLUSTER_SIMILARITY = float(os.getenv("CLUSTER_SIMILARITY", "0.5"))
+# 翻译缓存：进程内 LRU 条数；数据库中译文保留天数和行数上限
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "2000"))
+TRANSLATION_CACHE_TTL_DAYS = float(os.getenv("TRANSLATION_CACHE_TTL_DAYS", "30"))
+TRANSLATION_CACHE_MAX_ROWS = int(os.getenv("TRANSLATION_CACHE_MAX_ROWS", "50000"))
 
 # RSS_GROUPS = []  # 将在main函数中从配置文件加载
 
 # ========== 数据库配置 ==========
 PG_URL = os.getenv("PG_URL")
-USE_PG = PG_URL is not None
 
-# 日志记录数据库类型
-if USE_PG:
+# 日志记录数据库类型（RSS_STORAGE 可显式指定 sqlite / postgres / memory）
+STORAGE_BACKEND = os.getenv("RSS_STORAGE") or ("postgres" if PG_URL else "sqlite")
+if STORAGE_BACKEND == "postgres":
     # 安全地记录数据库信息（隐藏密码）
     safe_pg_url = re.sub(r':([^@]+)@', ':****@', PG_URL) if PG_URL else "未配置"
     logger.info(f"🔧 使用 PostgreSQL 数据库: {safe_pg_url}")
     print(f"✅ PostgreSQL ")
+elif STORAGE_BACKEND == "memory":
+    logger.info("🔧 使用内存存储（不持久化）")
+    print("✅ Memory")
 else:
     logger.info(f"🔧 使用 SQLite 数据库: {DATABASE_FILE}")
     print(f"✅ SQLite : {DATABASE_FILE}")
 
-if USE_PG:
-    import asyncpg
-class RSSDatabase:
-    def __init__(self, loop=None):
-        self.loop = loop or asyncio.get_event_loop()
-        self.conn = None
-        self.pg_pool = None
-
-    async def open(self):
-        if USE_PG:
-            self.pg_pool = await asyncpg.create_pool(PG_URL)
-        else:
-            self.conn = await aiosqlite.connect(DATABASE_FILE)
-
-    async def close(self):
-        if USE_PG and self.pg_pool:
-            await self.pg_pool.close()
-        elif self.conn:
-            await self.conn.close()
-
-    async def ensure_initialized(self):
-        """确保数据库表已创建"""
-        await self.create_tables()
-
-    async def create_tables(self):  # 这里缩进修复
-        """改进的建表语句，确保 PostgreSQL 和 SQLite 索引一致"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 主表
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS rss_status (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_url TEXT,
-                        entry_content_hash TEXT,
-                        entry_timestamp DOUBLE PRECISION,
-                        PRIMARY KEY (feed_group, feed_url, entry_url)
-                    );
-                """)
-                # 确保内容哈希索引存在
-                await conn.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS idx_group_content_hash 
-                    ON rss_status(feed_group, entry_content_hash);
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_run_time DOUBLE PRECISION
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS cleanup_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_cleanup_time DOUBLE PRECISION
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS pending_messages (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_id TEXT,
-                        content_hash TEXT,
-                        title TEXT,
-                        translated_title TEXT,
-                        link TEXT,
-                        summary TEXT,
-                        entry_timestamp DOUBLE PRECISION,
-                        sent INTEGER DEFAULT 0,
-                        feed_title TEXT,
-                        PRIMARY KEY (feed_group, feed_url, entry_id)
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS batch_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_batch_sent_time DOUBLE PRECISION
-                    );
-                """)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS rss_status (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_url TEXT,
-                        entry_content_hash TEXT,
-                        entry_timestamp REAL,
-                        PRIMARY KEY (feed_group, feed_url, entry_url)
-                    )""")
-                await c.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS idx_group_content_hash 
-                    ON rss_status(feed_group, entry_content_hash);
-                """)
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_run_time REAL
-                    )""")
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS cleanup_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_cleanup_time REAL
-                    )""")
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS pending_messages (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_id TEXT,
-                        content_hash TEXT,
-                        title TEXT,
-                        translated_title TEXT,
-                        link TEXT,
-                        summary TEXT,
-                        entry_timestamp REAL,
-                        sent INTEGER DEFAULT 0,
-                        feed_title TEXT,
-                        PRIMARY KEY (feed_group, feed_url, entry_id)
-                    )
-                """)
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS batch_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_batch_sent_time REAL
-                    )
-                """)
-                await self.conn.commit()
-
-    async def add_pending_message(self, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO pending_messages (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent, feed_title)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, 0, $10)
-                ON CONFLICT DO NOTHING
-                """, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR IGNORE INTO pending_messages
-                    (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent, feed_title)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
-                """, (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title))
-                await self.conn.commit()
-
-    async def get_pending_messages(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT * FROM pending_messages
-                    WHERE feed_group=$1 AND sent=0
-                    ORDER BY entry_timestamp ASC
-                """, feed_group)
-                return [dict(row) for row in rows]
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    SELECT * FROM pending_messages
-                    WHERE feed_group=? AND sent=0
-                    ORDER BY entry_timestamp ASC
-                """, (feed_group,))
-                keys = [d[0] for d in c.description]
-                rows = await c.fetchall()
-                return [dict(zip(keys, row)) for row in rows]
-
-    async def mark_pending_as_sent(self, feed_group, ids):
-        if not ids:
-            return
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.executemany("""
-                    UPDATE pending_messages SET sent=1
-                    WHERE feed_group=$1 AND entry_id=$2
-                """, [(feed_group, eid) for eid in ids])
-        else:
-            async with self.conn.cursor() as c:
-                await c.executemany("""
-                    UPDATE pending_messages SET sent=1
-                    WHERE feed_group=? AND entry_id=?
-                """, [(feed_group, eid) for eid in ids])
-                await self.conn.commit()
-
-    async def get_last_batch_sent_time(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow("""
-                    SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=$1
-                """, feed_group)
-                return row['last_batch_sent_time'] if row else 0
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=?
-                """, (feed_group,))
-                result = await c.fetchone()
-                return result[0] if result else 0
-
-    async def save_last_batch_sent_time(self, feed_group, ts):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO batch_timestamps (feed_group, last_batch_sent_time)
-                VALUES ($1, $2)
-                ON CONFLICT (feed_group) DO UPDATE SET last_batch_sent_time=EXCLUDED.last_batch_sent_time
-                """, feed_group, ts)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR REPLACE INTO batch_timestamps (feed_group, last_batch_sent_time)
-                    VALUES (?, ?)
-                """, (feed_group, ts))
-                await self.conn.commit()
-
-    async def save_status(self, feed_group, feed_url, entry_url, entry_content_hash, timestamp):
-        """改进的状态保存，确保去重一致性"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 使用 ON CONFLICT 确保唯一性
-                await conn.execute("""
-                    INSERT INTO rss_status (feed_group, feed_url, entry_url, entry_content_hash, entry_timestamp) 
-                    VALUES($1, $2, $3, $4, $5) 
-                    ON CONFLICT (feed_group, feed_url, entry_url) 
-                    DO UPDATE SET 
-                        entry_content_hash = EXCLUDED.entry_content_hash,
-                        entry_timestamp = EXCLUDED.entry_timestamp
-                """, feed_group, feed_url, entry_url, entry_content_hash, timestamp)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "INSERT OR REPLACE INTO rss_status VALUES (?, ?, ?, ?, ?)",
-                    (feed_group, feed_url, entry_url, entry_content_hash, timestamp)
-                )
-                await self.conn.commit()
-
-    async def has_content_hash(self, feed_group, content_hash):
-        """改进的内容哈希检查，确保编码一致性"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 修复：PostgreSQL 参数占位符错误，应该是 $1, $2
-                row = await conn.fetchrow(
-                    "SELECT 1 FROM rss_status WHERE feed_group=$1 AND entry_content_hash=$2 LIMIT 1",
-                    feed_group, content_hash
-                )
-                return row is not None
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "SELECT 1 FROM rss_status WHERE feed_group=? AND entry_content_hash=? LIMIT 1",
-                    (feed_group, content_hash)
-                )
-                return await c.fetchone() is not None
-
-    async def load_status(self):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch("SELECT feed_url, entry_url FROM rss_status")
-                status = {}
-                for row in rows:
-                    feed_url, entry_url = row['feed_url'], row['entry_url']
-                    status.setdefault(feed_url, set()).add(entry_url)
-                return status
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("SELECT feed_url, entry_url FROM rss_status")
-                rows = await c.fetchall()
-                status = {}
-                for feed_url, entry_url in rows:
-                    status.setdefault(feed_url, set()).add(entry_url)
-                return status
-
-    async def load_last_run_time(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow("SELECT last_run_time FROM timestamps WHERE feed_group=$1", feed_group)
-                return row['last_run_time'] if row else 0
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("SELECT last_run_time FROM timestamps WHERE feed_group = ?", (feed_group,))
-                result = await c.fetchone()
-                return result[0] if result else 0
-
-    async def save_last_run_time(self, feed_group, last_run_time):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO timestamps (feed_group, last_run_time)
-                VALUES ($1, $2)
-                ON CONFLICT (feed_group) DO UPDATE SET last_run_time=EXCLUDED.last_run_time
-                """, feed_group, last_run_time)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR REPLACE INTO timestamps (feed_group, last_run_time)
-                    VALUES (?, ?)
-                """, (feed_group, last_run_time))
-                await self.conn.commit()
-
-    async def cleanup_history(self, days, feed_group):
-        now = time.time()
-        cutoff_ts = now - days * 86400
-
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow(
-                    "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group=$1", feed_group
-                )
-                last_cleanup = row['last_cleanup_time'] if row else 0
-                if now - last_cleanup < 86400:
-                    return
-                await conn.execute(
-                    "DELETE FROM rss_status WHERE feed_group=$1 AND entry_timestamp<$2",
-                    feed_group, cutoff_ts
-                )
-                await conn.execute("""
-                    INSERT INTO cleanup_timestamps (feed_group, last_cleanup_time)
-                    VALUES ($1, $2)
-                    ON CONFLICT (feed_group) DO UPDATE SET last_cleanup_time=EXCLUDED.last_cleanup_time
-                """, feed_group, now)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group = ?",
-                    (feed_group,)
-                )
-                result = await c.fetchone()
-                last_cleanup = result[0] if result else 0
-                if now - last_cleanup < 86400:
-                    return
-                await c.execute(
-                    "DELETE FROM rss_status WHERE feed_group=? AND entry_timestamp < ?",
-                    (feed_group, cutoff_ts)
-                )
-                await c.execute("""
-                    INSERT OR REPLACE INTO cleanup_timestamps (feed_group, last_cleanup_time)
-                    VALUES (?, ?)
-                """, (feed_group, now))
-                await self.conn.commit()
 
 # ========== 业务逻辑 ==========
 
@@ -431,7 +138,7 @@ def remove_html_tags(text):
  #   text = text.replace('.', '.\u200c')
     return text
 
-def get_entry_identifier(entry):
+def get_entry_identifier(entry, timestamp=None):
     if hasattr(entry, 'guid') and entry.guid:
         return hashlib.sha256(entry.guid.encode()).hexdigest()
     link = getattr(entry, 'link', '')
@@ -443,7 +150,7 @@ def get_entry_identifier(entry):
         except Exception as e:
             logger.warning(f"URL解析失败 {link}: {e}")
     title = getattr(entry, 'title', '')
-    pub_date = get_entry_timestamp(entry).isoformat() if get_entry_timestamp(entry) else ''
+    pub_date = (timestamp or get_entry_timestamp(entry)).isoformat()
     return hashlib.sha256(f"{title}|||{pub_date}".encode()).hexdigest()
 
 def get_entry_content_hash(entry):
@@ -484,11 +191,55 @@ def get_entry_timestamp(entry):
         dt = datetime(*entry.updated_parsed[:6], tzinfo=pytz.utc)
     return dt
 
-@retry(
-    stop=stop_after_attempt(1),
-    wait=wait_exponential(multiplier=1, min=5, max=30),
-    retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)),
-)
+class NormalizedEntry:
+    """条目规范化结果：解析后只计算一次，去重/过滤/高亮/渲染/待发送队列都读这里
+
+    title / link / summary 为原文；clean_* 为 remove_html_tags 后的文本；
+    match_* 为原文小写，供关键词过滤；translated_title 翻译后填入；alternates 为近似重复聚合的其它来源链接
+    """
+    __slots__ = (
+        "entry_id", "content_hash", "timestamp", "title", "link", "summary",
+        "clean_title", "clean_summary", "match_title", "match_link", "match_summary",
+        "translated_title", "alternates",
+    )
+
+    def __init__(self, entry_id, content_hash, timestamp, title, link, summary, translated_title=None, alternates=None):
+        self.entry_id = entry_id
+        self.content_hash = content_hash
+        self.timestamp = timestamp
+        self.title = title
+        self.link = link
+        self.summary = summary
+        self.clean_title = remove_html_tags(title)
+        self.clean_summary = remove_html_tags(summary)
+        self.match_title = title.lower()
+        self.match_link = link.lower()
+        self.match_summary = summary.lower()
+        self.translated_title = translated_title
+        self.alternates = alternates if alternates is not None else []
+
+    @classmethod
+    def from_entry(cls, entry):
+        timestamp = get_entry_timestamp(entry)
+        return cls(
+            get_entry_identifier(entry, timestamp),
+            get_entry_content_hash(entry),
+            timestamp.timestamp(),
+            getattr(entry, "title", "") or "",
+            getattr(entry, "link", "") or "",
+            getattr(entry, "summary", "") or "",
+        )
+
+    @classmethod
+    def from_pending_row(cls, row, alternates=None):
+        # 入队的译文来自翻译接口，发送前与原标题同样清理标签/话题/@提及
+        translated_title = remove_html_tags(row["translated_title"]) if row["translated_title"] else None
+        return cls(
+            row["entry_id"], row["content_hash"], row["entry_timestamp"],
+            row["title"] or "", row["link"] or "", row.get("summary", "") or "",
+            translated_title=translated_title or None, alternates=alternates,
+        )
+
 async def send_single_message(bot, chat_id, text, disable_web_page_preview=False):
     try:
         MAX_MESSAGE_LENGTH = 4096
@@ -507,9 +258,11 @@ async def send_single_message(bot, chat_id, text, disable_web_page_preview=False
         if current_chunk:
             text_chunks.append('\n\n'.join(current_chunk))
         for chunk in text_chunks:
-            await bot.send_message(
-                chat_id=chat_id,
-                text=chunk,
+            # 限频、429 重新排队、网络重试由 tg_delivery 处理
+            await tg_delivery.send_message(
+                bot,
+                chat_id,
+                chunk,
                 parse_mode='MarkdownV2',
                 disable_web_page_preview=disable_web_page_preview,
                 read_timeout=10,
@@ -520,71 +273,318 @@ async def send_single_message(bot, chat_id, text, disable_web_page_preview=False
     except Exception as e:
         raise
 
+class HostLimiter:
+    """按主机的自适应并发限制
+
+    每个主机一个并发窗口：快速返回的200加性增长（每满一个窗口+1），
+    429/503/超时则减半；所有主机共享一个全局上限。
+    """
+
+    def __init__(self, global_limit, initial=2, max_limit=4, slow_seconds=5.0):
+        self.global_semaphore = asyncio.Semaphore(global_limit)
+        self.initial = initial
+        self.max_limit = max_limit
+        self.slow_seconds = slow_seconds
+        self.hosts = {}
+
+    def _state(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = {
+                "limit": self.initial,
+                "in_flight": 0,
+                "waiters": [],
+                "requests": 0,
+                "backoffs": 0,
+            }
+        return self.hosts[host]
+
+    def _wake(self, state):
+        free = int(state["limit"]) - state["in_flight"]
+        for fut in state["waiters"]:
+            if free <= 0:
+                break
+            if not fut.done():
+                fut.set_result(None)
+                free -= 1
+
+    @asynccontextmanager
+    async def slot(self, host):
+        state = self._state(host)
+        while state["in_flight"] >= int(state["limit"]):
+            fut = asyncio.get_running_loop().create_future()
+            state["waiters"].append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                # _wake 已把名额分给这个等待者，但它在恢复前被取消（对冲落败、组任务取消）：转给下一个
+                if fut.done() and not fut.cancelled():
+                    self._wake(state)
+                raise
+            finally:
+                state["waiters"].remove(fut)
+        state["in_flight"] += 1
+        try:
+            async with self.global_semaphore:
+                yield
+        finally:
+            state["in_flight"] -= 1
+            self._wake(state)
+
+    def record(self, host, status, elapsed):
+        """根据响应结果调整并发窗口，status 为 None 表示超时或连接错误"""
+        state = self._state(host)
+        state["requests"] += 1
+        if status in (429, 503) or status is None:
+            state["limit"] = max(1.0, state["limit"] / 2)
+            state["backoffs"] += 1
+            logger.info(f"🐢 {host} 并发降至 {int(state['limit'])} (status={status})")
+        elif status == 200 and elapsed < self.slow_seconds:
+            state["limit"] = min(float(self.max_limit), state["limit"] + 1 / state["limit"])
+            self._wake(state)
+
+    def summary(self):
+        return {
+            host: {
+                "limit": int(state["limit"]),
+                "requests": state["requests"],
+                "backoffs": state["backoffs"],
+            }
+            for host, state in self.hosts.items()
+        }
+
+host_limiter = HostLimiter(FETCH_GLOBAL_LIMIT, FETCH_HOST_INITIAL, FETCH_HOST_MAX, FETCH_SLOW_SECONDS)
+
+class MirrorHealth:
+    """rsshub 镜像健康度
+
+    记录每个镜像的 EWMA 延迟、EWMA 错误率和最近一次失败时间，跨运行持久化。
+    分数越低越优先；对冲延迟取最近 hedge_samples 个成功请求延迟的分位数。
+    """
+
+    def __init__(self, alpha=0.3, failure_cooldown=600, hedge_percentile=0.9, hedge_min=1.0, hedge_max=10.0,
+                 hedge_samples=200):
+        self.alpha = alpha
+        self.failure_cooldown = failure_cooldown
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min = hedge_min
+        self.hedge_max = hedge_max
+        self.stats = {}
+        self.latencies = deque(maxlen=hedge_samples)
+
+    def load(self, stats):
+        self.stats.update(stats)
+
+    def record(self, domain, ok, latency):
+        state = self.stats.setdefault(domain, {
+            "ewma_latency": None,
+            "error_rate": 0.0,
+            "last_failure": 0.0,
+            "samples": 0,
+        })
+        a = self.alpha
+        state["error_rate"] = (1 - a) * state["error_rate"] + a * (0.0 if ok else 1.0)
+        if ok:
+            if state["ewma_latency"] is None:
+                state["ewma_latency"] = latency
+            else:
+                state["ewma_latency"] = (1 - a) * state["ewma_latency"] + a * latency
+            self.latencies.append(latency)
+        else:
+            state["last_failure"] = time.time()
+        state["samples"] += 1
+
+    def score(self, domain):
+        state = self.stats.get(domain)
+        if not state:
+            return self.hedge_max  # 未知镜像排在中间，保证有机会被探测
+        latency = state["ewma_latency"] if state["ewma_latency"] is not None else 30.0
+        score = latency * (1 + 4 * state["error_rate"])
+        if time.time() - state["last_failure"] < self.failure_cooldown:
+            score += 30.0
+        return score
+
+    def ordered(self, domains):
+        return sorted(domains, key=self.score)
+
+    def hedge_delay(self):
+        samples = self.latencies or [
+            state["ewma_latency"] for state in self.stats.values() if state["ewma_latency"] is not None
+        ]
+        if not samples:
+            return min(self.hedge_max, self.hedge_min * 3)
+        samples = sorted(samples)
+        value = samples[int(self.hedge_percentile * (len(samples) - 1))]
+        return min(self.hedge_max, max(self.hedge_min, value))
+
+mirror_health = MirrorHealth(
+    hedge_percentile=HEDGE_PERCENTILE,
+    hedge_min=HEDGE_MIN_DELAY,
+    hedge_max=HEDGE_MAX_DELAY,
+    hedge_samples=HEDGE_SAMPLES,
+)
+# 翻译密钥链：主密钥优先，熔断期间直接用备用密钥；熔断状态各组共享并跨运行持久化
+translator_chain = TranslatorChain([
+    ("primary", TENCENTCLOUD_SECRET_ID, TENCENTCLOUD_SECRET_KEY),
+    ("backup", TENCENT_SECRET_ID, TENCENT_SECRET_KEY),
+])
+
 @retry(
     stop=stop_after_attempt(1),
     wait=wait_exponential(multiplier=1, min=5, max=30),
     retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)),
 )
-async def fetch_feed(session, feed_url):
+async def fetch_feed(session, feed_url, cache=None, known_ids=None):
+    """拉取订阅源
+
+    cache 为数据库中保存的条件请求缓存（etag / last_modified / body_hash）。
+    known_ids 不为 None 时使用精简流式解析，遇到连续的已处理条目提前结束。
+    返回 (feed_data, feed_url, validators)：
+    - 服务器返回304或内容指纹未变化时 feed_data 为 None，跳过解析
+    - validators 需在该订阅源处理成功后再写回数据库
+    拉取失败（网络错误、4xx/5xx、所有镜像都失败）时抛出 FeedFetchError。
+    """
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36'}
+    if cache:
+        if cache.get("etag"):
+            headers['If-None-Match'] = cache["etag"]
+        if cache.get("last_modified"):
+            headers['If-Modified-Since'] = cache["last_modified"]
     parsed = urlparse(feed_url)
     
-    # 构建尝试的域名列表
+    # rsshub.app 按镜像健康度排序并对冲请求，其他源直接请求
     if parsed.netloc == "rsshub.app":
-        try_domains = [parsed.netloc] + BACKUP_DOMAINS
+        domains = mirror_health.ordered([parsed.netloc] + BACKUP_DOMAINS)
+        result = await _hedged_fetch(session, feed_url, parsed.netloc, domains, headers, cache, known_ids)
     else:
-        try_domains = [parsed.netloc]
+        result = await _fetch_from_domain(session, feed_url, parsed.netloc, headers, cache, known_ids)
     
-    for domain in try_domains:
-        current_url = feed_url.replace(parsed.netloc, domain)
-        
-        try:
-            async with semaphore:
-                async with session.get(current_url, headers=headers, timeout=30) as response:
-                    if response.status in (503, 403, 404, 429):
-                        continue
-                    response.raise_for_status()
-                    
-                    feed_data = parse(await response.read())
-                    
-                    # ✅ 关键修复：无论用哪个备用域名，都返回原始feed_url
-                    # 这样不同域名访问同一RSS源时，数据库状态会合并在一起
-                    return feed_data, feed_url
+    if result is None:
+        raise FeedFetchError(feed_url)
+    if result is FEED_NOT_MODIFIED:
+        logger.debug(f"订阅源未更新: {feed_url}")
+        return None, feed_url, None
+    
+    # ✅ 关键修复：无论用哪个备用域名，都返回原始feed_url
+    # 这样不同域名访问同一RSS源时，数据库状态会合并在一起
+    feed_data, validators = result
+    return feed_data, feed_url, validators
 
-        except aiohttp.ClientResponseError as e:
-            if e.status in (503, 403, 404, 429):
-                continue
-        except Exception:
-            continue
+FEED_NOT_MODIFIED = object()
+
+class FeedFetchError(Exception):
+    """拉取失败：与“未更新”区分，失败不计入自适应轮询的收益"""
+
+async def _fetch_from_domain(session, current_url, domain, headers, cache, known_ids=None):
+    """向单个域名请求订阅源
+
+    返回 (feed_data, validators)；未更新返回 FEED_NOT_MODIFIED；失败返回 None
+    """
+    status = None
+    started = time.monotonic()
+    cancelled = False
+    try:
+        async with host_limiter.slot(domain):
+            async with session.get(current_url, headers=headers, timeout=30) as response:
+                status = response.status
+                if response.status == 304:
+                    return FEED_NOT_MODIFIED
+                if response.status in (503, 403, 404, 429):
+                    return None
+                response.raise_for_status()
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+                if known_ids is not None:
+                    return await _read_feed_fast(response, cache, known_ids, validators)
+                
+                body = await response.read()
+                body_hash = hashlib.sha256(body).hexdigest()
+                # 不支持条件请求的服务器：内容完全一致时同样跳过解析
+                if cache and cache.get("body_hash") == body_hash:
+                    return FEED_NOT_MODIFIED
+                validators["body_hash"] = body_hash
+                return parse(body), validators
+    except asyncio.CancelledError:
+        cancelled = True  # 对冲请求中落败的一方，不计入主机状态
+        raise
+    except Exception:
+        return None
+    finally:
+        if not cancelled:
+            host_limiter.record(domain, status, time.monotonic() - started)
+
+async def _read_feed_fast(response, cache, known_ids, validators):
+    """边下载边用 FastFeedParser 解析；提前结束时没有完整内容指纹，只保留 ETag/Last-Modified"""
+    parser = FastFeedParser(
+        is_known=lambda entry: get_entry_identifier(entry) in known_ids,
+        stop_after=FAST_PARSER_STOP_AFTER,
+    )
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(65536):
+        body.extend(chunk)
+        parser.feed(chunk)
+        if parser.done:
+            validators["body_hash"] = None
+            return parser.result(), validators
     
-    return None, feed_url  # ✅ 失败时也返回原始feed_url
+    body_hash = hashlib.sha256(body).hexdigest()
+    if cache and cache.get("body_hash") == body_hash:
+        return FEED_NOT_MODIFIED
+    validators["body_hash"] = body_hash
+    parser.close()
+    if parser.failed:
+        logger.debug(f"精简解析失败，回退 feedparser: {response.url}")
+        return parse(bytes(body)), validators
+    return parser.result(), validators
 
-async def translate_with_credentials(secret_id, secret_key, text):
-    loop = asyncio.get_running_loop()
+async def _hedged_fetch(session, feed_url, netloc, domains, headers, cache, known_ids=None):
+    """按顺序尝试镜像：当前镜像超过对冲延迟仍未响应时并发请求下一个，
+    先成功者胜出，其余请求取消；某个镜像失败则立即换下一个。"""
+    queue = list(domains)
+    pending = set()
+
+    async def attempt(domain):
+        started = time.monotonic()
+        result = await _fetch_from_domain(session, feed_url.replace(netloc, domain), domain, headers, cache, known_ids)
+        mirror_health.record(domain, result is not None, time.monotonic() - started)
+        return result
+
+    def launch():
+        pending.add(asyncio.create_task(attempt(queue.pop(0))))
+
+    launch()
+    try:
+        while pending:
+            hedge_delay = mirror_health.hedge_delay() if queue and len(pending) < 2 else None
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.debug(f"镜像 {hedge_delay:.1f}秒未响应，发起对冲请求: {queue[0]}")
+                launch()
+                continue
+            for task in done:
+                pending.discard(task)
+                result = task.result()
+                if result is not None:
+                    return result
+            if not pending and queue:
+                launch()
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+def truncate_utf8(text, max_bytes=2000):
     text_bytes = text.encode('utf-8')
-    if len(text_bytes) > 2000:
-        safe_bytes = text_bytes[:2000]
+    if len(text_bytes) > max_bytes:
+        safe_bytes = text_bytes[:max_bytes]
         while safe_bytes[-1] & 0xC0 == 0x80:
             safe_bytes = safe_bytes[:-1]
         text = safe_bytes.decode('utf-8', errors='ignore')
      #   logger.warning(f"文本截断至 {len(text)} 字符 ({len(safe_bytes)} 字节)")
-    try:
-        return await loop.run_in_executor(
-            None, 
-            lambda: _sync_translate(secret_id, secret_key, text)
-        )
-    except Exception as e:
-    #    logger.error(f"翻译执行失败: {type(e).__name__} - {str(e)}")
-        raise
+    return text
 
-def is_need_translate(text):
-    try:
-        lang = detect(text)
-        # 只对英文、日文、韩文、阿拉伯文等非中文做翻译
-        return lang not in ("zh-cn", "zh-tw", "zh", "yue")
-    except LangDetectException:
-        return False
-    
 def is_mostly_symbols(text):
     """检查文本是否主要由符号、数字组成"""
     if not text:
@@ -597,17 +597,16 @@ def is_mostly_symbols(text):
     # 如果字母比例低于30%，认为是符号/数字文本
     return alpha_count / total_chars < 0.3 if total_chars > 0 else True
 
+def _sync_translate_batch(secret_id, secret_key, texts):
+    return get_translator(secret_id, secret_key, TENCENT_REGION).translate_batch(texts)
+
+def _sync_warmup(secret_id, secret_key):
+    return get_translator(secret_id, secret_key, TENCENT_REGION).warmup()
+
 def _sync_translate(secret_id, secret_key, text):
     try:
-        cred = credential.Credential(secret_id, secret_key)
-        clientProfile = ClientProfile(httpProfile=HttpProfile(endpoint="tmt.tencentcloudapi.com"))
-        client = tmt_client.TmtClient(cred, TENCENT_REGION, clientProfile)
-        req = models.TextTranslateRequest()
-        req.SourceText = remove_html_tags(text)
-        req.Source = "auto"
-        req.Target = "zh"
-        req.ProjectId = 0
-        return client.TextTranslate(req).TargetText
+        # 复用该密钥的常驻客户端（keep-alive）；text 已由 auto_translate_text 清理
+        return get_translator(secret_id, secret_key, TENCENT_REGION).translate(text)
     except TencentCloudSDKException as e:
         error_details = {
             "code": getattr(e, "code", ""),
@@ -628,9 +627,10 @@ async def should_send_entry(entry, processor):
     if not filter_config.get("enable", False):
         return True
         
-    title = getattr(entry, "title", "") or ""      # 获取标题
-    link = getattr(entry, "link", "") or ""        # 获取链接
-    summary = getattr(entry, "summary", "") or ""  # 获取摘要
+    # 规范化时已转小写
+    title = entry.match_title
+    link = entry.match_link
+    summary = entry.match_summary
     
     # 获取过滤范围配置，默认为 "title"
     scope = filter_config.get("scope", "title")
@@ -656,7 +656,7 @@ async def should_send_entry(entry, processor):
         content_parts = [title]
     
     # 合并内容并进行过滤检查
-    content = " ".join(content_parts).lower()
+    content = " ".join(content_parts)
     has_keyword = any(keyword in content for keyword in keywords)
     
     # 记录过滤详情（调试用）
@@ -672,57 +672,139 @@ async def should_send_entry(entry, processor):
     else:
         return True
     
+def clean_translate_text(text):
+    """清理待翻译文本；过短或主要是符号/数字时返回 None，直接用原文"""
+    cleaned_text = remove_html_tags(text).strip()
+    if len(cleaned_text) <= 3 or is_mostly_symbols(cleaned_text):
+      #  logger.debug(f"跳过翻译 - 文本过短或主要为符号: {cleaned_text}")
+        return None
+    return cleaned_text
+
+async def auto_translate_text(text):
+    cleaned_text = clean_translate_text(text)
+    if cleaned_text is None:
+        return escape(remove_html_tags(text).strip())
+    
+    cached = await translation_cache.get(cleaned_text) if translation_cache else None
+    if cached is not None:
+        return cached
+    return await _translate_single(cleaned_text)
+
+async def translate_titles(texts):
+    """批量翻译，结果与逐条 auto_translate_text 相同
+
+    未命中缓存的文本去重后按 TRANSLATE_BATCH_SIZE / TRANSLATE_BATCH_CHARS 分包调用 TextTranslateBatch；
+    某一包失败或返回条数不符时，该包逐条翻译，逐条也失败的位置为 None。
+    """
+    results = [None] * len(texts)
+    todo = {}  # 清理后的原文 -> 位置列表
+    for i, text in enumerate(texts):
+        cleaned_text = clean_translate_text(text)
+        if cleaned_text is None:
+            results[i] = escape(remove_html_tags(text).strip())
+            continue
+        if cleaned_text in todo:
+            todo[cleaned_text].append(i)
+            continue
+        cached = await translation_cache.get(cleaned_text) if translation_cache else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            todo[cleaned_text] = [i]
+
+    # 各包并发提交，由 tencent_tmt 的令牌桶按 QPS 放行；gather 保持顺序
+    chunks = list(_translate_chunks(list(todo)))
+    for chunk, translated in zip(chunks, await asyncio.gather(*map(_translate_chunk, chunks))):
+        for cleaned_text, result in zip(chunk, translated):
+            for i in todo[cleaned_text]:
+                results[i] = result
+    return results
+
+def _translate_chunks(texts):
+    chunk, size = [], 0
+    for text in texts:
+        length = len(truncate_utf8(text))
+        if chunk and (len(chunk) >= TRANSLATE_BATCH_SIZE or size + length > TRANSLATE_BATCH_CHARS):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(text)
+        size += length
+    if chunk:
+        yield chunk
+
+async def _translate_chunk(chunk):
+    """翻译一包；整包失败或条数不符时逐条并发翻译，逐条也失败的为 None"""
+    try:
+        translated = await _translate_batch_uncached([truncate_utf8(text) for text in chunk])
+    except Exception as e:
+        logger.warning(f"批量翻译失败（{len(chunk)} 条），改为逐条翻译: {e}")
+        translated = None
+    if translated is None or len(translated) != len(chunk):
+        translated = [None] * len(chunk)
+    return await asyncio.gather(*(_finish_translation(text, result) for text, result in zip(chunk, translated)))
+
+async def _finish_translation(cleaned_text, result):
+    if result:
+        if translation_cache:
+            await translation_cache.put(cleaned_text, result)
+        return result
+    try:
+        return await _translate_single(cleaned_text)
+    except Exception as e:
+        logger.error(f"翻译失败: {e}")
+        return None
+
+async def _translate_batch_uncached(texts):
+    """批量翻译，跳过熔断中的密钥"""
+    return await translator_chain.call(_sync_translate_batch, texts)
+
 @retry(
     stop=stop_after_attempt(2),
     wait=wait_exponential(multiplier=1, min=2, max=10),
 )
-async def auto_translate_text(text):
-    cleaned_text = remove_html_tags(text).strip()
-    
-    # 如果文本过短或主要是符号/数字，直接返回原文
-    if len(cleaned_text) <= 3 or is_mostly_symbols(cleaned_text):
-      #  logger.debug(f"跳过翻译 - 文本过短或主要为符号: {cleaned_text}")
+async def _translate_single(cleaned_text):
+    translated = await _translate_uncached(cleaned_text)
+    if translated is None:
         return escape(cleaned_text)
-    
+    if translation_cache:
+        await translation_cache.put(cleaned_text, translated)
+    return translated
+
+async def translate_entries(entries, processor, only_foreign=False):
+    """开启翻译时批量翻译尚未翻译的条目标题，填入 entry.translated_title（失败的留空，发送时再逐条翻译）"""
+    if not processor.get("translate", False):
+        return
+    targets = [
+        entry for entry in entries
+        if not entry.translated_title and (not only_foreign or is_need_translate(entry.clean_title))
+    ]
+    if not targets:
+        return
+    subjects = [entry.clean_title if entry.title else "无标题" for entry in targets]
+    for entry, translated in zip(targets, await translate_titles(subjects)):
+        if translated is not None:
+            entry.translated_title = translated
+
+async def _translate_uncached(cleaned_text):
+    """按熔断状态依次尝试主/备用密钥；语言识别失败、所有密钥熔断或没有备用密钥时返回 None，由调用方回退原文"""
     try:
-        # 首先尝试主密钥
-        try:
-            return await translate_with_credentials(
-                TENCENTCLOUD_SECRET_ID, 
-                TENCENTCLOUD_SECRET_KEY,
-                cleaned_text
-            )
-        except TencentCloudSDKException as e:
-            if getattr(e, "code", "") == "FailedOperation.LanguageRecognitionErr":
-             #   logger.warning(f"腾讯云语言识别失败，返回原文: {cleaned_text[:100]}")
-                return escape(cleaned_text)
-            else:
-          #      logger.error(f"主密钥翻译失败: [Code: {e.code}] {e.message}")
-                raise
-                
-    except Exception as first_error:
-        # 只有在非语言识别错误的情况下才尝试备用密钥
+        return await translator_chain.call(_sync_translate, truncate_utf8(cleaned_text))
+    except TranslationUnavailable:
+        return None
+    except Exception as e:
+        if classify_error(e) == "content":
+         #   logger.warning(f"腾讯云语言识别失败，返回原文: {cleaned_text[:100]}")
+            return None
         if TENCENT_SECRET_ID and TENCENT_SECRET_KEY:
-        #    logger.warning("主翻译密钥失败（非语言识别错误），尝试备用密钥...")
-            try:
-                return await translate_with_credentials(
-                    TENCENT_SECRET_ID,
-                    TENCENT_SECRET_KEY,
-                    cleaned_text
-                )
-            except TencentCloudSDKException as e:
-                if getattr(e, "code", "") == "FailedOperation.LanguageRecognitionErr":
-                 #   logger.warning(f"备用密钥语言识别失败，返回原文: {cleaned_text[:100]}")
-                    return escape(cleaned_text)
-                else:
-                #    logger.error(f"备用密钥翻译失败: [Code: {e.code}] {e.message}")
-                    raise
-            except Exception as e:
-         #       logger.error(f"备用密钥翻译未知错误: {type(e).__name__} - {str(e)}")
-                raise
-        else:
+            raise
       #      logger.error("主翻译密钥失败，且未配置备用密钥")
-            return escape(cleaned_text)
+        return None
+
+def format_alternates(entry):
+    """近似重复聚合后代表条目附带的其它来源链接"""
+    if not entry.alternates:
+        return ""
+    return "\n🔗 " + " · ".join(f"[{escape(source)}]({escape(link)})" for source, link in entry.alternates)
 
 async def generate_group_message(feed_data, entries, processor):
     try:
@@ -753,10 +835,12 @@ async def generate_group_message(feed_data, entries, processor):
         highlight_keywords = highlight_config.get("keywords", [])
         
         for entry in entries:
-            raw_subject = remove_html_tags(entry.title or "无标题")
+            raw_subject = entry.clean_title if entry.title else "无标题"
             
-            # 检查是否需要翻译
-            if processor.get("translate", False):
+            # 检查是否需要翻译（待发送队列中的条目入队时已翻译）
+            if entry.translated_title:
+                translated_subject = entry.translated_title
+            elif processor.get("translate", False):
                 translated_subject = await auto_translate_text(raw_subject)
             else:
                 translated_subject = raw_subject
@@ -771,8 +855,7 @@ async def generate_group_message(feed_data, entries, processor):
                 # 根据scope配置检查摘要
                 has_keyword_in_summary = False
                 if highlight_scope == "all":
-                    raw_summary = getattr(entry, "summary", "") or ""
-                    summary_text = remove_html_tags(raw_summary).lower()
+                    summary_text = entry.clean_summary.lower()
                     has_keyword_in_summary = any(keyword.lower() in summary_text for keyword in highlight_keywords)
                 
                 # 如果标题或摘要（根据scope）包含关键词，使用加粗模板
@@ -794,14 +877,12 @@ async def generate_group_message(feed_data, entries, processor):
             
             # 检查模板是否需要summary字段
             if "{summary}" in selected_template:
-                raw_summary = getattr(entry, "summary", "") or ""
-                cleaned_summary = remove_html_tags(raw_summary)
-                cleaned_summary = cleaned_summary.replace('.', '.\u200c')
+                cleaned_summary = entry.clean_summary.replace('.', '.\u200c')
                 safe_summary = escape(cleaned_summary)
                 format_kwargs["summary"] = safe_summary
             
             # 使用选择的模板生成消息
-            message = selected_template.format(**format_kwargs)
+            message = selected_template.format(**format_kwargs) + format_alternates(entry)
             messages.append(message)
         
         full_message = await _format_batch_message(header, messages, processor)
@@ -835,10 +916,12 @@ async def generate_single_messages(feed_data, entries, processor):
         highlight_keywords = highlight_config.get("keywords", [])
         
         for entry in entries:
-            raw_subject = remove_html_tags(entry.title or "无标题")
+            raw_subject = entry.clean_title if entry.title else "无标题"
             
-            # 检查是否需要翻译
-            if processor.get("translate", False):
+            # 检查是否需要翻译（待发送队列中的条目入队时已翻译）
+            if entry.translated_title:
+                translated_subject = entry.translated_title
+            elif processor.get("translate", False):
                 translated_subject = await auto_translate_text(raw_subject)
             else:
                 translated_subject = raw_subject
@@ -858,8 +941,7 @@ async def generate_single_messages(feed_data, entries, processor):
                 # 根据scope配置检查摘要
                 has_keyword_in_summary = False
                 if highlight_scope == "all":
-                    raw_summary = getattr(entry, "summary", "") or ""
-                    summary_text = remove_html_tags(raw_summary).lower()
+                    summary_text = entry.clean_summary.lower()
                     has_keyword_in_summary = any(keyword.lower() in summary_text for keyword in highlight_keywords)
                 
                 # 如果标题或摘要（根据scope）包含关键词，使用加粗模板
@@ -881,14 +963,12 @@ async def generate_single_messages(feed_data, entries, processor):
             
             # 检查模板是否需要summary字段
             if "{summary}" in selected_template:
-                raw_summary = getattr(entry, "summary", "") or ""
-                cleaned_summary = remove_html_tags(raw_summary)
-                cleaned_summary = cleaned_summary.replace('.', '.\u200c')
+                cleaned_summary = entry.clean_summary.replace('.', '.\u200c')
                 safe_summary = escape(cleaned_summary)
                 format_kwargs["summary"] = safe_summary
             
             # 使用选择的模板生成消息
-            message_content = selected_template.format(**format_kwargs)
+            message_content = selected_template.format(**format_kwargs) + format_alternates(entry)
             
             # 添加header到每条消息
             full_message = header + message_content
@@ -904,8 +984,8 @@ async def generate_single_messages(feed_data, entries, processor):
         return []
 
 async def send_single_messages_separately(bot, chat_id, messages_data, processor):
-    """单独发送每条消息"""
-    sent_count = 0
+    """按顺序单独发送每条消息（间隔由 tg_delivery 控制），返回发送成功的条目ID"""
+    sent_ids = []
     for msg_data in messages_data:
         try:
             await send_single_message(
@@ -914,13 +994,13 @@ async def send_single_messages_separately(bot, chat_id, messages_data, processor
                 msg_data["content"],
                 disable_web_page_preview=not processor.get("preview", True)
             )
-            sent_count += 1
-            # 在消息之间添加短暂延迟，避免发送过快
-            await asyncio.sleep(0.5)
+            sent_ids.append(msg_data["entry"].entry_id)
         except Exception as e:
-            logger.error(f"发送单条消息失败: {e}")
+            # 后面的消息留到下一轮，保持顺序
+            logger.error(f"发送单条消息失败[{chat_id}]: {e}")
+            break
     
-    return sent_count
+    return sent_ids
 async def _format_batch_message(header, messages, processor):
     """改进的批量消息格式化，确保Markdown格式完整"""
     MAX_MESSAGE_LENGTH = 4096
@@ -984,18 +1064,22 @@ async def send_batch_messages(bot, chat_id, message_content, disable_web_page_pr
                         bot, chat_id, segment, 
                         disable_web_page_preview=disable_web_page_preview
                     )
-                    if i < len(message_content) - 1:  # 不是最后一条
-                        await asyncio.sleep(1)  # 避免发送过快
                 except Exception as e:
-                    logger.error(f"发送分段消息失败: {e}")
+                    # 该聊天整条消息算发送失败，下次重发
+                    logger.error(f"发送分段消息失败[{chat_id}]: {e}")
+                    raise
     else:  # 单条消息
         await send_single_message(
             bot, chat_id, message_content,
             disable_web_page_preview=disable_web_page_preview
         )
 
+async def fan_out(db: Storage, group_key, entry_ids, render, send):
+    """把条目发送到 TELEGRAM_CHAT_ID 中的全部聊天，见 tg_delivery.fan_out"""
+    return await tg_delivery.fan_out(db, group_key, TELEGRAM_CHAT_ID, entry_ids, render, send)
+
 # 修改批量发送函数中的调用
-async def process_batch_send(group, db: RSSDatabase):
+async def process_batch_send(group, db: Storage, check_interval=True):
     group_key = group["group_key"]
     bot_token = group["bot_token"]
     processor = group["processor"]
@@ -1006,7 +1090,7 @@ async def process_batch_send(group, db: RSSDatabase):
         
     now = datetime.now(pytz.utc).timestamp()
     last_batch_sent = await db.get_last_batch_sent_time(group_key)
-    if now - last_batch_sent < batch_interval:
+    if check_interval and now - last_batch_sent < batch_interval:
         return
         
     pending = await db.get_pending_messages(group_key)
@@ -1014,12 +1098,16 @@ async def process_batch_send(group, db: RSSDatabase):
         await db.save_last_batch_sent_time(group_key, now)
         return
 
+    alternates = {}
+    if group.get("cluster_window"):
+        alternates = await db.load_story_alternates(group_key, [row["entry_id"] for row in pending])
+
     # 按 feed_url 分组消息
     feed_url_to_msgs = defaultdict(list)
     for row in pending:
         feed_url_to_msgs[row["feed_url"]].append(row)
 
-    bot = Bot(token=bot_token)
+    bot = await get_bot(bot_token)
     sent_entry_ids = []
     
     for feed_url, msgs in feed_url_to_msgs.items():
@@ -1029,29 +1117,27 @@ async def process_batch_send(group, db: RSSDatabase):
         class DummyFeed:
             feed = {'title': feed_title}
             
-        class Entry:
-            def __init__(self, row):
-                self.title = row["translated_title"] or row["title"]
-                self.link = row["link"]
-                self.summary = row.get("summary", "") or ""  # ✅ 新增摘要支持
-        entries = [Entry(row) for row in msgs]
+        rows = {row["entry_id"]: row for row in msgs}
         
-        try:
+        async def render(ids):
             # 生成消息内容
-            feed_message = await generate_group_message(
-                DummyFeed, entries, {**processor, "translate": False}
+            entries = [NormalizedEntry.from_pending_row(rows[entry_id], alternates.get(entry_id)) for entry_id in ids]
+            return await generate_group_message(DummyFeed, entries, {**processor, "translate": False})
+        
+        async def send(chat_id, ids, feed_message):
+            # 发送消息（支持分段）
+            await send_batch_messages(
+                bot,
+                chat_id,
+                feed_message,
+                disable_web_page_preview=not processor.get("preview", True)
             )
-            
-            if feed_message:
-                # 发送消息（支持分段）
-                await send_batch_messages(
-                    bot,
-                    TELEGRAM_CHAT_ID[0],
-                    feed_message,
-                    disable_web_page_preview=not processor.get("preview", True)
-                )
-                # 记录已发送的消息ID
-                sent_entry_ids.extend([row["entry_id"] for row in msgs])
+            return ids
+        
+        try:
+            complete = await fan_out(db, group_key, list(rows), render, send)
+            # 记录已发送到全部聊天的消息ID
+            sent_entry_ids.extend(entry_id for entry_id in rows if entry_id in complete)
                 
         except Exception as e:
             logger.error(f"批量推送失败[{group_key}-{feed_url}]: {e}")
@@ -1059,153 +1145,356 @@ async def process_batch_send(group, db: RSSDatabase):
     # 标记已发送的消息
     if sent_entry_ids:
         await db.mark_pending_as_sent(group_key, sent_entry_ids)
+    await db.flush()  # 部分聊天的发送记录
     
     await db.save_last_batch_sent_time(group_key, now)
 
 # ========== 组采集（采集但可选择是否立即推送） ==========
-async def process_group(session, group_config, global_status, db: RSSDatabase):
-    """处理单个RSS组"""
+# 单个订阅源的处理锁：轮询与 WebSub 推送可能同时处理同一个源
+feed_locks = defaultdict(asyncio.Lock)
+# 常驻模式且配置了 WEBSUB_CALLBACK_URL 时创建
+websub_manager = None
+translation_cache = None
+
+async def fetch_feed_cached(session, feed_url, group_config, global_status, db: Storage):
+    """带条件请求缓存的拉取，组开启 fast_parser 时使用精简流式解析"""
+    feed_cache = await db.load_feed_cache(feed_url)
+    known_ids = None
+    if group_config.get("fast_parser", False):
+        known_ids = await global_status.entry_ids(feed_url)
+    return await fetch_feed(session, feed_url, feed_cache, known_ids)
+
+async def process_feed(feed_url, fetch_result, group_config, global_status, db: Storage, bot):
+    """去重、过滤并入库/发送单个订阅源的新条目，返回新条目数"""
+    new_entries = await select_new_entries(fetch_result, group_config, global_status, db)
+    return await deliver_new_entries(feed_url, fetch_result, group_config, global_status, db, bot, new_entries)
+
+async def select_new_entries(fetch_result, group_config, global_status, db: Storage, run_selected=None):
+    """规范化、去重、过滤，返回 [NormalizedEntry]；开启聚合的组再合并近似重复报道
+
+    run_selected 为本轮组内已选中的 (条目ID集合, 内容哈希集合)：两阶段处理时选中的条目要等全部选完才入库，
+    同一条目出现在多个订阅源时靠它只选一次
+    """
+    group_key = group_config["group_key"]
+    processor = group_config["processor"]
+
+    feed_data, canonical_url, validators = fetch_result
+    if not feed_data or not feed_data.entries:
+        return []
+
+    processed_ids = await global_status.entry_ids(canonical_url)
+    content_index = await global_status.content_hashes(group_key)
+    new_entries = []
+    # 当前批次（或本轮组内）的条目ID和内容哈希去重
+    seen_in_batch, new_hashes_in_batch = run_selected if run_selected is not None else (set(), set())
+
+    for raw_entry in feed_data.entries:
+        # 直接使用RSSHub返回的原始链接，不需要修改；每个条目只规范化一次
+        entry = NormalizedEntry.from_entry(raw_entry)
+        entry_id = entry.entry_id
+        content_hash = entry.content_hash
+        
+        # 统一使用内容哈希去重（主要修复）
+        if content_hash in content_index:
+            logger.debug(f"跳过重复内容哈希: {content_hash[:16]}...")
+            continue
+            
+        if entry_id in processed_ids or entry_id in seen_in_batch:
+            logger.debug(f"跳过重复条目ID: {entry_id[:16]}...")
+            continue
+            
+        # 在当前批次中也用内容哈希去重
+        if content_hash in new_hashes_in_batch:
+            logger.debug(f"跳过批次内重复内容哈希: {content_hash[:16]}...")
+            continue  
+            
+        # ✅ 过滤检查
+        if not await should_send_entry(entry, processor):
+            logger.debug(f"跳过不符合过滤条件的条目: {(entry.title or '无标题')[:50]}")
+            continue
+
+        seen_in_batch.add(entry_id)
+        new_hashes_in_batch.add(content_hash)
+        new_entries.append(entry)
+
+    if group_config.get("cluster_window") and new_entries:
+        new_entries = await collapse_stories(group_config, feed_data, canonical_url, new_entries, global_status, db)
+    return new_entries
+
+async def collapse_stories(group_config, feed_data, canonical_url, new_entries, global_status, db: Storage):
+    """跨订阅源近似重复聚合：窗口内已有同一报道时不再翻译/发送，只把链接挂到代表条目上"""
+    group_key = group_config["group_key"]
+    index = await global_status.story_index(group_key, group_config["cluster_window"], CLUSTER_SIMILARITY)
+    processed_ids = await global_status.entry_ids(canonical_url)
+    content_index = await global_status.content_hashes(group_key)
+    batch_mode = group_config.get("batch_send_interval") and not group_config.get("send_separately", False)
+    source = feed_data.feed.get("title") or urlparse(canonical_url).netloc
+    now = time.time()
+    kept = []
+    for entry in new_entries:
+        signature = minhash(entry.clean_title)
+        story = index.find(signature, now) if signature else None
+        if story is None or (story.entry_id == entry.entry_id and story.feed_url == canonical_url):
+            # 新报道（或上次发送失败、重新处理的代表条目本身；其它订阅源的同一条目按重复处理）
+            if signature and story is None:
+                index.add(Story(signature, entry.entry_id, canonical_url, source, entry.link, now, entry))
+                await db.save_story(group_key, entry.entry_id, signature_bytes(signature), canonical_url, source, entry.link, now)
+            kept.append(entry)
+            continue
+        if story.feed_url != canonical_url and entry.link != story.link:
+            if story.entry is not None:
+                # 代表条目本轮尚未发送：直接带上其它来源链接
+                story.entry.alternates.append((source, entry.link))
+            elif batch_mode:
+                # 代表条目在待发送队列中：批量推送时读取
+                await db.add_story_alternate(group_key, story.entry_id, source, entry.link, now)
+        await db.save_status(group_key, canonical_url, entry.entry_id, entry.content_hash, now)
+        processed_ids.add(entry.entry_id)
+        content_index.add(entry.content_hash)
+        logger.info(f"🧩 近似重复报道 [{group_key}] {source}: {entry.clean_title[:50]} → {story.source}")
+    return kept
+
+async def deliver_new_entries(feed_url, fetch_result, group_config, global_status, db: Storage, bot, new_entries):
+    """新条目入待发送队列或立即发送，全部成功后写回条件请求缓存，返回新条目数"""
+    group_key = group_config["group_key"]
+    processor = group_config["processor"]
+    batch_send_interval = group_config.get("batch_send_interval", None)
+    send_separately = group_config.get("send_separately", False)
+
+    feed_data, canonical_url, validators = fetch_result
+    if not feed_data:
+        return 0
+    processed_ids = await global_status.entry_ids(canonical_url)
+    content_index = await global_status.content_hashes(group_key)
+    # 两阶段处理时，选出条目到发送之间可能已由 WebSub 推送处理过
+    new_entries = [entry for entry in new_entries if entry.entry_id not in processed_ids]
+
+    feed_done = True  # 全部新条目均已入库/发送成功时才写回条件请求缓存
+    if new_entries:
+        if batch_send_interval and not send_separately:
+            # 批量发送模式：存入待发送队列（标题先整批翻译）
+            await translate_entries(new_entries, processor, only_foreign=True)
+            for entry in new_entries:
+                raw_subject = entry.clean_title
+                if not entry.translated_title:
+                    # 批量翻译失败的条目逐条重试
+                    if processor.get("translate", False) and is_need_translate(raw_subject):
+                        entry.translated_title = await auto_translate_text(raw_subject)
+                    else:
+                        entry.translated_title = raw_subject
+                    
+                await db.add_pending_message(
+                    group_key, 
+                    canonical_url, 
+                    entry.entry_id, 
+                    entry.content_hash,
+                    entry.title, 
+                    entry.translated_title, 
+                    entry.link, 
+                    entry.summary,
+                    entry.timestamp,
+                    feed_data.feed.get('title', "") 
+                )
+                for source, link in entry.alternates:
+                    await db.add_story_alternate(group_key, entry.entry_id, source, link, time.time())
+                await db.save_status(group_key, canonical_url, entry.entry_id, entry.content_hash, time.time())
+                processed_ids.add(entry.entry_id)
+                content_index.add(entry.content_hash)
+                
+        elif send_separately:
+            # 单独发送模式：每条消息单独发送
+            await translate_entries(new_entries, processor)
+            messages_data = await generate_single_messages(
+                feed_data, 
+                new_entries, 
+                processor
+            )
+            
+            if messages_data:
+                async def render(ids):
+                    return [msg_data for msg_data in messages_data if msg_data["entry"].entry_id in ids]
+                
+                async def send(chat_id, ids, chat_messages):
+                    return await send_single_messages_separately(bot, chat_id, chat_messages, processor)
+                
+                complete = await fan_out(db, group_key, [entry.entry_id for entry in new_entries], render, send)
+                
+                # 保存已发送到全部聊天的消息状态
+                for entry in new_entries:
+                    if entry.entry_id in complete:
+                        await db.save_status(group_key, canonical_url, entry.entry_id, entry.content_hash, time.time())
+                        processed_ids.add(entry.entry_id)
+                        content_index.add(entry.content_hash)
+                feed_done = len(complete) == len(new_entries)
+                
+                if processor.get("show_count", False) and complete:
+                    summary_msg = f"✅ {feed_data.feed.get('title', '未知来源')} 新增 {len(complete)} 条内容"
+                    await asyncio.gather(
+                        *(send_single_message(bot, chat_id, summary_msg, disable_web_page_preview=True) for chat_id in TELEGRAM_CHAT_ID),
+                        return_exceptions=True
+                    )
+            else:
+                feed_done = False
+        else:
+            # 立即批量发送模式（原来的逻辑）
+            await translate_entries(new_entries, processor)
+            entries_by_id = {entry.entry_id: entry for entry in new_entries}
+            
+            async def render(ids):
+                return await generate_group_message(feed_data, [entries_by_id[entry_id] for entry_id in ids], processor)
+            
+            async def send(chat_id, ids, feed_message):
+                await send_single_message(
+                    bot,
+                    chat_id,
+                    feed_message,
+                    disable_web_page_preview=not processor.get("preview", True)
+                )
+                return ids
+            
+            complete = await fan_out(db, group_key, list(entries_by_id), render, send)
+            for entry in new_entries:
+                if entry.entry_id in complete:
+                    await db.save_status(group_key, canonical_url, entry.entry_id, entry.content_hash, time.time())
+                    processed_ids.add(entry.entry_id)
+                    content_index.add(entry.content_hash)
+            feed_done = len(complete) == len(entries_by_id)
+            if not feed_done:
+                logger.error(f"❌ 发送消息失败 [{feed_url}]: {len(entries_by_id) - len(complete)} 条未发送到全部聊天")
+    
+    if group_config.get("cluster_window"):
+        (await global_status.story_index(group_key, group_config["cluster_window"], CLUSTER_SIMILARITY)).close_open()
+    # 状态/待发送记录先落盘，再写条件请求缓存，避免缓存命中 304 而条目未入库
+    await db.flush()
+    if validators and feed_done:
+        await db.save_feed_cache(canonical_url, **validators)
+    return len(new_entries)
+
+def is_adaptive_group(group_config):
+    return "min_interval" in group_config or "max_interval" in group_config
+
+def story_retention(group_config):
+    """报道签名的保留秒数：聚合窗口与批量推送间隔取大者（代表条目发出前仍要记录其它来源）；未开启聚合时为 None"""
+    window = group_config.get("cluster_window")
+    if not window:
+        return None
+    return max(window, group_config.get("batch_send_interval") or 0)
+
+def group_tick_interval(group_config):
+    """组的检查周期：开启自适应轮询时为 min_interval，各订阅源再按自己的间隔决定是否拉取"""
+    return group_config.get("min_interval", group_config["interval"])
+
+def next_poll_interval(group_config, prev_interval, new_count, recent_count):
+    """结合两个信号计算下次轮询间隔，并限制在 [min_interval, max_interval]：
+    - 发布频率：近 ADAPTIVE_HISTORY_DAYS 天的条目数，估算平均拿到 ADAPTIVE_TARGET_NEW 条所需时间
+    - 本次收益：没有新条目则拉长 1.5 倍，新条目明显多于目标则减半
+    """
+    min_interval = group_config.get("min_interval", group_config["interval"])
+    max_interval = group_config.get("max_interval", group_config["interval"])
+    window = ADAPTIVE_HISTORY_DAYS * 86400
+    estimate = ADAPTIVE_TARGET_NEW * window / recent_count if recent_count else max_interval
+    if new_count == 0:
+        observed = prev_interval * 1.5
+    elif new_count > 2 * ADAPTIVE_TARGET_NEW:
+        observed = prev_interval / 2
+    else:
+        observed = prev_interval
+    return min(max_interval, max(min_interval, (estimate + observed) / 2))
+
+async def update_feed_schedule(db: Storage, group_config, feed_url, schedule, new_count, now):
+    group_key = group_config["group_key"]
+    if schedule is None:
+        schedule = {"poll_interval": group_config["interval"], "polls": 0, "hits": 0, "tracked_since": now}
+    recent_count = await db.count_recent_entries(group_key, feed_url, now - ADAPTIVE_HISTORY_DAYS * 86400)
+    schedule["poll_interval"] = next_poll_interval(group_config, schedule["poll_interval"], new_count, recent_count)
+    schedule["next_poll"] = now + schedule["poll_interval"]
+    schedule["polls"] += 1
+    schedule["hits"] += 1 if new_count else 0
+    await db.save_feed_schedule(group_key, feed_url, schedule)
+
+async def process_group(session, group_config, global_status, db: Storage, check_interval=True):
+    """处理单个RSS组
+
+    check_interval=False 时不检查上次运行时间（常驻模式由调度器保证间隔）
+    """
+    if SHOULD_EXIT:
+        logger.info("收到退出信号，停止处理组任务")
+        return
     try:  # ✅ 添加异常捕获
         group_name = group_config["name"]
         group_key = group_config["group_key"]
-        processor = group_config["processor"]
         bot_token = group_config["bot_token"]
-        batch_send_interval = group_config.get("batch_send_interval", None)
-        send_separately = group_config.get("send_separately", False)
         
         try:
             last_run = await db.load_last_run_time(group_key)
             now = datetime.now(pytz.utc).timestamp()
-            if (now - last_run) < group_config["interval"]:
+            if check_interval and (now - last_run) < group_tick_interval(group_config):
                 return
                 
-            bot = Bot(token=bot_token)
-            for index, feed_url in enumerate(group_config["urls"]):
-                try:
-                    if index > 0:
-                        await asyncio.sleep(1)
-                        
-                    feed_data, canonical_url = await fetch_feed(session, feed_url)
-                    if not feed_data or not feed_data.entries:
-                        continue
-                        
-                    processed_ids = global_status.get(canonical_url, set())
-                    new_entries = []
-                    seen_in_batch = set()
-                    new_hashes_in_batch = set()  # 当前批次的内容哈希去重
-
-                    for entry in feed_data.entries:
-                        # 直接使用RSSHub返回的原始链接，不需要修改
-                        entry_id = get_entry_identifier(entry)
-                        content_hash = get_entry_content_hash(entry)
-                        
-                        # 统一使用内容哈希去重（主要修复）
-                        if await db.has_content_hash(group_key, content_hash):
-                            logger.debug(f"跳过重复内容哈希: {content_hash[:16]}...")
-                            continue
-                            
-                        if entry_id in processed_ids or entry_id in seen_in_batch:
-                            logger.debug(f"跳过重复条目ID: {entry_id[:16]}...")
-                            continue
-                            
-                        # 在当前批次中也用内容哈希去重
-                        if content_hash in new_hashes_in_batch:
-                            logger.debug(f"跳过批次内重复内容哈希: {content_hash[:16]}...")
-                            continue  
-                            
-                        # ✅ 过滤检查
-                        if not await should_send_entry(entry, processor):
-                            logger.debug(f"跳过不符合过滤条件的条目: {getattr(entry, 'title', '无标题')[:50]}")
-                            continue
-
-                        seen_in_batch.add(entry_id)
-                        new_hashes_in_batch.add(content_hash)
-                        new_entries.append((entry, content_hash, entry_id))
-                                            
-                    if new_entries:
-                        if batch_send_interval and not send_separately:
-                            # 批量发送模式：存入待发送队列
-                            for entry, content_hash, entry_id in new_entries:
-                                raw_subject = remove_html_tags(getattr(entry, "title", "") or "")
-                                if processor.get("translate", False) and is_need_translate(raw_subject):
-                                    translated_subject = await auto_translate_text(raw_subject)
-                                else:
-                                    translated_subject = raw_subject
-                                    
-                                await db.add_pending_message(
-                                    group_key, 
-                                    canonical_url, 
-                                    entry_id, 
-                                    content_hash,
-                                    getattr(entry, "title", ""), 
-                                    translated_subject, 
-                                    getattr(entry, "link", ""), 
-                                    getattr(entry, "summary", ""),
-                                    get_entry_timestamp(entry).timestamp() if get_entry_timestamp(entry) else time.time(),
-                                    feed_data.feed.get('title', "") 
-                                )
-                                await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
-                                processed_ids.add(entry_id)
-                                
-                            global_status[canonical_url] = processed_ids
-                        elif send_separately:
-                            # 单独发送模式：每条消息单独发送
-                            messages_data = await generate_single_messages(
-                                feed_data, 
-                                [e for e,_,_ in new_entries], 
-                                processor
-                            )
-                            
-                            if messages_data:
-                                sent_count = await send_single_messages_separately(
-                                    bot,
-                                    TELEGRAM_CHAT_ID[0],
-                                    messages_data,
-                                    processor
-                                )
-                                
-                                # 保存已发送的消息状态
-                                for i, (entry, content_hash, entry_id) in enumerate(new_entries):
-                                    if i < sent_count:  # 只保存成功发送的消息
-                                        await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
-                                        processed_ids.add(entry_id)
-                                global_status[canonical_url] = processed_ids
-                                
-                                if processor.get("show_count", False):
-                                    summary_msg = f"✅ {feed_data.feed.get('title', '未知来源')} 新增 {sent_count} 条内容"
-                                    try:
-                                        await send_single_message(
-                                            bot,
-                                            TELEGRAM_CHAT_ID[0],
-                                            summary_msg,
-                                            disable_web_page_preview=True
-                                        )
-                                    except:
-                                        pass
+            bot = await get_bot(bot_token)
+            urls = group_config["urls"]
+            if websub_manager:
+                # 推送订阅有效的源由 hub 推送，不再轮询
+                urls = [u for u in urls if not websub_manager.is_active(group_key, u)]
+            adaptive = is_adaptive_group(group_config)
+            if adaptive:
+                # 自适应轮询：只拉取已到期的订阅源
+                schedules = await db.load_feed_schedules(group_key)
+                urls = [u for u in urls if schedules.get((group_key, u), {}).get("next_poll", 0) <= now]
+                if len(urls) < len(group_config["urls"]):
+                    logger.info(f"🗓 [{group_key}] 本次跳过 {len(group_config['urls']) - len(urls)} 个未到期订阅源")
+            # 第一阶段：组内所有订阅源并发拉取（受 host_limiter 限制）
+            # 第二阶段：按配置顺序依次去重/翻译/发送，先到的结果无需等待后面的源
+            # 开启近似重复聚合的组先选出所有订阅源的新条目再统一发送，代表条目才能带上后面来源的链接
+            two_phase = bool(group_config.get("cluster_window"))
+            fetch_tasks = [asyncio.create_task(fetch_feed_cached(session, feed_url, group_config, global_status, db)) for feed_url in urls]
+
+            async def finish_feed(feed_url, fetch_result, new_entries):
+                async with feed_locks[(group_key, feed_url)]:
+                    try:
+                        new_count = await deliver_new_entries(feed_url, fetch_result, group_config, global_status, db, bot, new_entries)
+                    finally:
+                        await db.flush()  # 出错前已发送的条目状态同样提交
+                if websub_manager and fetch_result[0]:
+                    await websub_manager.discover(group_key, feed_url, fetch_result[0])
+                if adaptive:
+                    await update_feed_schedule(db, group_config, feed_url, schedules.get((group_key, feed_url)), new_count, now)
+
+            selected = []
+            run_selected = (set(), set())
+            try:
+                for feed_url, fetch_task in zip(urls, fetch_tasks):
+                    if SHOULD_EXIT:
+                        logger.warning(f"收到退出信号，跳过组内剩余订阅源 [{group_key}]")
+                        break
+                    try:
+                        fetch_result = await fetch_task
+                        async with feed_locks[(group_key, feed_url)]:
+                            new_entries = await select_new_entries(fetch_result, group_config, global_status, db, run_selected)
+                        if two_phase:
+                            selected.append((feed_url, fetch_result, new_entries))
                         else:
-                            # 立即批量发送模式（原来的逻辑）
-                            feed_message = await generate_group_message(feed_data, [e for e,_,_ in new_entries], processor)
-                            if feed_message:
-                                try:
-                                    await send_single_message(
-                                        bot,
-                                        TELEGRAM_CHAT_ID[0],
-                                        feed_message,
-                                        disable_web_page_preview=not processor.get("preview", True)
-                                    )
-                                    for entry, content_hash, entry_id in new_entries:
-                                        await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
-                                        processed_ids.add(entry_id)
-                                    global_status[canonical_url] = processed_ids
-                                except Exception as send_error:
-                                    logger.error(f"❌ 发送消息失败 [{feed_url}]: {send_error}")
-                                    raise
-                                    
-                except Exception as e:
-                    logger.error(f"❌ 处理失败 [{feed_url}]: {e}")
-                    continue  # ✅ 单个feed失败不影响其他feed
+                            await finish_feed(feed_url, fetch_result, new_entries)
+                    except FeedFetchError:
+                        # 源暂时不可用或被限频：不更新轮询间隔，下次检查时照常拉取
+                        logger.info(f"拉取失败，跳过 [{feed_url}]")
+                        continue
+                    except Exception as e:
+                        logger.error(f"❌ 处理失败 [{feed_url}]: {e}")
+                        continue  # ✅ 单个feed失败不影响其他feed
+                for feed_url, fetch_result, new_entries in selected:
+                    try:
+                        await finish_feed(feed_url, fetch_result, new_entries)
+                    except Exception as e:
+                        logger.error(f"❌ 处理失败 [{feed_url}]: {e}")
+            finally:
+                for task in fetch_tasks:
+                    if not task.done():
+                        task.cancel()
+                await asyncio.gather(*fetch_tasks, return_exceptions=True)
                     
             await db.save_last_run_time(group_key, now)
+            await db.flush()
             
         except Exception as e:
             logger.critical(f"‼️ 处理组失败 [{group_key}]: {e}")
@@ -1215,6 +1504,20 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
         logger.error(f"❌ 组处理失败 [{group_config.get('name', '未知')}]: {e}", exc_info=True)
         raise  # ✅ 重新抛出，让上层知道失败
 
+async def handle_websub_notify(feed_group, topic, body, global_status, db: Storage):
+    """hub 推送的内容按轮询结果同样处理（与轮询共用单源锁，避免重复发送）"""
+    group_config = next((g for g in RSS_GROUPS if g["group_key"] == feed_group), None)
+    if not group_config or topic not in group_config["urls"]:
+        logger.warning(f"WebSub 推送的订阅源已不在配置中: [{feed_group}] {topic}")
+        return
+    feed_data = parse(body)
+    async with feed_locks[(feed_group, topic)]:
+        try:
+            new_count = await process_feed(topic, (feed_data, topic, None), group_config, global_status, db, await get_bot(group_config["bot_token"]))
+        finally:
+            await db.flush()
+    logger.info(f"📡 WebSub 推送 [{feed_group}] {topic}: {new_count} 条新内容")
+
 async def main():
     clean_old_log() 
     logger.info("🚀 RSS Bot 开始执行")
@@ -1235,9 +1538,32 @@ async def main():
             else:
                 logger.critical("达到最大重试次数，程序退出")
 
+def warmup_translator():
+    """常驻模式启动时，有组开启翻译则与抓取并行预热一次翻译连接；返回任务或 None
+
+    预热是一次真实的计费请求，经 translator_chain 发出（跳过熔断中的密钥）；
+    单次运行（cron）模式不预热，首次翻译时再建立连接。
+    """
+    if not translator_chain.credentials or not any(g.get("processor", {}).get("translate") for g in RSS_GROUPS):
+        return None
+    return asyncio.create_task(_warmup_translator())
+
+async def _warmup_translator():
+    try:
+        await translator_chain.call(_sync_warmup)
+        logger.info("翻译连接已预热")
+    except Exception as e:
+        logger.warning(f"翻译连接预热失败: {e}")
+
+def create_translation_cache(db):
+    return TranslationCache(
+        db, size=TRANSLATION_CACHE_SIZE, ttl=TRANSLATION_CACHE_TTL_DAYS * 86400, max_rows=TRANSLATION_CACHE_MAX_ROWS
+    )
+
 async def run_main_logic():
+    global translation_cache
     lock_file = None
-    db = RSSDatabase()
+    db = create_storage(DATABASE_FILE, PG_URL)
     
     try:
         # 获取文件锁
@@ -1255,14 +1581,20 @@ async def run_main_logic():
         for group in RSS_GROUPS:
             try:
                 days = group.get("history_days", 30)
-                await db.cleanup_history(days, group["group_key"])
+                await db.cleanup_history(days, group["group_key"], story_retention(group))
             except Exception as e:
                 logger.error(f"清理历史失败 [{group.get('name')}]: {e}")
         
+        translation_cache = create_translation_cache(db)
+        await translation_cache.prune()
+        mirror_health.load(await db.load_mirror_health())
+        translator_chain.load(await db.load_translation_breakers())
+        
         # 主处理
         logger.info("🚀 开始处理 RSS 订阅...")
-        async with aiohttp.ClientSession() as session:
-            status = await db.load_status()
+        connector = aiohttp.TCPConnector(limit=FETCH_GLOBAL_LIMIT, limit_per_host=FETCH_HOST_MAX)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            status = EntryStatus(db)
             tasks = []
             
             for group in RSS_GROUPS:
@@ -1276,6 +1608,12 @@ async def run_main_logic():
                 if isinstance(result, Exception):
                     logger.error(f"组 {RSS_GROUPS[i].get('name')} 失败: {result}")
             
+            logger.warning(f"📊 抓取并发状态: {host_limiter.summary()}")
+            try:
+                await db.save_mirror_health(mirror_health.stats)
+            except Exception as e:
+                logger.error(f"保存镜像健康度失败: {e}")
+            
             # 批量发送（同样容错）
             batch_tasks = []
             for group in RSS_GROUPS:
@@ -1288,6 +1626,20 @@ async def run_main_logic():
                     if isinstance(result, Exception):
                         logger.error(f"批量发送失败: {result}")
         
+        logger.info(f"🈯 翻译缓存: {translation_cache.summary()}；密钥: {translator_chain.summary()}")
+        if tg_delivery.summary():
+            logger.info(f"📨 Telegram 发送: {tg_delivery.summary()}")
+        try:
+            await db.save_translation_breakers(translator_chain.states())
+        except Exception as e:
+            logger.error(f"保存翻译熔断状态失败: {e}")
+        
+        # 推送完成后再回收清理历史留下的空闲页，不占用抓取时间
+        try:
+            await db.incremental_vacuum()
+        except Exception as e:
+            logger.error(f"incremental_vacuum 失败: {e}")
+        
     except asyncio.TimeoutError:
         logger.error("❌ 数据库连接超时")
         raise
@@ -1299,6 +1651,7 @@ async def run_main_logic():
         raise
     finally:
         # 清理资源
+        await tg_delivery.close_bots()
         try:
             if db:
                 await db.close()
@@ -1316,11 +1669,214 @@ async def run_main_logic():
         except Exception as e:
             logger.error(f"释放文件锁失败: {e}")
 
+async def run_daemon():
+    """常驻模式：一个事件循环内按各组的 interval / batch_send_interval 定时调度。
+
+    数据库、HTTP 会话和 Bot 只初始化一次；收到 SIGTERM/SIGINT 后不再启动新任务，
+    等待正在执行的任务结束后退出。
+    """
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    global websub_manager, translation_cache
+
+    lock_file = None
+    db = create_storage(DATABASE_FILE, PG_URL)
+    session = None
+    scheduler = None
+    loop = asyncio.get_running_loop()
+    stop_event = asyncio.Event()
+    running_jobs = set()
+    warmup_task = None
+    # 维护任务执行期间清除，其它任务开始前等待（清理历史、重置内存索引时不能有组在处理）
+    maintenance_idle = asyncio.Event()
+    maintenance_idle.set()
+
+    def request_exit():
+        global SHOULD_EXIT
+        logger.warning("收到退出信号，正在优雅退出...")
+        SHOULD_EXIT = True
+        stop_event.set()
+
+    for s in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(s, request_exit)
+
+    async def run_job(job_func, *args, **kwargs):
+        if SHOULD_EXIT:
+            return
+        await maintenance_idle.wait()
+        if SHOULD_EXIT:
+            return
+        task = asyncio.current_task()
+        running_jobs.add(task)
+        try:
+            await job_func(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"定时任务失败 [{job_func.__name__}]: {e}")
+        finally:
+            running_jobs.discard(task)
+
+    async def maintenance():
+        # 不再启动新任务，等正在处理的组和推送结束后再清理
+        maintenance_idle.clear()
+        try:
+            others = running_jobs - {asyncio.current_task()}
+            if others:
+                logger.info(f"维护等待 {len(others)} 个任务结束...")
+                await asyncio.wait(others)
+            for group in RSS_GROUPS:
+                try:
+                    await db.cleanup_history(group.get("history_days", 30), group["group_key"], story_retention(group))
+                except Exception as e:
+                    logger.error(f"清理历史失败 [{group.get('name')}]: {e}")
+            status.reset()  # 历史被清理后下次用到时重新加载
+            await db.incremental_vacuum()
+        finally:
+            maintenance_idle.set()
+        await db.save_mirror_health(mirror_health.stats)
+        await db.save_translation_breakers(translator_chain.states())
+        logger.warning(f"📊 抓取并发状态: {host_limiter.summary()}")
+        # 常驻模式按维护周期（每小时）统计翻译缓存命中
+        logger.info(f"🈯 翻译缓存: {translation_cache.summary()}；密钥: {translator_chain.summary()}")
+        translation_cache.reset_stats()
+        if tg_delivery.summary():
+            logger.info(f"📨 Telegram 发送: {tg_delivery.summary()}")
+        tg_delivery.reset_stats()
+        await translation_cache.prune()
+        if websub_manager:
+            await websub_manager.renew_expiring()
+
+    def first_run_time(last_time, interval):
+        return datetime.fromtimestamp(max(time.time(), last_time + interval), pytz.utc)
+
+    try:
+        lock_file = open(LOCK_FILE, "w")
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        logger.info("🔒 成功获取文件锁")
+
+        await asyncio.wait_for(db.open(), timeout=30)
+        await db.ensure_initialized()
+        mirror_health.load(await db.load_mirror_health())
+        translator_chain.load(await db.load_translation_breakers())
+        status = EntryStatus(db)
+        translation_cache = create_translation_cache(db)
+        warmup_task = warmup_translator()
+
+        connector = aiohttp.TCPConnector(limit=FETCH_GLOBAL_LIMIT, limit_per_host=FETCH_HOST_MAX)
+        session = aiohttp.ClientSession(connector=connector)
+
+        if WEBSUB_CALLBACK_URL:
+            websub_manager = WebSubManager(
+                db, session, WEBSUB_CALLBACK_URL,
+                lambda feed_group, topic, body: run_job(handle_websub_notify, feed_group, topic, body, status, db),
+                lease_seconds=WEBSUB_LEASE_SECONDS
+            )
+            await websub_manager.load()
+            await websub_manager.start(WEBSUB_LISTEN_HOST, WEBSUB_LISTEN_PORT)
+
+        scheduler = AsyncIOScheduler(timezone=pytz.utc)
+        job_options = {"max_instances": 1, "coalesce": True, "misfire_grace_time": None}
+        for group in RSS_GROUPS:
+            group_key = group["group_key"]
+            last_run = await db.load_last_run_time(group_key)
+            scheduler.add_job(
+                run_job, "interval", seconds=group_tick_interval(group),
+                args=[process_group, session, group, status, db],
+                kwargs={"check_interval": False},
+                next_run_time=first_run_time(last_run, group_tick_interval(group)),
+                name=f"采集 {group['name']}", **job_options
+            )
+            batch_interval = group.get("batch_send_interval")
+            if batch_interval:
+                last_batch = await db.get_last_batch_sent_time(group_key)
+                scheduler.add_job(
+                    run_job, "interval", seconds=batch_interval,
+                    args=[process_batch_send, group, db],
+                    kwargs={"check_interval": False},
+                    next_run_time=first_run_time(last_batch, batch_interval),
+                    name=f"批量推送 {group['name']}", **job_options
+                )
+        scheduler.add_job(run_job, "interval", seconds=3600, args=[maintenance],
+                          next_run_time=datetime.now(pytz.utc), name="维护", **job_options)
+        scheduler.start()
+        logger.info(f"🚀 常驻模式已启动，共 {len(scheduler.get_jobs())} 个定时任务")
+
+        await stop_event.wait()
+
+    except fcntl.error as e:
+        logger.error(f"❌ 获取文件锁失败: {e}")
+        raise
+    finally:
+        if scheduler and scheduler.running:
+            scheduler.shutdown(wait=False)
+        maintenance_idle.set()  # 放行等待维护的任务，它们看到 SHOULD_EXIT 后直接返回
+        if running_jobs:
+            logger.warning(f"等待 {len(running_jobs)} 个任务结束...")
+            await asyncio.wait(running_jobs, timeout=120)
+        if warmup_task and not warmup_task.done():
+            warmup_task.cancel()
+            await asyncio.gather(warmup_task, return_exceptions=True)
+        if websub_manager:
+            await websub_manager.stop()
+        try:
+            await db.save_mirror_health(mirror_health.stats)
+            await db.save_translation_breakers(translator_chain.states())
+        except Exception as e:
+            logger.error(f"保存镜像健康度/翻译熔断状态失败: {e}")
+        if session:
+            await session.close()
+        await tg_delivery.close_bots()
+        try:
+            await db.close()
+        except Exception as e:
+            logger.error(f"关闭数据库失败: {e}")
+        if lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            lock_file.close()
+            if LOCK_FILE.exists():
+                LOCK_FILE.unlink()
+        logger.info("✅ 常驻模式已退出")
+
+async def poll_report():
+    """打印自适应轮询报告：每个订阅源的当前间隔、命中率，以及相对固定间隔节省的请求数"""
+    db = create_storage(DATABASE_FILE, PG_URL)
+    await db.open()
+    await db.ensure_initialized()
+    try:
+        schedules = await db.load_feed_schedules()
+    finally:
+        await db.close()
+    now = time.time()
+    total_polls = total_saved = 0
+    for group in RSS_GROUPS:
+        if not is_adaptive_group(group):
+            continue
+        print(f"== {group['name']} [{group['group_key']}] 固定间隔 {group['interval']}s")
+        for url in dict.fromkeys(group["urls"]):
+            schedule = schedules.get((group["group_key"], url))
+            if not schedule:
+                print(f"   {url}  (尚无数据)")
+                continue
+            baseline = (now - schedule["tracked_since"]) / group["interval"]
+            saved = max(0, int(baseline - schedule["polls"]))
+            total_polls += schedule["polls"]
+            total_saved += saved
+            print(
+                f"   {url}  间隔 {int(schedule['poll_interval'])}s  "
+                f"请求 {schedule['polls']}  有新条目 {schedule['hits']}  节省 {saved}"
+            )
+    print(f"合计: 实际请求 {total_polls}，节省请求 {total_saved}")
+
 if __name__ == "__main__":
+    setup_logging()
     for s in (signal.SIGINT, signal.SIGTERM):
         signal.signal(s, signal_handler)
     try:
-        asyncio.run(main())
+        if "--poll-report" in sys.argv:
+            asyncio.run(poll_report())
+        elif "--daemon" in sys.argv:
+            clean_old_log()
+            asyncio.run(run_daemon())
+        else:
+            asyncio.run(main())
     except Exception as e:
         logger.critical(f"‼️ 主进程未捕获异常: {str(e)}", exc_info=True)
         sys.exit(1)
\ No newline at end of file
@@ -27,6 +27,7 @@ RSS_GROUPS = [ # RSS 组配置列表
         "interval": 3590,      # 60分钟 
       #  "batch_send_interval": 14390,   # 4小时批量推送
         "send_separately": False,  # 新增：设置为True时，每条消息单独发送
+       # "cluster_window": 43200,   # 可选：近似重复聚合，12小时内不同来源的同一报道只发一次，附其它来源链接
         "history_days": 180,     # 新增，保留30天
         "bot_token": os.getenv("RSS_TWO"),    # Telegram Bot Token
         "processor": {
@@ -96,6 +97,7 @@ RSS_GROUPS = [ # RSS 组配置列表
         "interval": 700,       # 10分钟 
         "batch_send_interval": 21590,   # 批量推送
         "history_days": 7,     # 新增，保留3天
+       # "fast_parser": True,   # 可选：精简流式解析，遇到已处理条目提前结束下载
         "bot_token": os.getenv("RSS_LINDA"),   # Telegram Bot Token
         "processor": {
             "translate": False,     #翻译开关
@@ -287,6 +289,8 @@ RSS_GROUPS = [ # RSS 组配置列表
         ],
         "group_key": "YOUTUBE_RSSS_FEEDS", # YouTube频道
         "interval": 3590,      # 60分钟
+       # "min_interval": 1790,   # 可选：自适应轮询，单个频道最短30分钟
+       # "max_interval": 21590,  # 可选：自适应轮询，单个频道最长6小时
        # "batch_send_interval": 10800,   # 批量推送
         "history_days": 720,     # 新增，保留30天
         "bot_token": os.getenv("RSS_TOKEN"),   # Telegram Bot Token
@@ -334,6 +338,8 @@ RSS_GROUPS = [ # RSS 组配置列表
         ],
         "group_key": "FIFTH_RSS_YOUTUBE", # YouTube频道
         "interval": 3590,     # 1小时
+       # "min_interval": 1790,   # 可选：自适应轮询，单个频道最短30分钟
+       # "max_interval": 21590,  # 可选：自适应轮询，单个频道最长6小时
         "batch_send_interval": 71990,   # 批量推送
         "history_days": 720,     # 新增，保留300天
         "bot_token": os.getenv("YOUTUBE_RSS"),    # Telegram Bot Token
@@ -0,0 +1,115 @@
+# rss_dedup.py
+"""内存去重索引
+
+条目ID和内容哈希都是 sha256，数据库中截断为 16 字节 BLOB 存放，内存中只保留前 8 字节（64 位整数）：
+- 有序 array('Q') 存放已知前缀，二分查找
+- 新增前缀先放入小集合，积累到一定数量再合并进有序数组
+
+每个条目约 8 字节，相比 set[str] 的 100+ 字节小得多；64 位前缀的碰撞概率可忽略。
+加载的内存峰值与耗时对比见 bench/status_memory.py。
+（CPython 下纯 Python 的 Bloom 过滤器比 C 实现的 bisect 还慢，构建也更耗时，因此不用。）
+"""
+import hashlib
+import logging
+import time
+from array import array
+from bisect import bisect_left
+from rss_cluster import Story, StoryIndex, signature_from_bytes
+
+logger = logging.getLogger(__name__)
+
+HASH_BYTES = 16
+MERGE_THRESHOLD = 1024
+
+
+def hash_bytes(key):
+    """sha256 十六进制串截断为 HASH_BYTES 字节（rss_status 中的 BLOB 形式）；其它字符串先做 sha256"""
+    if len(key) == 64:
+        try:
+            return bytes.fromhex(key[:HASH_BYTES * 2])
+        except ValueError:
+            pass
+    return hashlib.sha256(key.encode()).digest()[:HASH_BYTES]
+
+
+def hash_prefix(key):
+    """取前 8 字节为整数，key 可以是十六进制串或数据库中的 BLOB"""
+    if isinstance(key, str):
+        key = hash_bytes(key)
+    return int.from_bytes(key[:8], "big")
+
+
+class HashIndex:
+    """只支持添加和查询的哈希集合，key 为 sha256 十六进制串或其 BLOB 形式"""
+
+    def __init__(self, keys=()):
+        self._sorted = array("Q", sorted(map(hash_prefix, keys)))
+        self._recent = set()
+
+    def __len__(self):
+        return len(self._sorted) + len(self._recent)
+
+    def __contains__(self, key):
+        return self._has_prefix(hash_prefix(key))
+
+    def _has_prefix(self, prefix):
+        if prefix in self._recent:
+            return True
+        i = bisect_left(self._sorted, prefix)
+        return i < len(self._sorted) and self._sorted[i] == prefix
+
+    def add(self, key):
+        prefix = hash_prefix(key)
+        if self._has_prefix(prefix):
+            return
+        self._recent.add(prefix)
+        if len(self._recent) >= MERGE_THRESHOLD:
+            self._sorted = array("Q", sorted(self._sorted.tolist() + list(self._recent)))
+            self._recent.clear()
+
+
+class EntryStatus:
+    """已处理条目的内存索引（替代启动时全量加载的 {feed_url: set}）
+
+    条目ID按订阅源、内容哈希按组，首次用到时从数据库加载为 HashIndex，之后随入库追加；
+    开启近似重复聚合的组另有 StoryIndex。
+    清理历史后调用 reset()，下次用到时重新加载。
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.feeds = {}
+        self.groups = {}
+        self.stories = {}
+
+    async def entry_ids(self, feed_url):
+        index = self.feeds.get(feed_url)
+        if index is None:
+            ids = await self.db.load_entry_ids(feed_url)
+            index = self.feeds.setdefault(feed_url, HashIndex(ids))
+        return index
+
+    async def content_hashes(self, feed_group):
+        index = self.groups.get(feed_group)
+        if index is None:
+            hashes = await self.db.load_content_hashes(feed_group)
+            index = self.groups.setdefault(feed_group, HashIndex(hashes))
+            logger.debug(f"加载内容哈希索引 [{feed_group}]: {len(index)} 条")
+        return index
+
+    async def story_index(self, feed_group, window, threshold):
+        """组内近似重复聚合索引，首次用到时加载窗口内的报道签名"""
+        index = self.stories.get(feed_group)
+        if index is None:
+            rows = await self.db.load_stories(feed_group, time.time() - window)
+            index = StoryIndex(window, threshold)
+            for entry_id, signature, feed_url, source, link, ts in rows:
+                index.add(Story(signature_from_bytes(signature), entry_id, feed_url, source, link, ts))
+            index = self.stories.setdefault(feed_group, index)
+            logger.debug(f"加载报道签名 [{feed_group}]: {len(index)} 条")
+        return index
+
+    def reset(self):
+        self.feeds.clear()
+        self.groups.clear()
+        self.stories.clear()
@@ -0,0 +1,186 @@
+# rss_parser.py
+"""RSS 2.0 / RSS 1.0 / Atom 精简流式解析
+
+只提取去重和消息渲染用到的字段（title / link / guid / summary / published / updated），
+用 XMLPullParser 边下载边解析，连续遇到 stop_after 个已处理条目后即可停止读取。
+XML 不合法（编码不支持、未声明实体等）时置 failed，由调用方回退到 feedparser。
+title / summary 按 feedparser 的规则判断是否为 HTML 并用它的清理函数处理，两种解析器得到的内容哈希相同。
+"""
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from feedparser import FeedParserDict
+from feedparser.mixin import _FeedParserMixin
+from feedparser.sanitizer import _sanitize_html
+
+ENTRY_TAGS = ("item", "entry")
+FEED_TAGS = ("channel", "feed")
+# 与 feedparser 一致：dc:date 归入 updated
+PUBLISHED_TAGS = ("pubDate", "published", "issued")
+UPDATED_TAGS = ("updated", "modified", "date")
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+HTML_TYPES = ("html", "text/html", "xhtml", "application/xhtml+xml")
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _text(elem):
+    return "".join(elem.itertext()).strip()
+
+
+def _xhtml(elem):
+    """type="xhtml"：序列化外层 div 的内容（去掉命名空间前缀）"""
+    children = list(elem)
+    if len(children) == 1 and _local_name(children[0].tag) == "div":
+        elem = children[0]
+    parts = [elem.text or ""]
+    for child in elem:
+        for node in child.iter():
+            if isinstance(node.tag, str):
+                node.tag = _local_name(node.tag)
+        parts.append(ET.tostring(child, encoding="unicode"))
+    return "".join(parts).strip()
+
+
+def _markup(elem, rss_default):
+    """与 feedparser 相同的文本处理：HTML 内容经 _sanitize_html 清理
+
+    Atom 按 type 属性判断（缺省为纯文本）；RSS 元素缺省为 rss_default，
+    纯文本但看起来像 HTML 的（feedparser 的 looks_like_html）也按 HTML 处理。
+    """
+    content_type = elem.get("type")
+    if content_type in ("xhtml", "application/xhtml+xml"):
+        value = _xhtml(elem)
+    else:
+        value = _text(elem)
+    if elem.tag.startswith(ATOM_NS):
+        is_html = content_type in HTML_TYPES
+    else:
+        is_html = content_type in HTML_TYPES if content_type else rss_default
+        is_html = is_html or _FeedParserMixin.looks_like_html(value)
+    if is_html:
+        value = _sanitize_html(value, "utf-8", "text/html").strip()
+    return value
+
+
+def _parse_date(text):
+    """RFC 822 / ISO 8601 转为 UTC struct_time，与 feedparser 的 *_parsed 字段一致"""
+    if not text:
+        return None
+    try:
+        dt = parsedate_to_datetime(text)
+    except (TypeError, ValueError, IndexError):
+        try:
+            dt = datetime.fromisoformat(text.strip())
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.utctimetuple()
+
+
+def _build_entry(elem):
+    entry = FeedParserDict()
+    content = None
+    for child in elem:
+        name = _local_name(child.tag)
+        if name == "title":
+            entry["title"] = _markup(child, rss_default=False)
+        elif name == "link":
+            href = child.get("href")
+            if href is None:
+                entry.setdefault("link", _text(child))
+            elif child.get("rel", "alternate") == "alternate":
+                entry.setdefault("link", href)
+        elif name in ("guid", "id"):
+            entry["guid"] = _text(child)
+        elif name in ("description", "summary"):
+            entry["summary"] = _markup(child, rss_default=True)
+        elif name in ("encoded", "content"):
+            content = _markup(child, rss_default=True)
+        elif name == "group":
+            # YouTube: <media:group><media:description>
+            for sub in child:
+                if _local_name(sub.tag) == "description":
+                    entry.setdefault("summary", _text(sub))
+        elif name in PUBLISHED_TAGS and "published" not in entry:
+            entry["published"] = _text(child)
+            entry["published_parsed"] = _parse_date(entry["published"])
+        elif name in UPDATED_TAGS:
+            entry["updated"] = _text(child)
+            entry["updated_parsed"] = _parse_date(entry["updated"])
+    if "summary" not in entry and content is not None:
+        entry["summary"] = content
+    return entry
+
+
+class FastFeedParser:
+    """增量解析器：feed() 逐块喂入数据，done 表示已可停止读取，failed 表示需回退"""
+
+    def __init__(self, is_known=None, stop_after=5):
+        self.is_known = is_known
+        self.stop_after = stop_after
+        self.feed_info = FeedParserDict()
+        self.entries = []
+        self.done = False
+        self.failed = False
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack = []
+        self._known_streak = 0
+
+    def feed(self, data):
+        if self.done or self.failed:
+            return
+        try:
+            self._parser.feed(data)
+            self._handle_events()
+        except ET.ParseError:
+            self.failed = True
+
+    def close(self):
+        if self.done or self.failed:
+            return
+        try:
+            self._parser.close()
+            self._handle_events()
+        except ET.ParseError:
+            self.failed = True
+
+    def _handle_events(self):
+        for event, elem in self._parser.read_events():
+            name = _local_name(elem.tag)
+            if event == "start":
+                self._stack.append(name)
+                continue
+            self._stack.pop()
+            parent = self._stack[-1] if self._stack else None
+            if name in ENTRY_TAGS:
+                self._add_entry(_build_entry(elem))
+                elem.clear()
+                if self.done:
+                    return
+            elif parent in FEED_TAGS and name == "link" and elem.get("href") is not None:
+                # Atom 链接（含 RSS 中的 atom:link），rel="hub" 用于 WebSub
+                rel = elem.get("rel", "alternate")
+                self.feed_info.setdefault("links", []).append(FeedParserDict(rel=rel, href=elem.get("href")))
+                if rel == "alternate":
+                    self.feed_info.setdefault("link", elem.get("href"))
+            elif parent in FEED_TAGS and name in ("title", "link") and name not in self.feed_info:
+                self.feed_info[name] = _text(elem)
+
+    def _add_entry(self, entry):
+        self.entries.append(entry)
+        if not self.is_known or not self.stop_after:
+            return
+        if self.is_known(entry):
+            self._known_streak += 1
+            if self._known_streak >= self.stop_after:
+                self.done = True
+        else:
+            self._known_streak = 0
+
+    def result(self):
+        """返回与 feedparser.parse 结果兼容的对象（feed / entries / bozo）"""
+        return FeedParserDict(feed=self.feed_info, entries=self.entries, bozo=0)
@@ -0,0 +1,1262 @@
+# rss_storage.py
+"""订阅状态存储（rss.py / sql_rss.py / sql_rss2.py 共用）
+
+Storage 定义接口和写缓冲，SQLiteStorage / PostgresStorage / MemoryStorage 各自实现，
+create_storage() 运行时选择后端：RSS_STORAGE=sqlite|postgres|memory，
+未设置时配置了 PG_URL 用 PostgreSQL，否则 SQLite。MemoryStorage 不落盘，用于基准测试和调试。
+
+写操作 save_status / add_pending_message / save_last_run_time / add_chat_delivery 等先记在缓冲里（按主键去重），
+flush() 时一个事务写入；其余写操作立即提交。整批写入失败时逐行重试，仍失败的行记录日志后丢弃，
+不会因为一行坏数据让之后的每次 flush 都失败。写入和提交都在 _write_lock 内串行执行（SQLite 各方法共用一个连接）。
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from rss_dedup import hash_bytes
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKENDS = ("sqlite", "postgres", "memory")
+# SQLite 存储参数：WAL + synchronous=NORMAL，mmap 与页缓存大小（KB），按容器内存调整
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(32 * 1024 * 1024)))
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "8192"))
+SQLITE_VACUUM_PAGES = int(os.getenv("SQLITE_VACUUM_PAGES", "2000"))
+# 整批和逐行写入全部失败（数据库不可用）时，缓冲保留重试的 flush 次数，超过后丢弃
+STORAGE_FLUSH_RETRIES = int(os.getenv("STORAGE_FLUSH_RETRIES", "3"))
+# rss.db 结构版本（PRAGMA user_version），旧库启动时按版本逐步升级
+# 1: rss_status 哈希改为 BLOB  2: auto_vacuum=INCREMENTAL
+SCHEMA_VERSION = 2
+
+# 两种 SQL 后端共用的表结构，{real} / {blob} 按后端替换为对应类型
+SCHEMA = [
+    # 主表：条目ID和内容哈希存为 16 字节二进制（sha256 截断）
+    """CREATE TABLE IF NOT EXISTS rss_status (
+        feed_group TEXT,
+        feed_url TEXT,
+        entry_url {blob},
+        entry_content_hash {blob},
+        entry_timestamp {real},
+        PRIMARY KEY (feed_group, feed_url, entry_url)
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_group_content_hash ON rss_status(feed_group, entry_content_hash)",
+    # 按订阅源加载条目ID（覆盖索引）；cleanup_history 按组和时间删除
+    "CREATE INDEX IF NOT EXISTS idx_status_feed_url ON rss_status(feed_url, entry_url)",
+    "CREATE INDEX IF NOT EXISTS idx_status_group_ts ON rss_status(feed_group, entry_timestamp)",
+    """CREATE TABLE IF NOT EXISTS timestamps (
+        feed_group TEXT PRIMARY KEY,
+        last_run_time {real}
+    )""",
+    """CREATE TABLE IF NOT EXISTS cleanup_timestamps (
+        feed_group TEXT PRIMARY KEY,
+        last_cleanup_time {real}
+    )""",
+    """CREATE TABLE IF NOT EXISTS pending_messages (
+        feed_group TEXT,
+        feed_url TEXT,
+        entry_id TEXT,
+        content_hash TEXT,
+        title TEXT,
+        translated_title TEXT,
+        link TEXT,
+        summary TEXT,
+        entry_timestamp {real},
+        sent INTEGER DEFAULT 0,
+        feed_title TEXT,
+        PRIMARY KEY (feed_group, feed_url, entry_id)
+    )""",
+    # get_pending_messages / 清理已发送：按组、发送状态、时间；mark_pending_as_sent：按组和条目ID
+    "CREATE INDEX IF NOT EXISTS idx_pending_group_sent ON pending_messages(feed_group, sent, entry_timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_pending_group_entry ON pending_messages(feed_group, entry_id)",
+    """CREATE TABLE IF NOT EXISTS batch_timestamps (
+        feed_group TEXT PRIMARY KEY,
+        last_batch_sent_time {real}
+    )""",
+    # 条件请求缓存（ETag / Last-Modified / 内容指纹）
+    """CREATE TABLE IF NOT EXISTS feed_cache (
+        feed_url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        body_hash TEXT,
+        updated_at {real}
+    )""",
+    """CREATE TABLE IF NOT EXISTS mirror_health (
+        domain TEXT PRIMARY KEY,
+        ewma_latency {real},
+        error_rate {real},
+        last_failure {real},
+        samples INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS feed_schedule (
+        feed_group TEXT,
+        feed_url TEXT,
+        poll_interval {real},
+        next_poll {real},
+        polls INTEGER,
+        hits INTEGER,
+        tracked_since {real},
+        PRIMARY KEY (feed_group, feed_url)
+    )""",
+    """CREATE TABLE IF NOT EXISTS websub_subscriptions (
+        feed_group TEXT,
+        topic TEXT,
+        hub TEXT,
+        secret TEXT,
+        verified INTEGER,
+        lease_expires {real},
+        requested_at {real},
+        PRIMARY KEY (feed_group, topic)
+    )""",
+    # 近似重复聚合：报道的 MinHash 签名（滑动窗口内）和代表条目的其它来源链接
+    """CREATE TABLE IF NOT EXISTS story_signatures (
+        feed_group TEXT,
+        entry_id TEXT,
+        signature {blob},
+        feed_url TEXT,
+        source TEXT,
+        link TEXT,
+        entry_timestamp {real},
+        PRIMARY KEY (feed_group, entry_id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_story_group_ts ON story_signatures(feed_group, entry_timestamp)",
+    """CREATE TABLE IF NOT EXISTS story_alternates (
+        feed_group TEXT,
+        entry_id TEXT,
+        link TEXT,
+        source TEXT,
+        entry_timestamp {real},
+        PRIMARY KEY (feed_group, entry_id, link)
+    )""",
+    # 翻译缓存：key 为 sha256(目标语言 + 原文) 前 16 字节
+    """CREATE TABLE IF NOT EXISTS translation_cache (
+        cache_key {blob} PRIMARY KEY,
+        translated TEXT,
+        created_at {real}
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_translation_created ON translation_cache(created_at)",
+    # 翻译密钥熔断状态（name 为 primary / backup）
+    """CREATE TABLE IF NOT EXISTS translation_breakers (
+        name TEXT PRIMARY KEY,
+        state TEXT,
+        failures INTEGER,
+        open_until {real},
+        cooldown {real}
+    )""",
+    # 多个聊天时条目已发送到的聊天：只记录尚未发送到全部聊天的条目，重试时跳过已成功的聊天
+    """CREATE TABLE IF NOT EXISTS chat_deliveries (
+        feed_group TEXT,
+        entry_id TEXT,
+        chat_id TEXT,
+        delivered_at {real},
+        PRIMARY KEY (feed_group, entry_id, chat_id)
+    )""",
+]
+
+PENDING_COLUMNS = "feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent, feed_title"
+MIRROR_COLUMNS = "domain, ewma_latency, error_rate, last_failure, samples"
+BREAKER_COLUMNS = "name, state, failures, open_until, cooldown"
+SCHEDULE_COLUMNS = "feed_group, feed_url, poll_interval, next_poll, polls, hits, tracked_since"
+WEBSUB_COLUMNS = "feed_group, topic, hub, secret, verified, lease_expires, requested_at"
+STORY_COLUMNS = "feed_group, entry_id, signature, feed_url, source, link, entry_timestamp"
+ALTERNATE_COLUMNS = "feed_group, entry_id, link, source, entry_timestamp"
+DELIVERY_COLUMNS = "feed_group, entry_id, chat_id, delivered_at"
+# PostgreSQL 批量写入（unnest 数组参数）的列类型，与上面的列顺序一致
+STATUS_TYPES = ("text", "text", "bytea", "bytea", "float8")
+PENDING_TYPES = ("text", "text", "text", "text", "text", "text", "text", "text", "float8", "int4", "text")
+MIRROR_TYPES = ("text", "float8", "float8", "float8", "int4")
+BREAKER_TYPES = ("text", "text", "int4", "float8", "float8")
+STORY_TYPES = ("text", "text", "bytea", "text", "text", "text", "float8")
+ALTERNATE_TYPES = ("text", "text", "text", "text", "float8")
+DELIVERY_TYPES = ("text", "text", "text", "float8")
+TRANSLATION_TYPES = ("bytea", "text", "float8")
+
+
+def create_storage(sqlite_path, pg_url=None, backend=None):
+    """按 backend / RSS_STORAGE / PG_URL 选择存储后端（未连接，需 await open()）"""
+    backend = backend or os.getenv("RSS_STORAGE") or ("postgres" if pg_url else "sqlite")
+    if backend == "postgres":
+        return PostgresStorage(pg_url)
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "sqlite":
+        return SQLiteStorage(sqlite_path)
+    raise ValueError(f"未知存储后端 {backend}，可选: {', '.join(STORAGE_BACKENDS)}")
+
+
+def _mirror_stats(rows):
+    return {
+        domain: {"ewma_latency": ewma_latency, "error_rate": error_rate, "last_failure": last_failure, "samples": samples}
+        for domain, ewma_latency, error_rate, last_failure, samples in rows
+    }
+
+
+def _mirror_rows(stats):
+    return [
+        (domain, st["ewma_latency"], st["error_rate"], st["last_failure"], st["samples"])
+        for domain, st in stats.items()
+    ]
+
+
+def _breaker_states(rows):
+    return {
+        name: {"state": state, "failures": failures, "open_until": open_until, "cooldown": cooldown}
+        for name, state, failures, open_until, cooldown in rows
+    }
+
+
+def _breaker_rows(states):
+    return [
+        (name, st["state"], st["failures"], st["open_until"], st["cooldown"])
+        for name, st in states.items()
+    ]
+
+
+def _schedules(rows):
+    return {
+        (group, url): {
+            "poll_interval": poll_interval,
+            "next_poll": next_poll,
+            "polls": polls,
+            "hits": hits,
+            "tracked_since": tracked_since,
+        }
+        for group, url, poll_interval, next_poll, polls, hits, tracked_since in rows
+    }
+
+
+def _schedule_row(feed_group, feed_url, schedule):
+    return (
+        feed_group, feed_url, schedule["poll_interval"], schedule["next_poll"],
+        schedule["polls"], schedule["hits"], schedule["tracked_since"]
+    )
+
+
+def _subscriptions(rows):
+    return [
+        {
+            "feed_group": feed_group,
+            "topic": topic,
+            "hub": hub,
+            "secret": secret,
+            "verified": verified,
+            "lease_expires": lease_expires or 0.0,
+            "requested_at": requested_at or 0.0,
+        }
+        for feed_group, topic, hub, secret, verified, lease_expires, requested_at in rows
+    ]
+
+
+def _subscription_row(sub):
+    return (
+        sub["feed_group"], sub["topic"], sub["hub"], sub["secret"],
+        sub["verified"], sub["lease_expires"], sub.get("requested_at", 0.0)
+    )
+
+
+class Storage:
+    """存储接口 + 写缓冲，各后端实现 _write_batch 和以下读写方法"""
+
+    backend = None
+
+    # 写缓冲：{主键: 其余列}，flush() 时拼成整行交给 _write_batch
+    WRITE_BUFFERS = ("status", "pending", "last_run", "stories", "alternates", "translations", "deliveries")
+
+    def __init__(self):
+        self._writes = {name: {} for name in self.WRITE_BUFFERS}
+        self._write_lock = asyncio.Lock()
+        self._flush_failures = 0  # 连续整体写入失败的 flush 次数
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"关闭前写入缓冲失败: {e}")
+        await self._close()
+
+    async def _close(self):
+        pass
+
+    async def ensure_initialized(self):
+        """确保数据库表已创建"""
+        await self.create_tables()
+
+    async def create_tables(self):
+        pass
+
+    # ---------- 写缓冲 ----------
+    async def save_status(self, feed_group, feed_url, entry_url, entry_content_hash, timestamp):
+        """记录已处理条目（写缓冲，flush() 时提交）。只在发送成功或已入待发送队列后调用"""
+        self._writes["status"][(feed_group, feed_url, hash_bytes(entry_url))] = (hash_bytes(entry_content_hash), timestamp)
+
+    async def add_pending_message(self, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title):
+        """加入待发送队列（写缓冲，flush() 时提交；同一条目只保留第一次）"""
+        self._writes["pending"].setdefault(
+            (feed_group, feed_url, entry_id),
+            (content_hash, title, translated_title, link, summary, timestamp, 0, feed_title)
+        )
+
+    async def save_last_run_time(self, feed_group, last_run_time):
+        """记录组运行时间（写缓冲，flush() 时提交）"""
+        self._writes["last_run"][(feed_group,)] = (last_run_time,)
+
+    async def load_last_run_time(self, feed_group):
+        if (feed_group,) in self._writes["last_run"]:
+            return self._writes["last_run"][(feed_group,)][0]
+        return await self._load_last_run_time(feed_group)
+
+    async def save_story(self, feed_group, entry_id, signature, feed_url, source, link, timestamp):
+        """记录报道的 MinHash 签名（写缓冲），用于跨订阅源近似重复聚合"""
+        self._writes["stories"][(feed_group, entry_id)] = (signature, feed_url, source, link, timestamp)
+
+    async def add_story_alternate(self, feed_group, entry_id, source, link, timestamp):
+        """为待发送的代表条目记录其它来源的链接（写缓冲）"""
+        self._writes["alternates"].setdefault((feed_group, entry_id, link), (source, timestamp))
+
+    async def save_translation(self, key, translated, created_at):
+        """记录译文（写缓冲）"""
+        self._writes["translations"][(key,)] = (translated, created_at)
+
+    async def load_translation(self, key, since):
+        """created_at 不早于 since 的译文，没有则返回 None"""
+        if (key,) in self._writes["translations"]:
+            return self._writes["translations"][(key,)][0]
+        return await self._load_translation(key, since)
+
+    async def add_chat_delivery(self, feed_group, entry_id, chat_id, timestamp):
+        """记录条目已发送到某个聊天（写缓冲）"""
+        self._writes["deliveries"].setdefault((feed_group, entry_id, chat_id), (timestamp,))
+
+    async def load_chat_deliveries(self, feed_group, entry_ids):
+        """条目已发送到的聊天 {entry_id: set(chat_id)}，包括缓冲中未写入的"""
+        entry_ids = list(entry_ids)
+        delivered = defaultdict(set)
+        if entry_ids:
+            for entry_id, chat_id in await self._load_chat_deliveries(feed_group, entry_ids):
+                delivered[entry_id].add(chat_id)
+        wanted = set(entry_ids)
+        for group, entry_id, chat_id in self._writes["deliveries"]:
+            if group == feed_group and entry_id in wanted:
+                delivered[entry_id].add(chat_id)
+        return dict(delivered)
+
+    async def flush(self):
+        """把缓冲的写操作在一个事务内写入；失败时逐行重试，仍失败的行记录日志后丢弃。
+
+        逐行也一行都写不进去时视为数据库不可用：放回缓冲（期间的新写入优先）并抛出，
+        连续 STORAGE_FLUSH_RETRIES 次后同样丢弃。
+        """
+        async with self._write_lock:
+            writes = self._writes
+            if not any(writes.values()):
+                return
+            self._writes = {name: {} for name in self.WRITE_BUFFERS}
+            rows = {name: [key + value for key, value in buffer.items()] for name, buffer in writes.items()}
+            try:
+                await self._write_batch(**rows)
+            except Exception as e:
+                logger.warning(f"批量写入失败，逐行重试: {e}")
+                await self._write_rows(writes, rows)
+                return
+            self._flush_failures = 0
+        logger.debug(
+            f"💾 写入 {len(rows['status'])} 条状态、{len(rows['pending'])} 条待发送、"
+            f"{len(rows['last_run'])} 个运行时间、{len(rows['stories'])} 条报道签名、{len(rows['translations'])} 条译文、"
+            f"{len(rows['deliveries'])} 条聊天发送记录"
+        )
+
+    async def _write_rows(self, writes, rows):
+        """整批失败后逐行写入（调用方持有 _write_lock）"""
+        empty = {name: [] for name in self.WRITE_BUFFERS}
+        failed = []
+        written = 0
+        for name, batch in rows.items():
+            for row in batch:
+                try:
+                    await self._write_batch(**{**empty, name: [row]})
+                    written += 1
+                except Exception as e:
+                    failed.append((name, row, e))
+        if failed and not written and self._flush_failures < STORAGE_FLUSH_RETRIES:
+            self._flush_failures += 1
+            for name, buffer in writes.items():
+                for key, value in buffer.items():
+                    self._writes[name].setdefault(key, value)
+            raise failed[0][2]
+        self._flush_failures = 0
+        for name, row, e in failed:
+            logger.error(f"丢弃写入失败的 {name} 记录 {row[:3]}: {e}")
+        if failed:
+            logger.warning(f"逐行写入：成功 {written} 行，丢弃 {len(failed)} 行")
+
+    # ---------- 后端实现 ----------
+    async def _write_batch(self, status, pending, last_run, stories, alternates, translations, deliveries):
+        """各参数为整行列表，列顺序：status (group, url, entry_id, content_hash, ts)，pending 按 PENDING_COLUMNS，
+        last_run (group, ts)，stories 按 STORY_COLUMNS，alternates 按 ALTERNATE_COLUMNS，
+        translations (key, translated, created_at)，deliveries 按 DELIVERY_COLUMNS"""
+        raise NotImplementedError
+
+    async def _load_last_run_time(self, feed_group):
+        raise NotImplementedError
+
+    async def _load_translation(self, key, since):
+        raise NotImplementedError
+
+    async def _load_chat_deliveries(self, feed_group, entry_ids):
+        """[(entry_id, chat_id)]"""
+        raise NotImplementedError
+
+    async def prune_translations(self, before, max_rows):
+        """删除 created_at 早于 before 的译文，并只保留最新的 max_rows 条"""
+        raise NotImplementedError
+
+    async def get_pending_messages(self, feed_group):
+        raise NotImplementedError
+
+    async def mark_pending_as_sent(self, feed_group, ids):
+        raise NotImplementedError
+
+    async def get_last_batch_sent_time(self, feed_group):
+        raise NotImplementedError
+
+    async def save_last_batch_sent_time(self, feed_group, ts):
+        raise NotImplementedError
+
+    async def has_content_hash(self, feed_group, content_hash):
+        raise NotImplementedError
+
+    async def load_content_hashes(self, feed_group):
+        """组内全部内容哈希（二进制），用于构建内存去重索引"""
+        raise NotImplementedError
+
+    async def load_entry_ids(self, feed_url):
+        """单个订阅源已处理的条目ID（二进制），按需加载"""
+        raise NotImplementedError
+
+    async def load_feed_cache(self, feed_url):
+        raise NotImplementedError
+
+    async def save_feed_cache(self, feed_url, etag, last_modified, body_hash):
+        raise NotImplementedError
+
+    async def load_mirror_health(self):
+        """镜像健康度 {domain: {ewma_latency, error_rate, last_failure, samples}}"""
+        raise NotImplementedError
+
+    async def save_mirror_health(self, stats):
+        raise NotImplementedError
+
+    async def load_translation_breakers(self):
+        """翻译密钥熔断状态 {name: {state, failures, open_until, cooldown}}"""
+        raise NotImplementedError
+
+    async def save_translation_breakers(self, states):
+        raise NotImplementedError
+
+    async def load_feed_schedules(self, feed_group=None):
+        """自适应轮询状态 {(feed_group, feed_url): {...}}，feed_group 为 None 时读取全部"""
+        raise NotImplementedError
+
+    async def save_feed_schedule(self, feed_group, feed_url, schedule):
+        raise NotImplementedError
+
+    async def count_recent_entries(self, feed_group, feed_url, since):
+        """订阅源在 since 之后新增的条目数，用于估算发布频率"""
+        raise NotImplementedError
+
+    async def load_websub_subscriptions(self):
+        raise NotImplementedError
+
+    async def save_websub_subscription(self, sub):
+        raise NotImplementedError
+
+    async def load_stories(self, feed_group, since):
+        """since 之后的报道签名 [(entry_id, signature, feed_url, source, link, ts)]，按时间排序"""
+        raise NotImplementedError
+
+    async def load_story_alternates(self, feed_group, entry_ids):
+        """代表条目的其它来源链接 {entry_id: [(source, link)]}"""
+        raise NotImplementedError
+
+    async def cleanup_history(self, days, feed_group, story_seconds=None):
+        """每组每天最多一次：删除超过 days 天的状态、已发送的待发送记录和聊天发送记录；
+        报道签名和其它来源链接只在聚合窗口内有用，给出 story_seconds 时按它清理，否则同样按 days"""
+        raise NotImplementedError
+
+    async def incremental_vacuum(self, pages=SQLITE_VACUUM_PAGES):
+        pass
+
+
+class SQLiteStorage(Storage):
+    backend = "sqlite"
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.conn = None
+
+    async def open(self):
+        import aiosqlite
+        # 语句缓存：各方法的 SQL 文本固定，重复执行时复用已编译的语句
+        self.conn = await aiosqlite.connect(self.path, cached_statements=256)
+        # auto_vacuum 必须在新库写入任何内容（包括切换 WAL）之前设置；已有库由 create_tables 升级
+        await self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        await self.conn.execute("PRAGMA journal_mode=WAL")
+        await self.conn.execute("PRAGMA synchronous=NORMAL")
+        await self.conn.execute("PRAGMA temp_store=MEMORY")
+        await self.conn.execute("PRAGMA busy_timeout=5000")
+        await self.conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        await self.conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+
+    async def _close(self):
+        if self.conn:
+            await self.conn.close()
+
+    async def _fetchone(self, sql, params=()):
+        rows = await self.conn.execute_fetchall(sql, params)
+        return rows[0] if rows else None
+
+    async def _execute(self, sql, params=()):
+        async with self._write_lock:
+            await self.conn.execute(sql, params)
+            await self.conn.commit()
+
+    async def create_tables(self):
+        version = (await self._fetchone("PRAGMA user_version"))[0]
+        fresh = (await self._fetchone("SELECT COUNT(*) FROM sqlite_master WHERE type='table'"))[0] == 0
+        if not fresh and version < 1:
+            await self._migrate_status()
+        for sql in SCHEMA:
+            await self.conn.execute(sql.format(real="REAL", blob="BLOB"))
+        await self.conn.commit()
+        if not fresh and version < 2:
+            # 旧库切换 auto_vacuum 需要一次完整 VACUUM
+            logger.info("🔄 rss.db 启用 auto_vacuum=INCREMENTAL（VACUUM 中）")
+            await self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            await self.conn.execute("VACUUM")
+        if version < SCHEMA_VERSION:
+            await self._execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    async def _migrate_status(self):
+        """旧版 rss_status 的 64 位十六进制 TEXT 列转换为 16 字节 BLOB（新建表后分批复制）"""
+        columns = {row[1]: row[2] for row in await self.conn.execute_fetchall("PRAGMA table_info(rss_status)")}
+        if columns.get("entry_url", "BLOB").upper() != "TEXT":
+            return
+        logger.info("🔄 迁移 rss_status：十六进制文本 → 二进制哈希")
+        await self.conn.execute("ALTER TABLE rss_status RENAME TO rss_status_hex")
+        await self.conn.execute("DROP INDEX IF EXISTS idx_group_content_hash")
+        await self.conn.execute(SCHEMA[0].format(real="REAL", blob="BLOB"))
+        await self.conn.execute(SCHEMA[1])
+        async with self.conn.execute("SELECT * FROM rss_status_hex") as rows:
+            while True:
+                batch = await rows.fetchmany(5000)
+                if not batch:
+                    break
+                await self.conn.executemany(
+                    "INSERT OR IGNORE INTO rss_status VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (group, url, hash_bytes(entry_url or ""), hash_bytes(content_hash or ""), ts)
+                        for group, url, entry_url, content_hash, ts in batch
+                    ]
+                )
+        await self.conn.execute("DROP TABLE rss_status_hex")
+        await self.conn.commit()
+
+    async def _write_batch(self, status, pending, last_run, stories, alternates, translations, deliveries):
+        try:
+            await self.conn.executemany("INSERT OR REPLACE INTO rss_status VALUES (?, ?, ?, ?, ?)", status)
+            await self.conn.executemany(
+                f"INSERT OR IGNORE INTO pending_messages ({PENDING_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                pending
+            )
+            await self.conn.executemany(
+                "INSERT OR REPLACE INTO timestamps (feed_group, last_run_time) VALUES (?, ?)", last_run
+            )
+            await self.conn.executemany(
+                f"INSERT OR REPLACE INTO story_signatures ({STORY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", stories
+            )
+            await self.conn.executemany(
+                f"INSERT OR IGNORE INTO story_alternates ({ALTERNATE_COLUMNS}) VALUES (?, ?, ?, ?, ?)", alternates
+            )
+            await self.conn.executemany(
+                "INSERT OR REPLACE INTO translation_cache (cache_key, translated, created_at) VALUES (?, ?, ?)", translations
+            )
+            await self.conn.executemany(
+                f"INSERT OR IGNORE INTO chat_deliveries ({DELIVERY_COLUMNS}) VALUES (?, ?, ?, ?)", deliveries
+            )
+            await self.conn.commit()
+        except Exception:
+            await self.conn.rollback()
+            raise
+
+    async def _load_last_run_time(self, feed_group):
+        row = await self._fetchone("SELECT last_run_time FROM timestamps WHERE feed_group = ?", (feed_group,))
+        return row[0] if row else 0
+
+    async def _load_translation(self, key, since):
+        row = await self._fetchone(
+            "SELECT translated FROM translation_cache WHERE cache_key = ? AND created_at >= ?", (key, since)
+        )
+        return row[0] if row else None
+
+    async def _load_chat_deliveries(self, feed_group, entry_ids):
+        rows = []
+        for i in range(0, len(entry_ids), 500):
+            chunk = entry_ids[i:i + 500]
+            rows += await self.conn.execute_fetchall(f"""
+                SELECT entry_id, chat_id FROM chat_deliveries
+                WHERE feed_group = ? AND entry_id IN ({", ".join("?" * len(chunk))})
+            """, (feed_group, *chunk))
+        return rows
+
+    async def prune_translations(self, before, max_rows):
+        async with self._write_lock:
+            await self.conn.execute("DELETE FROM translation_cache WHERE created_at < ?", (before,))
+            await self.conn.execute("""
+                DELETE FROM translation_cache WHERE cache_key IN (
+                    SELECT cache_key FROM translation_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (max_rows,))
+            await self.conn.commit()
+
+    async def get_pending_messages(self, feed_group):
+        async with self.conn.execute("""
+            SELECT * FROM pending_messages
+            WHERE feed_group=? AND sent=0
+            ORDER BY entry_timestamp ASC
+        """, (feed_group,)) as c:
+            keys = [d[0] for d in c.description]
+            return [dict(zip(keys, row)) for row in await c.fetchall()]
+
+    async def mark_pending_as_sent(self, feed_group, ids):
+        if not ids:
+            return
+        async with self._write_lock:
+            await self.conn.executemany(
+                "UPDATE pending_messages SET sent=1 WHERE feed_group=? AND entry_id=?",
+                [(feed_group, eid) for eid in ids]
+            )
+            await self.conn.commit()
+
+    async def get_last_batch_sent_time(self, feed_group):
+        row = await self._fetchone("SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=?", (feed_group,))
+        return row[0] if row else 0
+
+    async def save_last_batch_sent_time(self, feed_group, ts):
+        await self._execute(
+            "INSERT OR REPLACE INTO batch_timestamps (feed_group, last_batch_sent_time) VALUES (?, ?)", (feed_group, ts)
+        )
+
+    async def has_content_hash(self, feed_group, content_hash):
+        row = await self._fetchone(
+            "SELECT 1 FROM rss_status WHERE feed_group=? AND entry_content_hash=? LIMIT 1",
+            (feed_group, hash_bytes(content_hash))
+        )
+        return row is not None
+
+    async def load_content_hashes(self, feed_group):
+        rows = await self.conn.execute_fetchall("SELECT entry_content_hash FROM rss_status WHERE feed_group = ?", (feed_group,))
+        return [row[0] for row in rows if row[0]]
+
+    async def load_entry_ids(self, feed_url):
+        rows = await self.conn.execute_fetchall("SELECT entry_url FROM rss_status WHERE feed_url = ?", (feed_url,))
+        return [row[0] for row in rows]
+
+    async def load_feed_cache(self, feed_url):
+        row = await self._fetchone("SELECT etag, last_modified, body_hash FROM feed_cache WHERE feed_url = ?", (feed_url,))
+        if not row:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "body_hash": row[2]}
+
+    async def save_feed_cache(self, feed_url, etag, last_modified, body_hash):
+        await self._execute("""
+            INSERT OR REPLACE INTO feed_cache (feed_url, etag, last_modified, body_hash, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (feed_url, etag, last_modified, body_hash, time.time()))
+
+    async def load_mirror_health(self):
+        return _mirror_stats(await self.conn.execute_fetchall(f"SELECT {MIRROR_COLUMNS} FROM mirror_health"))
+
+    async def save_mirror_health(self, stats):
+        rows = _mirror_rows(stats)
+        if not rows:
+            return
+        async with self._write_lock:
+            await self.conn.executemany(f"INSERT OR REPLACE INTO mirror_health ({MIRROR_COLUMNS}) VALUES (?, ?, ?, ?, ?)", rows)
+            await self.conn.commit()
+
+    async def load_translation_breakers(self):
+        return _breaker_states(await self.conn.execute_fetchall(f"SELECT {BREAKER_COLUMNS} FROM translation_breakers"))
+
+    async def save_translation_breakers(self, states):
+        rows = _breaker_rows(states)
+        if not rows:
+            return
+        async with self._write_lock:
+            await self.conn.executemany(
+                f"INSERT OR REPLACE INTO translation_breakers ({BREAKER_COLUMNS}) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            await self.conn.commit()
+
+    async def load_feed_schedules(self, feed_group=None):
+        if feed_group is None:
+            rows = await self.conn.execute_fetchall(f"SELECT {SCHEDULE_COLUMNS} FROM feed_schedule")
+        else:
+            rows = await self.conn.execute_fetchall(f"SELECT {SCHEDULE_COLUMNS} FROM feed_schedule WHERE feed_group = ?", (feed_group,))
+        return _schedules(rows)
+
+    async def save_feed_schedule(self, feed_group, feed_url, schedule):
+        await self._execute(
+            f"INSERT OR REPLACE INTO feed_schedule ({SCHEDULE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            _schedule_row(feed_group, feed_url, schedule)
+        )
+
+    async def count_recent_entries(self, feed_group, feed_url, since):
+        row = await self._fetchone(
+            "SELECT COUNT(*) FROM rss_status WHERE feed_group=? AND feed_url=? AND entry_timestamp > ?",
+            (feed_group, feed_url, since)
+        )
+        return row[0] if row else 0
+
+    async def load_stories(self, feed_group, since):
+        return await self.conn.execute_fetchall("""
+            SELECT entry_id, signature, feed_url, source, link, entry_timestamp FROM story_signatures
+            WHERE feed_group = ? AND entry_timestamp >= ?
+            ORDER BY entry_timestamp
+        """, (feed_group, since))
+
+    async def load_story_alternates(self, feed_group, entry_ids):
+        alternates = defaultdict(list)
+        entry_ids = list(entry_ids)
+        for i in range(0, len(entry_ids), 500):
+            chunk = entry_ids[i:i + 500]
+            rows = await self.conn.execute_fetchall(f"""
+                SELECT entry_id, source, link FROM story_alternates
+                WHERE feed_group = ? AND entry_id IN ({", ".join("?" * len(chunk))})
+                ORDER BY entry_timestamp
+            """, (feed_group, *chunk))
+            for entry_id, source, link in rows:
+                alternates[entry_id].append((source, link))
+        return dict(alternates)
+
+    async def load_websub_subscriptions(self):
+        return _subscriptions(await self.conn.execute_fetchall(f"SELECT {WEBSUB_COLUMNS} FROM websub_subscriptions"))
+
+    async def save_websub_subscription(self, sub):
+        await self._execute(
+            f"INSERT OR REPLACE INTO websub_subscriptions ({WEBSUB_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            _subscription_row(sub)
+        )
+
+    async def cleanup_history(self, days, feed_group, story_seconds=None):
+        now = time.time()
+        cutoff_ts = now - days * 86400
+        story_cutoff = now - story_seconds if story_seconds else cutoff_ts
+        row = await self._fetchone("SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group = ?", (feed_group,))
+        if now - (row[0] if row else 0) < 86400:
+            return
+        async with self._write_lock:
+            await self.conn.execute("DELETE FROM rss_status WHERE feed_group=? AND entry_timestamp < ?", (feed_group, cutoff_ts))
+            await self.conn.execute(
+                "DELETE FROM pending_messages WHERE feed_group=? AND sent=1 AND entry_timestamp < ?", (feed_group, cutoff_ts)
+            )
+            await self.conn.execute("DELETE FROM story_signatures WHERE feed_group=? AND entry_timestamp < ?", (feed_group, story_cutoff))
+            await self.conn.execute("DELETE FROM story_alternates WHERE feed_group=? AND entry_timestamp < ?", (feed_group, story_cutoff))
+            await self.conn.execute("DELETE FROM chat_deliveries WHERE feed_group=? AND delivered_at < ?", (feed_group, cutoff_ts))
+            await self.conn.execute(
+                "INSERT OR REPLACE INTO cleanup_timestamps (feed_group, last_cleanup_time) VALUES (?, ?)", (feed_group, now)
+            )
+            await self.conn.commit()
+
+    async def incremental_vacuum(self, pages=SQLITE_VACUUM_PAGES):
+        """归还最多 pages 个空闲页（auto_vacuum=INCREMENTAL）"""
+        free_pages = (await self._fetchone("PRAGMA freelist_count"))[0]
+        if free_pages:
+            # executescript 会一直 step 到结束；普通 execute 每次只回收一页
+            async with self._write_lock:
+                await self.conn.executescript(f"PRAGMA incremental_vacuum({pages})")
+            logger.debug(f"🧹 incremental_vacuum: 空闲页 {free_pages}，本次最多回收 {pages}")
+
+
+class PostgresStorage(Storage):
+    """asyncpg 连接池；asyncpg 会按连接缓存预编译语句，同一 SQL 文本重复执行不再解析
+
+    批量写入把每列打包成数组，INSERT ... SELECT FROM unnest(...) 一条语句写完一张表，
+    标记已发送用 entry_id = ANY($2)；语句数和往返数见 bench/pg_round_trips.py。
+    """
+
+    backend = "postgres"
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self.pool = None
+
+    async def open(self):
+        import asyncpg
+        self.pool = await asyncpg.create_pool(self.url)
+
+    async def _close(self):
+        if self.pool:
+            await self.pool.close()
+
+    async def create_tables(self):
+        async with self.pool.acquire() as conn:
+            await conn.execute(SCHEMA[0].format(real="DOUBLE PRECISION", blob="BYTEA"))
+            await self._migrate_status(conn)
+            for sql in SCHEMA[1:]:
+                await conn.execute(sql.format(real="DOUBLE PRECISION", blob="BYTEA"))
+
+    async def _migrate_status(self, conn):
+        """旧版 rss_status 的 64 位十六进制 TEXT 列就地转换为 16 字节 BYTEA"""
+        data_type = await conn.fetchval("""
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name='rss_status' AND column_name='entry_url'
+        """)
+        if data_type != "text":
+            return
+        logger.info("🔄 迁移 rss_status：十六进制文本 → 二进制哈希")
+        convert = """CASE WHEN {col} ~ '^[0-9a-f]{{64}}$' THEN decode(substr({col}, 1, 32), 'hex')
+                     ELSE substring(sha256(convert_to({col}, 'UTF8')) from 1 for 16) END"""
+        async with conn.transaction():
+            await conn.execute(f"""
+                ALTER TABLE rss_status
+                    ALTER COLUMN entry_url TYPE BYTEA USING {convert.format(col='entry_url')},
+                    ALTER COLUMN entry_content_hash TYPE BYTEA USING {convert.format(col='entry_content_hash')}
+            """)
+
+    @staticmethod
+    def _unnest(types, rows):
+        """按列展开为数组参数：unnest($1::text[], $2::bytea[], ...)，整批一条语句、一次往返"""
+        source = "unnest(" + ", ".join(f"${i + 1}::{t}[]" for i, t in enumerate(types)) + ")"
+        return source, [list(column) for column in zip(*rows)]
+
+    async def _write_batch(self, status, pending, last_run, stories, alternates, translations, deliveries):
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                if status:
+                    source, args = self._unnest(STATUS_TYPES, status)
+                    await conn.execute(f"""
+                        INSERT INTO rss_status (feed_group, feed_url, entry_url, entry_content_hash, entry_timestamp)
+                        SELECT * FROM {source}
+                        ON CONFLICT (feed_group, feed_url, entry_url) DO UPDATE SET
+                            entry_content_hash = EXCLUDED.entry_content_hash,
+                            entry_timestamp = EXCLUDED.entry_timestamp
+                    """, *args)
+                if pending:
+                    source, args = self._unnest(PENDING_TYPES, pending)
+                    await conn.execute(f"""
+                        INSERT INTO pending_messages ({PENDING_COLUMNS})
+                        SELECT * FROM {source}
+                        ON CONFLICT DO NOTHING
+                    """, *args)
+                if last_run:
+                    source, args = self._unnest(("text", "float8"), last_run)
+                    await conn.execute(f"""
+                        INSERT INTO timestamps (feed_group, last_run_time)
+                        SELECT * FROM {source}
+                        ON CONFLICT (feed_group) DO UPDATE SET last_run_time=EXCLUDED.last_run_time
+                    """, *args)
+                if stories:
+                    source, args = self._unnest(STORY_TYPES, stories)
+                    await conn.execute(f"""
+                        INSERT INTO story_signatures ({STORY_COLUMNS})
+                        SELECT * FROM {source}
+                        ON CONFLICT (feed_group, entry_id) DO UPDATE SET
+                            signature=EXCLUDED.signature,
+                            entry_timestamp=EXCLUDED.entry_timestamp
+                    """, *args)
+                if alternates:
+                    source, args = self._unnest(ALTERNATE_TYPES, alternates)
+                    await conn.execute(f"""
+                        INSERT INTO story_alternates ({ALTERNATE_COLUMNS})
+                        SELECT * FROM {source}
+                        ON CONFLICT DO NOTHING
+                    """, *args)
+                if translations:
+                    source, args = self._unnest(TRANSLATION_TYPES, translations)
+                    await conn.execute(f"""
+                        INSERT INTO translation_cache (cache_key, translated, created_at)
+                        SELECT * FROM {source}
+                        ON CONFLICT (cache_key) DO UPDATE SET
+                            translated=EXCLUDED.translated,
+                            created_at=EXCLUDED.created_at
+                    """, *args)
+                if deliveries:
+                    source, args = self._unnest(DELIVERY_TYPES, deliveries)
+                    await conn.execute(f"""
+                        INSERT INTO chat_deliveries ({DELIVERY_COLUMNS})
+                        SELECT * FROM {source}
+                        ON CONFLICT DO NOTHING
+                    """, *args)
+
+    async def _load_last_run_time(self, feed_group):
+        value = await self.pool.fetchval("SELECT last_run_time FROM timestamps WHERE feed_group=$1", feed_group)
+        return value or 0
+
+    async def _load_translation(self, key, since):
+        return await self.pool.fetchval(
+            "SELECT translated FROM translation_cache WHERE cache_key=$1 AND created_at>=$2", key, since
+        )
+
+    async def _load_chat_deliveries(self, feed_group, entry_ids):
+        rows = await self.pool.fetch(
+            "SELECT entry_id, chat_id FROM chat_deliveries WHERE feed_group=$1 AND entry_id = ANY($2::text[])",
+            feed_group, entry_ids
+        )
+        return [tuple(row) for row in rows]
+
+    async def prune_translations(self, before, max_rows):
+        async with self.pool.acquire() as conn:
+            await conn.execute("DELETE FROM translation_cache WHERE created_at<$1", before)
+            await conn.execute("""
+                DELETE FROM translation_cache WHERE cache_key IN (
+                    SELECT cache_key FROM translation_cache ORDER BY created_at DESC OFFSET $1
+                )
+            """, max_rows)
+
+    async def get_pending_messages(self, feed_group):
+        rows = await self.pool.fetch("""
+            SELECT * FROM pending_messages
+            WHERE feed_group=$1 AND sent=0
+            ORDER BY entry_timestamp ASC
+        """, feed_group)
+        return [dict(row) for row in rows]
+
+    async def mark_pending_as_sent(self, feed_group, ids):
+        if not ids:
+            return
+        await self.pool.execute(
+            "UPDATE pending_messages SET sent=1 WHERE feed_group=$1 AND entry_id = ANY($2::text[])",
+            feed_group, list(ids)
+        )
+
+    async def get_last_batch_sent_time(self, feed_group):
+        value = await self.pool.fetchval("SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=$1", feed_group)
+        return value or 0
+
+    async def save_last_batch_sent_time(self, feed_group, ts):
+        await self.pool.execute("""
+            INSERT INTO batch_timestamps (feed_group, last_batch_sent_time) VALUES ($1, $2)
+            ON CONFLICT (feed_group) DO UPDATE SET last_batch_sent_time=EXCLUDED.last_batch_sent_time
+        """, feed_group, ts)
+
+    async def has_content_hash(self, feed_group, content_hash):
+        row = await self.pool.fetchrow(
+            "SELECT 1 FROM rss_status WHERE feed_group=$1 AND entry_content_hash=$2 LIMIT 1",
+            feed_group, hash_bytes(content_hash)
+        )
+        return row is not None
+
+    async def load_content_hashes(self, feed_group):
+        rows = await self.pool.fetch("SELECT entry_content_hash FROM rss_status WHERE feed_group=$1", feed_group)
+        return [row[0] for row in rows if row[0]]
+
+    async def load_entry_ids(self, feed_url):
+        rows = await self.pool.fetch("SELECT entry_url FROM rss_status WHERE feed_url=$1", feed_url)
+        return [row[0] for row in rows]
+
+    async def load_feed_cache(self, feed_url):
+        row = await self.pool.fetchrow("SELECT etag, last_modified, body_hash FROM feed_cache WHERE feed_url=$1", feed_url)
+        return dict(row) if row else None
+
+    async def save_feed_cache(self, feed_url, etag, last_modified, body_hash):
+        await self.pool.execute("""
+            INSERT INTO feed_cache (feed_url, etag, last_modified, body_hash, updated_at)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (feed_url) DO UPDATE SET
+                etag=EXCLUDED.etag,
+                last_modified=EXCLUDED.last_modified,
+                body_hash=EXCLUDED.body_hash,
+                updated_at=EXCLUDED.updated_at
+        """, feed_url, etag, last_modified, body_hash, time.time())
+
+    async def load_mirror_health(self):
+        rows = await self.pool.fetch(f"SELECT {MIRROR_COLUMNS} FROM mirror_health")
+        return _mirror_stats(tuple(row) for row in rows)
+
+    async def save_mirror_health(self, stats):
+        rows = _mirror_rows(stats)
+        if not rows:
+            return
+        source, args = self._unnest(MIRROR_TYPES, rows)
+        await self.pool.execute(f"""
+            INSERT INTO mirror_health ({MIRROR_COLUMNS})
+            SELECT * FROM {source}
+            ON CONFLICT (domain) DO UPDATE SET
+                ewma_latency=EXCLUDED.ewma_latency,
+                error_rate=EXCLUDED.error_rate,
+                last_failure=EXCLUDED.last_failure,
+                samples=EXCLUDED.samples
+        """, *args)
+
+    async def load_translation_breakers(self):
+        rows = await self.pool.fetch(f"SELECT {BREAKER_COLUMNS} FROM translation_breakers")
+        return _breaker_states(tuple(row) for row in rows)
+
+    async def save_translation_breakers(self, states):
+        rows = _breaker_rows(states)
+        if not rows:
+            return
+        source, args = self._unnest(BREAKER_TYPES, rows)
+        await self.pool.execute(f"""
+            INSERT INTO translation_breakers ({BREAKER_COLUMNS})
+            SELECT * FROM {source}
+            ON CONFLICT (name) DO UPDATE SET
+                state=EXCLUDED.state,
+                failures=EXCLUDED.failures,
+                open_until=EXCLUDED.open_until,
+                cooldown=EXCLUDED.cooldown
+        """, *args)
+
+    async def load_feed_schedules(self, feed_group=None):
+        if feed_group is None:
+            rows = await self.pool.fetch(f"SELECT {SCHEDULE_COLUMNS} FROM feed_schedule")
+        else:
+            rows = await self.pool.fetch(f"SELECT {SCHEDULE_COLUMNS} FROM feed_schedule WHERE feed_group=$1", feed_group)
+        return _schedules(tuple(row) for row in rows)
+
+    async def save_feed_schedule(self, feed_group, feed_url, schedule):
+        await self.pool.execute(f"""
+            INSERT INTO feed_schedule ({SCHEDULE_COLUMNS}) VALUES ($1, $2, $3, $4, $5, $6, $7)
+            ON CONFLICT (feed_group, feed_url) DO UPDATE SET
+                poll_interval=EXCLUDED.poll_interval,
+                next_poll=EXCLUDED.next_poll,
+                polls=EXCLUDED.polls,
+                hits=EXCLUDED.hits
+        """, *_schedule_row(feed_group, feed_url, schedule))
+
+    async def count_recent_entries(self, feed_group, feed_url, since):
+        return await self.pool.fetchval(
+            "SELECT COUNT(*) FROM rss_status WHERE feed_group=$1 AND feed_url=$2 AND entry_timestamp>$3",
+            feed_group, feed_url, since
+        )
+
+    async def load_stories(self, feed_group, since):
+        rows = await self.pool.fetch("""
+            SELECT entry_id, signature, feed_url, source, link, entry_timestamp FROM story_signatures
+            WHERE feed_group=$1 AND entry_timestamp>=$2
+            ORDER BY entry_timestamp
+        """, feed_group, since)
+        return [tuple(row) for row in rows]
+
+    async def load_story_alternates(self, feed_group, entry_ids):
+        rows = await self.pool.fetch("""
+            SELECT entry_id, source, link FROM story_alternates
+            WHERE feed_group=$1 AND entry_id = ANY($2::text[])
+            ORDER BY entry_timestamp
+        """, feed_group, list(entry_ids))
+        alternates = defaultdict(list)
+        for entry_id, source, link in rows:
+            alternates[entry_id].append((source, link))
+        return dict(alternates)
+
+    async def load_websub_subscriptions(self):
+        rows = await self.pool.fetch(f"SELECT {WEBSUB_COLUMNS} FROM websub_subscriptions")
+        return _subscriptions(tuple(row) for row in rows)
+
+    async def save_websub_subscription(self, sub):
+        await self.pool.execute(f"""
+            INSERT INTO websub_subscriptions ({WEBSUB_COLUMNS}) VALUES ($1, $2, $3, $4, $5, $6, $7)
+            ON CONFLICT (feed_group, topic) DO UPDATE SET
+                hub=EXCLUDED.hub,
+                secret=EXCLUDED.secret,
+                verified=EXCLUDED.verified,
+                lease_expires=EXCLUDED.lease_expires,
+                requested_at=EXCLUDED.requested_at
+        """, *_subscription_row(sub))
+
+    async def cleanup_history(self, days, feed_group, story_seconds=None):
+        now = time.time()
+        cutoff_ts = now - days * 86400
+        story_cutoff = now - story_seconds if story_seconds else cutoff_ts
+        last_cleanup = await self.pool.fetchval(
+            "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group=$1", feed_group
+        )
+        if now - (last_cleanup or 0) < 86400:
+            return
+        async with self.pool.acquire() as conn:
+            await conn.execute("DELETE FROM rss_status WHERE feed_group=$1 AND entry_timestamp<$2", feed_group, cutoff_ts)
+            await conn.execute(
+                "DELETE FROM pending_messages WHERE feed_group=$1 AND sent=1 AND entry_timestamp<$2", feed_group, cutoff_ts
+            )
+            await conn.execute("DELETE FROM story_signatures WHERE feed_group=$1 AND entry_timestamp<$2", feed_group, story_cutoff)
+            await conn.execute("DELETE FROM story_alternates WHERE feed_group=$1 AND entry_timestamp<$2", feed_group, story_cutoff)
+            await conn.execute("DELETE FROM chat_deliveries WHERE feed_group=$1 AND delivered_at<$2", feed_group, cutoff_ts)
+            await conn.execute("""
+                INSERT INTO cleanup_timestamps (feed_group, last_cleanup_time) VALUES ($1, $2)
+                ON CONFLICT (feed_group) DO UPDATE SET last_cleanup_time=EXCLUDED.last_cleanup_time
+            """, feed_group, now)
+
+
+class MemoryStorage(Storage):
+    """纯内存实现，进程退出即丢失；用于基准测试和不需要持久化的调试运行"""
+
+    backend = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self.status = {}            # (group, url, entry_id) -> (content_hash, ts)
+        self.pending = {}           # (group, url, entry_id) -> row dict
+        self.last_run = {}
+        self.last_batch = {}
+        self.last_cleanup = {}
+        self.feed_cache = {}
+        self.mirror_health = {}
+        self.breakers = {}
+        self.schedules = {}
+        self.subscriptions = {}
+        self.stories = {}           # (group, entry_id) -> (signature, feed_url, source, link, ts)
+        self.alternates = {}        # (group, entry_id, link) -> (source, ts)
+        self.translations = {}      # key -> (translated, created_at)
+        self.deliveries = {}        # (group, entry_id, chat_id) -> delivered_at
+
+    async def _write_batch(self, status, pending, last_run, stories, alternates, translations, deliveries):
+        for group, url, entry_id, content_hash, ts in status:
+            self.status[(group, url, entry_id)] = (content_hash, ts)
+        keys = [column.strip() for column in PENDING_COLUMNS.split(",")]
+        for row in pending:
+            self.pending.setdefault(row[:3], dict(zip(keys, row)))
+        self.last_run.update(last_run)
+        for group, entry_id, *rest in stories:
+            self.stories[(group, entry_id)] = tuple(rest)
+        for group, entry_id, link, source, ts in alternates:
+            self.alternates.setdefault((group, entry_id, link), (source, ts))
+        for key, translated, created_at in translations:
+            self.translations[key] = (translated, created_at)
+        for group, entry_id, chat_id, ts in deliveries:
+            self.deliveries.setdefault((group, entry_id, chat_id), ts)
+
+    async def _load_last_run_time(self, feed_group):
+        return self.last_run.get(feed_group, 0)
+
+    async def _load_translation(self, key, since):
+        translated, created_at = self.translations.get(key, (None, 0))
+        return translated if created_at >= since else None
+
+    async def _load_chat_deliveries(self, feed_group, entry_ids):
+        entry_ids = set(entry_ids)
+        return [
+            (entry_id, chat_id) for (group, entry_id, chat_id) in self.deliveries
+            if group == feed_group and entry_id in entry_ids
+        ]
+
+    async def prune_translations(self, before, max_rows):
+        rows = sorted(
+            ((key, value) for key, value in self.translations.items() if value[1] >= before),
+            key=lambda item: item[1][1], reverse=True
+        )
+        self.translations = dict(rows[:max_rows])
+
+    async def get_pending_messages(self, feed_group):
+        rows = [dict(row) for row in self.pending.values() if row["feed_group"] == feed_group and not row["sent"]]
+        return sorted(rows, key=lambda row: row["entry_timestamp"])
+
+    async def mark_pending_as_sent(self, feed_group, ids):
+        ids = set(ids)
+        for row in self.pending.values():
+            if row["feed_group"] == feed_group and row["entry_id"] in ids:
+                row["sent"] = 1
+
+    async def get_last_batch_sent_time(self, feed_group):
+        return self.last_batch.get(feed_group, 0)
+
+    async def save_last_batch_sent_time(self, feed_group, ts):
+        self.last_batch[feed_group] = ts
+
+    async def has_content_hash(self, feed_group, content_hash):
+        content_hash = hash_bytes(content_hash)
+        return any(group == feed_group and value[0] == content_hash for (group, _, _), value in self.status.items())
+
+    async def load_content_hashes(self, feed_group):
+        return [value[0] for (group, _, _), value in self.status.items() if group == feed_group]
+
+    async def load_entry_ids(self, feed_url):
+        return [entry_id for (_, url, entry_id) in self.status if url == feed_url]
+
+    async def load_feed_cache(self, feed_url):
+        cache = self.feed_cache.get(feed_url)
+        return dict(cache) if cache else None
+
+    async def save_feed_cache(self, feed_url, etag, last_modified, body_hash):
+        self.feed_cache[feed_url] = {"etag": etag, "last_modified": last_modified, "body_hash": body_hash}
+
+    async def load_mirror_health(self):
+        return {domain: dict(st) for domain, st in self.mirror_health.items()}
+
+    async def save_mirror_health(self, stats):
+        self.mirror_health.update({domain: dict(st) for domain, st in stats.items()})
+
+    async def load_translation_breakers(self):
+        return {name: dict(st) for name, st in self.breakers.items()}
+
+    async def save_translation_breakers(self, states):
+        self.breakers.update({name: dict(st) for name, st in states.items()})
+
+    async def load_feed_schedules(self, feed_group=None):
+        return {
+            key: dict(schedule) for key, schedule in self.schedules.items()
+            if feed_group is None or key[0] == feed_group
+        }
+
+    async def save_feed_schedule(self, feed_group, feed_url, schedule):
+        self.schedules[(feed_group, feed_url)] = dict(schedule)
+
+    async def count_recent_entries(self, feed_group, feed_url, since):
+        return sum(
+            1 for (group, url, _), (_, ts) in self.status.items()
+            if group == feed_group and url == feed_url and ts > since
+        )
+
+    async def load_stories(self, feed_group, since):
+        rows = [
+            (entry_id, signature, feed_url, source, link, ts)
+            for (group, entry_id), (signature, feed_url, source, link, ts) in self.stories.items()
+            if group == feed_group and ts >= since
+        ]
+        return sorted(rows, key=lambda row: row[5])
+
+    async def load_story_alternates(self, feed_group, entry_ids):
+        entry_ids = set(entry_ids)
+        alternates = defaultdict(list)
+        for (group, entry_id, link), (source, ts) in sorted(self.alternates.items(), key=lambda item: item[1][1]):
+            if group == feed_group and entry_id in entry_ids:
+                alternates[entry_id].append((source, link))
+        return dict(alternates)
+
+    async def load_websub_subscriptions(self):
+        return [dict(sub) for sub in self.subscriptions.values()]
+
+    async def save_websub_subscription(self, sub):
+        self.subscriptions[(sub["feed_group"], sub["topic"])] = dict(sub)
+
+    async def cleanup_history(self, days, feed_group, story_seconds=None):
+        now = time.time()
+        if now - self.last_cleanup.get(feed_group, 0) < 86400:
+            return
+        cutoff_ts = now - days * 86400
+        story_cutoff = now - story_seconds if story_seconds else cutoff_ts
+        self.status = {
+            key: value for key, value in self.status.items()
+            if key[0] != feed_group or value[1] >= cutoff_ts
+        }
+        self.pending = {
+            key: row for key, row in self.pending.items()
+            if key[0] != feed_group or not row["sent"] or row["entry_timestamp"] >= cutoff_ts
+        }
+        self.stories = {
+            key: value for key, value in self.stories.items()
+            if key[0] != feed_group or value[4] >= story_cutoff
+        }
+        self.alternates = {
+            key: value for key, value in self.alternates.items()
+            if key[0] != feed_group or value[1] >= story_cutoff
+        }
+        self.deliveries = {
+            key: ts for key, ts in self.deliveries.items()
+            if key[0] != feed_group or ts >= cutoff_ts
+        }
+        self.last_cleanup[feed_group] = now
@@ -0,0 +1,83 @@
+# rss_translation.py
+"""翻译缓存
+
+同一标题会在多个订阅源、多次重试、发送失败后的下一轮里反复出现，每次都调用腾讯云 TMT（计费且最慢）。
+这里按「目标语言 + 清理后的原文」的 sha256（16 字节）缓存译文：
+- 进程内 LRU（OrderedDict）在前，未命中再查数据库 translation_cache 表
+- 数据库写入走 Storage 写缓冲，随条目状态一起 flush
+- 过期（ttl 秒）和超出行数上限的旧译文由 prune() 删除
+- 命中/未命中计数，每轮运行结束时记录日志
+"""
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def translation_key(text, target="zh"):
+    return hashlib.sha256(f"{target}\0{text}".encode()).digest()[:16]
+
+
+class TranslationCache:
+    def __init__(self, db, size=2000, ttl=30 * 86400, max_rows=50000):
+        self.db = db
+        self.size = size
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._lru = OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0       # 进程内命中
+        self.db_hits = 0    # 数据库命中
+        self.misses = 0
+
+    def _remember(self, key, translated):
+        self._lru[key] = translated
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.size:
+            self._lru.popitem(last=False)
+
+    async def get(self, text, target="zh"):
+        """已缓存的译文，没有则返回 None"""
+        key = translation_key(text, target)
+        translated = self._lru.get(key)
+        if translated is not None:
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return translated
+        try:
+            translated = await self.db.load_translation(key, time.time() - self.ttl)
+        except Exception as e:
+            logger.error(f"读取翻译缓存失败: {e}")
+            translated = None
+        if translated is None:
+            self.misses += 1
+            return None
+        self.db_hits += 1
+        self._remember(key, translated)
+        return translated
+
+    async def put(self, text, translated, target="zh"):
+        """只缓存翻译接口成功返回的译文（失败时的原文兜底不缓存）"""
+        if not translated:
+            return
+        key = translation_key(text, target)
+        self._remember(key, translated)
+        await self.db.save_translation(key, translated, time.time())
+
+    async def prune(self):
+        try:
+            await self.db.prune_translations(time.time() - self.ttl, self.max_rows)
+        except Exception as e:
+            logger.error(f"清理翻译缓存失败: {e}")
+
+    def summary(self):
+        total = self.hits + self.db_hits + self.misses
+        rate = (self.hits + self.db_hits) / total * 100 if total else 0
+        return (
+            f"命中 {self.hits + self.db_hits}（内存 {self.hits} / 数据库 {self.db_hits}），"
+            f"未命中 {self.misses}，命中率 {rate:.1f}%，内存缓存 {len(self._lru)} 条"
+        )
@@ -0,0 +1,179 @@
+# rss_websub.py
+"""WebSub（PubSubHubbub）推送接收
+
+订阅源声明了 <link rel="hub"> 时向 hub 订阅，hub 推送的内容交给 on_notify 回调，
+走与轮询相同的去重/翻译/发送流程。只在常驻模式下启用（需要一直监听回调地址）。
+
+- 回调地址：{WEBSUB_CALLBACK_URL}/{sub_id}，sub_id 由组和 topic 计算，重启后不变
+- 校验：GET 请求回显 hub.challenge，并记录租约到期时间
+- 推送：POST 请求按 hub.secret 校验 X-Hub-Signature 后再处理
+- 续订：租约剩余不足 renew_before 秒时重新订阅；租约过期后由轮询兜底
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+from urllib.parse import urlparse
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_ALGORITHMS = ("sha1", "sha256", "sha384", "sha512")
+# hub 回传的租约秒数超出此范围时视为无效（一年上限，避免溢出或永久订阅）
+MAX_LEASE_SECONDS = 365 * 86400
+
+
+def find_hub(feed_data):
+    """从解析结果中找出 hub 地址（feedparser 与 FastFeedParser 都会给出 feed.links）"""
+    for link in feed_data.feed.get("links", []) or []:
+        if link.get("rel") == "hub" and link.get("href"):
+            return link["href"]
+    return None
+
+
+def parse_lease_seconds(value, default):
+    """hub.lease_seconds 校验：非正整数或超出范围时用 default"""
+    try:
+        lease = int(value)
+    except (TypeError, ValueError):
+        return default
+    return lease if 0 < lease <= MAX_LEASE_SECONDS else default
+
+
+def subscription_id(feed_group, topic):
+    return hashlib.sha256(f"{feed_group}|{topic}".encode()).hexdigest()[:24]
+
+
+class WebSubManager:
+    def __init__(self, db, session, callback_url, on_notify, lease_seconds=864000, renew_before=86400):
+        self.db = db
+        self.session = session
+        self.callback_url = callback_url.rstrip("/")
+        self.on_notify = on_notify
+        self.lease_seconds = lease_seconds
+        self.renew_before = renew_before
+        self.subscriptions = {}
+        self.tasks = set()
+        self._runner = None
+
+    async def load(self):
+        for sub in await self.db.load_websub_subscriptions():
+            self.subscriptions[subscription_id(sub["feed_group"], sub["topic"])] = sub
+
+    async def start(self, host, port):
+        route = urlparse(self.callback_url).path.rstrip("/") + "/{sub_id}"
+        app = web.Application()
+        app.router.add_get(route, self.handle_verify)
+        app.router.add_post(route, self.handle_notify)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"📡 WebSub 回调监听 {host}:{port}{route}")
+
+    async def stop(self):
+        if self.tasks:
+            await asyncio.wait(self.tasks, timeout=60)
+        if self._runner:
+            await self._runner.cleanup()
+
+    def is_active(self, feed_group, topic):
+        """租约有效期内的订阅源不再轮询"""
+        sub = self.subscriptions.get(subscription_id(feed_group, topic))
+        return bool(sub and sub["verified"] and sub["lease_expires"] > time.time())
+
+    async def discover(self, feed_group, topic, feed_data):
+        hub = find_hub(feed_data)
+        if not hub:
+            return
+        sub = self.subscriptions.get(subscription_id(feed_group, topic))
+        if sub and sub["hub"] == hub and (sub["verified"] or sub.get("requested_at", 0) > time.time() - 3600):
+            return  # 已订阅，或一小时内刚发起过订阅
+        await self.subscribe(feed_group, topic, hub)
+
+    async def subscribe(self, feed_group, topic, hub, mode="subscribe"):
+        sub_id = subscription_id(feed_group, topic)
+        sub = self.subscriptions.get(sub_id) or {
+            "feed_group": feed_group,
+            "topic": topic,
+            "secret": secrets.token_hex(16),
+            "verified": 0,
+            "lease_expires": 0.0,
+        }
+        sub["hub"] = hub
+        sub["requested_at"] = time.time()
+        self.subscriptions[sub_id] = sub
+        await self.db.save_websub_subscription(sub)
+        data = {
+            "hub.mode": mode,
+            "hub.topic": topic,
+            "hub.callback": f"{self.callback_url}/{sub_id}",
+            "hub.secret": sub["secret"],
+            "hub.lease_seconds": str(self.lease_seconds),
+        }
+        try:
+            async with self.session.post(hub, data=data, timeout=30) as response:
+                if response.status not in (202, 204):
+                    logger.warning(f"WebSub {mode} 被拒绝 [{response.status}]: {topic}")
+        except Exception as e:
+            logger.warning(f"WebSub {mode} 请求失败 {hub}: {e}")
+
+    async def renew_expiring(self):
+        deadline = time.time() + self.renew_before
+        for sub in list(self.subscriptions.values()):
+            if sub["verified"] and sub["lease_expires"] < deadline:
+                await self.subscribe(sub["feed_group"], sub["topic"], sub["hub"])
+
+    async def handle_verify(self, request):
+        sub = self.subscriptions.get(request.match_info["sub_id"])
+        mode = request.query.get("hub.mode")
+        topic = request.query.get("hub.topic")
+        if not sub or topic != sub["topic"]:
+            return web.Response(status=404)
+        if mode == "denied":
+            logger.warning(f"WebSub 订阅被 hub 拒绝: {topic} {request.query.get('hub.reason', '')}")
+            sub["verified"] = 0
+            await self.db.save_websub_subscription(sub)
+            return web.Response(status=200)
+        if mode == "subscribe":
+            lease = parse_lease_seconds(request.query.get("hub.lease_seconds"), self.lease_seconds)
+            sub["verified"] = 1
+            sub["lease_expires"] = time.time() + lease
+        elif mode == "unsubscribe":
+            sub["verified"] = 0
+            sub["lease_expires"] = 0.0
+        else:
+            return web.Response(status=400)
+        await self.db.save_websub_subscription(sub)
+        return web.Response(text=request.query.get("hub.challenge", ""))
+
+    async def handle_notify(self, request):
+        sub = self.subscriptions.get(request.match_info["sub_id"])
+        if not sub:
+            return web.Response(status=404)
+        body = await request.read()
+        if not self._signature_ok(sub["secret"], body, request.headers.get("X-Hub-Signature", "")):
+            # 规范要求签名不符时仍返回 2xx，但丢弃内容
+            logger.warning(f"WebSub 推送签名校验失败: {sub['topic']}")
+            return web.Response(status=202)
+        task = asyncio.create_task(self._dispatch(sub, body))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return web.Response(status=202)
+
+    async def _dispatch(self, sub, body):
+        try:
+            await self.on_notify(sub["feed_group"], sub["topic"], body)
+        except Exception as e:
+            logger.error(f"WebSub 推送处理失败 [{sub['topic']}]: {e}")
+
+    @staticmethod
+    def _signature_ok(secret, body, header):
+        if not secret:
+            return True
+        algorithm, _, digest = header.partition("=")
+        if algorithm not in SIGNATURE_ALGORITHMS or not digest:
+            return False
+        expected = hmac.new(secret.encode(), body, algorithm).hexdigest()
+        return hmac.compare_digest(expected, digest)
@@ -0,0 +1,76 @@
+# script_lang.py
+"""按 Unicode 文字范围判断语言（rss.py / sql_rss.py / sql_rss2.py / mail.py / qq.py 共用）
+
+一次遍历统计各类文字的字符数（汉字、假名、谚文、西里尔、拉丁字母、其它字母、数字），
+各调用方按自己的阈值判断。结果只取决于文本本身，短标题也稳定；不需要加载语言模型。
+"""
+import os
+
+# is_need_translate：汉字占字母的比例不低于该值视为中文（"Apple 发布新品" 这类中英混排不翻译）
+LANG_ZH_RATIO = float(os.getenv("LANG_ZH_RATIO", "0.2"))
+# detect_language：占比最高的文字超过该比例才认定语言，否则为 'other'
+LANG_DOMINANT_RATIO = float(os.getenv("LANG_DOMINANT_RATIO", "0.4"))
+
+HAN, KANA, HANGUL, CYRILLIC, LATIN, OTHER_ALPHA, DIGIT, OTHER = range(8)
+# detect_language 的返回值，与上面的下标对应
+LANGUAGES = ("zh", "ja", "ko", "ru", "en")
+
+
+def script_histogram(text):
+    """各类文字的字符数，下标为 HAN / KANA / ... / OTHER"""
+    counts = [0] * 8
+    for ch in text:
+        o = ord(ch)
+        if o < 0x80:
+            if 0x61 <= o <= 0x7a or 0x41 <= o <= 0x5a:
+                counts[LATIN] += 1
+            elif 0x30 <= o <= 0x39:
+                counts[DIGIT] += 1
+            else:
+                counts[OTHER] += 1
+        elif 0x4e00 <= o <= 0x9fff or 0x3400 <= o <= 0x4dbf:
+            counts[HAN] += 1
+        elif 0x3040 <= o <= 0x30ff or 0x31f0 <= o <= 0x31ff:
+            counts[KANA] += 1
+        elif 0xac00 <= o <= 0xd7af or 0x1100 <= o <= 0x11ff or 0x3130 <= o <= 0x318f:
+            counts[HANGUL] += 1
+        elif 0x0400 <= o <= 0x04ff:
+            counts[CYRILLIC] += 1
+        elif ch.isalpha():
+            counts[LATIN if o <= 0x024f else OTHER_ALPHA] += 1
+        elif ch.isdigit():
+            counts[DIGIT] += 1
+        else:
+            counts[OTHER] += 1
+    return counts
+
+
+def is_need_translate(text, zh_ratio=None):
+    """标题是否需要翻译成中文：有字母、且不是以汉字为主（含假名的视为日文）"""
+    counts = script_histogram(text)
+    letters = sum(counts[HAN:DIGIT])
+    if not letters:
+        return False
+    if counts[KANA]:
+        return True
+    return counts[HAN] / letters < (LANG_ZH_RATIO if zh_ratio is None else zh_ratio)
+
+
+def is_mainly_chinese(text, ratio=0.1):
+    """汉字占全文字符数的比例超过 ratio（空文本视为中文）"""
+    if not text:
+        return True
+    return script_histogram(text)[HAN] / len(text) > ratio
+
+
+def detect_language(text, threshold=None):
+    """占比最高的文字对应的语言：zh / ja / ko / ru / en，不够明显为 'other'，没有文字为 'unknown'"""
+    if not text or not isinstance(text, str):
+        return "unknown"
+    counts = script_histogram(text)
+    total = sum(counts[HAN:OTHER])
+    if not total:
+        return "unknown"
+    index = max(range(len(LANGUAGES)), key=counts.__getitem__)
+    dominant = LANGUAGES[index]
+    return dominant if counts[index] / total > (LANG_DOMINANT_RATIO if threshold is None else threshold) else "other"
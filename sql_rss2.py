@@ -1,5 +1,5 @@
 #source rss_venv/bin/activate
-#pip install aiohttp pytz aiosqlite python-dotenv feedparser python-telegram-bot tenacity md2tgmd tencentcloud-sdk-python langdetect
+#pip install aiohttp pytz aiosqlite python-dotenv feedparser python-telegram-bot tenacity md2tgmd tencentcloud-sdk-python
 import asyncio
 import aiohttp
 import logging
@@ -10,43 +10,49 @@ import pytz
 import fcntl
 import time
 import signal
-import aiosqlite
 import sys
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 from feedparser import parse
-from telegram import Bot
 from telegram.error import BadRequest
 from urllib.parse import urlparse
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from md2tgmd import escape
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.tmt.v20180321 import tmt_client, models
 from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
 from collections import defaultdict
-from langdetect import detect, LangDetectException
+
+# ========== 环境加载 ==========
+# 下面的本地模块在导入时读取环境变量，先加载 .env
+load_dotenv()
+
+from rss_dedup import EntryStatus
+from rss_storage import Storage, create_storage
+from tencent_tmt import get_translator, tmt_executor
+from script_lang import is_need_translate
+import tg_delivery
+from tg_delivery import get_bot
 from rss_config import RSS_GROUPS
 
 # ========== 全局退出标志 ==========
 SHOULD_EXIT = False
-# ========== 环境加载 ==========
-load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent
 LOCK_FILE = BASE_DIR / "rss.lock"
 DATABASE_FILE = BASE_DIR / "rss.db"
 
-logging.basicConfig(
-    filename=BASE_DIR / "rss.log",
-    level=logging.WARNING,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    encoding="utf-8"
-)
+def setup_logging():
+    """日志写入 rss.log；只在作为脚本运行时调用，测试和 bench 导入本模块时不创建日志文件"""
+    logging.basicConfig(
+        filename=BASE_DIR / "rss.log",
+        level=logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        encoding="utf-8"
+    )
+
 logger = logging.getLogger(__name__)
 
-TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID").split(",")
+# 逗号分隔的多个聊天，每条消息发送到全部聊天（见 tg_delivery.fan_out）
+TELEGRAM_CHAT_ID = [chat_id.strip() for chat_id in os.getenv("TELEGRAM_CHAT_ID").split(",") if chat_id.strip()]
 TENCENTCLOUD_SECRET_ID = os.getenv("TENCENTCLOUD_SECRET_ID")
 TENCENTCLOUD_SECRET_KEY = os.getenv("TENCENTCLOUD_SECRET_KEY")
 TENCENT_REGION = os.getenv("TENCENT_REGION", "na-siliconvalley")
@@ -60,355 +66,21 @@ BACKUP_DOMAINS = [domain.strip() for domain in BACKUP_DOMAINS_STR.split(",") if
 
 # ========== 数据库配置 ==========
 PG_URL = os.getenv("PG_URL")
-USE_PG = PG_URL is not None
 
-# 日志记录数据库类型
-if USE_PG:
+# 日志记录数据库类型（RSS_STORAGE 可显式指定 sqlite / postgres / memory）
+STORAGE_BACKEND = os.getenv("RSS_STORAGE") or ("postgres" if PG_URL else "sqlite")
+if STORAGE_BACKEND == "postgres":
     # 安全地记录数据库信息（隐藏密码）
     safe_pg_url = re.sub(r':([^@]+)@', ':****@', PG_URL) if PG_URL else "未配置"
     logger.info(f"🔧 使用 PostgreSQL 数据库: {safe_pg_url}")
     print(f"✅ PostgreSQL ")
+elif STORAGE_BACKEND == "memory":
+    logger.info("🔧 使用内存存储（不持久化）")
+    print("✅ Memory")
 else:
     logger.info(f"🔧 使用 SQLite 数据库: {DATABASE_FILE}")
     print(f"✅ SQLite : {DATABASE_FILE}")
 
-if USE_PG:
-    import asyncpg
-class RSSDatabase:
-    def __init__(self, loop=None):
-        self.loop = loop or asyncio.get_event_loop()
-        self.conn = None
-        self.pg_pool = None
-
-    async def open(self):
-        if USE_PG:
-            self.pg_pool = await asyncpg.create_pool(PG_URL)
-        else:
-            self.conn = await aiosqlite.connect(DATABASE_FILE)
-
-    async def close(self):
-        if USE_PG and self.pg_pool:
-            await self.pg_pool.close()
-        elif self.conn:
-            await self.conn.close()
-
-    async def ensure_initialized(self):
-        """确保数据库表已创建"""
-        await self.create_tables()
-
-    async def create_tables(self):  # 这里缩进修复
-        """改进的建表语句，确保 PostgreSQL 和 SQLite 索引一致"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 主表
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS rss_status (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_url TEXT,
-                        entry_content_hash TEXT,
-                        entry_timestamp DOUBLE PRECISION,
-                        PRIMARY KEY (feed_group, feed_url, entry_url)
-                    );
-                """)
-                # 确保内容哈希索引存在
-                await conn.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS idx_group_content_hash 
-                    ON rss_status(feed_group, entry_content_hash);
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_run_time DOUBLE PRECISION
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS cleanup_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_cleanup_time DOUBLE PRECISION
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS pending_messages (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_id TEXT,
-                        content_hash TEXT,
-                        title TEXT,
-                        translated_title TEXT,
-                        link TEXT,
-                        summary TEXT,
-                        entry_timestamp DOUBLE PRECISION,
-                        sent INTEGER DEFAULT 0,
-                        feed_title TEXT,
-                        PRIMARY KEY (feed_group, feed_url, entry_id)
-                    );
-                """)
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS batch_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_batch_sent_time DOUBLE PRECISION
-                    );
-                """)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS rss_status (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_url TEXT,
-                        entry_content_hash TEXT,
-                        entry_timestamp REAL,
-                        PRIMARY KEY (feed_group, feed_url, entry_url)
-                    )""")
-                await c.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS idx_group_content_hash 
-                    ON rss_status(feed_group, entry_content_hash);
-                """)
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_run_time REAL
-                    )""")
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS cleanup_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_cleanup_time REAL
-                    )""")
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS pending_messages (
-                        feed_group TEXT,
-                        feed_url TEXT,
-                        entry_id TEXT,
-                        content_hash TEXT,
-                        title TEXT,
-                        translated_title TEXT,
-                        link TEXT,
-                        summary TEXT,
-                        entry_timestamp REAL,
-                        sent INTEGER DEFAULT 0,
-                        feed_title TEXT,
-                        PRIMARY KEY (feed_group, feed_url, entry_id)
-                    )
-                """)
-                await c.execute("""
-                    CREATE TABLE IF NOT EXISTS batch_timestamps (
-                        feed_group TEXT PRIMARY KEY,
-                        last_batch_sent_time REAL
-                    )
-                """)
-                await self.conn.commit()
-
-    async def add_pending_message(self, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO pending_messages (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent, feed_title)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, 0, $10)
-                ON CONFLICT DO NOTHING
-                """, feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR IGNORE INTO pending_messages
-                    (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, entry_timestamp, sent, feed_title)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
-                """, (feed_group, feed_url, entry_id, content_hash, title, translated_title, link, summary, timestamp, feed_title))
-                await self.conn.commit()
-
-    async def get_pending_messages(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT * FROM pending_messages
-                    WHERE feed_group=$1 AND sent=0
-                    ORDER BY entry_timestamp ASC
-                """, feed_group)
-                return [dict(row) for row in rows]
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    SELECT * FROM pending_messages
-                    WHERE feed_group=? AND sent=0
-                    ORDER BY entry_timestamp ASC
-                """, (feed_group,))
-                keys = [d[0] for d in c.description]
-                rows = await c.fetchall()
-                return [dict(zip(keys, row)) for row in rows]
-
-    async def mark_pending_as_sent(self, feed_group, ids):
-        if not ids:
-            return
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.executemany("""
-                    UPDATE pending_messages SET sent=1
-                    WHERE feed_group=$1 AND entry_id=$2
-                """, [(feed_group, eid) for eid in ids])
-        else:
-            async with self.conn.cursor() as c:
-                await c.executemany("""
-                    UPDATE pending_messages SET sent=1
-                    WHERE feed_group=? AND entry_id=?
-                """, [(feed_group, eid) for eid in ids])
-                await self.conn.commit()
-
-    async def get_last_batch_sent_time(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow("""
-                    SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=$1
-                """, feed_group)
-                return row['last_batch_sent_time'] if row else 0
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    SELECT last_batch_sent_time FROM batch_timestamps WHERE feed_group=?
-                """, (feed_group,))
-                result = await c.fetchone()
-                return result[0] if result else 0
-
-    async def save_last_batch_sent_time(self, feed_group, ts):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO batch_timestamps (feed_group, last_batch_sent_time)
-                VALUES ($1, $2)
-                ON CONFLICT (feed_group) DO UPDATE SET last_batch_sent_time=EXCLUDED.last_batch_sent_time
-                """, feed_group, ts)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR REPLACE INTO batch_timestamps (feed_group, last_batch_sent_time)
-                    VALUES (?, ?)
-                """, (feed_group, ts))
-                await self.conn.commit()
-
-    async def save_status(self, feed_group, feed_url, entry_url, entry_content_hash, timestamp):
-        """改进的状态保存，确保去重一致性"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 使用 ON CONFLICT 确保唯一性
-                await conn.execute("""
-                    INSERT INTO rss_status (feed_group, feed_url, entry_url, entry_content_hash, entry_timestamp) 
-                    VALUES($1, $2, $3, $4, $5) 
-                    ON CONFLICT (feed_group, feed_url, entry_url) 
-                    DO UPDATE SET 
-                        entry_content_hash = EXCLUDED.entry_content_hash,
-                        entry_timestamp = EXCLUDED.entry_timestamp
-                """, feed_group, feed_url, entry_url, entry_content_hash, timestamp)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "INSERT OR REPLACE INTO rss_status VALUES (?, ?, ?, ?, ?)",
-                    (feed_group, feed_url, entry_url, entry_content_hash, timestamp)
-                )
-                await self.conn.commit()
-
-    async def has_content_hash(self, feed_group, content_hash):
-        """改进的内容哈希检查，确保编码一致性"""
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                # 修复：PostgreSQL 参数占位符错误，应该是 $1, $2
-                row = await conn.fetchrow(
-                    "SELECT 1 FROM rss_status WHERE feed_group=$1 AND entry_content_hash=$2 LIMIT 1",
-                    feed_group, content_hash
-                )
-                return row is not None
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "SELECT 1 FROM rss_status WHERE feed_group=? AND entry_content_hash=? LIMIT 1",
-                    (feed_group, content_hash)
-                )
-                return await c.fetchone() is not None
-
-    async def load_status(self):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                rows = await conn.fetch("SELECT feed_url, entry_url FROM rss_status")
-                status = {}
-                for row in rows:
-                    feed_url, entry_url = row['feed_url'], row['entry_url']
-                    status.setdefault(feed_url, set()).add(entry_url)
-                return status
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("SELECT feed_url, entry_url FROM rss_status")
-                rows = await c.fetchall()
-                status = {}
-                for feed_url, entry_url in rows:
-                    status.setdefault(feed_url, set()).add(entry_url)
-                return status
-
-    async def load_last_run_time(self, feed_group):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow("SELECT last_run_time FROM timestamps WHERE feed_group=$1", feed_group)
-                return row['last_run_time'] if row else 0
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("SELECT last_run_time FROM timestamps WHERE feed_group = ?", (feed_group,))
-                result = await c.fetchone()
-                return result[0] if result else 0
-
-    async def save_last_run_time(self, feed_group, last_run_time):
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                await conn.execute("""
-                INSERT INTO timestamps (feed_group, last_run_time)
-                VALUES ($1, $2)
-                ON CONFLICT (feed_group) DO UPDATE SET last_run_time=EXCLUDED.last_run_time
-                """, feed_group, last_run_time)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute("""
-                    INSERT OR REPLACE INTO timestamps (feed_group, last_run_time)
-                    VALUES (?, ?)
-                """, (feed_group, last_run_time))
-                await self.conn.commit()
-
-    async def cleanup_history(self, days, feed_group):
-        now = time.time()
-        cutoff_ts = now - days * 86400
-
-        if USE_PG:
-            async with self.pg_pool.acquire() as conn:
-                row = await conn.fetchrow(
-                    "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group=$1", feed_group
-                )
-                last_cleanup = row['last_cleanup_time'] if row else 0
-                if now - last_cleanup < 86400:
-                    return
-                await conn.execute(
-                    "DELETE FROM rss_status WHERE feed_group=$1 AND entry_timestamp<$2",
-                    feed_group, cutoff_ts
-                )
-                await conn.execute("""
-                    INSERT INTO cleanup_timestamps (feed_group, last_cleanup_time)
-                    VALUES ($1, $2)
-                    ON CONFLICT (feed_group) DO UPDATE SET last_cleanup_time=EXCLUDED.last_cleanup_time
-                """, feed_group, now)
-        else:
-            async with self.conn.cursor() as c:
-                await c.execute(
-                    "SELECT last_cleanup_time FROM cleanup_timestamps WHERE feed_group = ?",
-                    (feed_group,)
-                )
-                result = await c.fetchone()
-                last_cleanup = result[0] if result else 0
-                if now - last_cleanup < 86400:
-                    return
-                await c.execute(
-                    "DELETE FROM rss_status WHERE feed_group=? AND entry_timestamp < ?",
-                    (feed_group, cutoff_ts)
-                )
-                await c.execute("""
-                    INSERT OR REPLACE INTO cleanup_timestamps (feed_group, last_cleanup_time)
-                    VALUES (?, ?)
-                """, (feed_group, now))
-                await self.conn.commit()
-
 # ========== 业务逻辑 ==========
 
 def remove_html_tags(text):
@@ -476,11 +148,6 @@ def get_entry_timestamp(entry):
         dt = datetime(*entry.updated_parsed[:6], tzinfo=pytz.utc)
     return dt
 
-@retry(
-    stop=stop_after_attempt(1),
-    wait=wait_exponential(multiplier=1, min=5, max=30),
-    retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)),
-)
 async def send_single_message(bot, chat_id, text, disable_web_page_preview=False):
     try:
         MAX_MESSAGE_LENGTH = 4096
@@ -499,9 +166,11 @@ async def send_single_message(bot, chat_id, text, disable_web_page_preview=False
         if current_chunk:
             text_chunks.append('\n\n'.join(current_chunk))
         for chunk in text_chunks:
-            await bot.send_message(
-                chat_id=chat_id,
-                text=chunk,
+            # 限频、429 重新排队、网络重试由 tg_delivery 处理
+            await tg_delivery.send_message(
+                bot,
+                chat_id,
+                chunk,
                 parse_mode='MarkdownV2',
                 disable_web_page_preview=disable_web_page_preview,
                 read_timeout=10,
@@ -556,21 +225,13 @@ async def translate_with_credentials(secret_id, secret_key, text):
      #   logger.warning(f"文本截断至 {len(text)} 字符 ({len(safe_bytes)} 字节)")
     try:
         return await loop.run_in_executor(
-            None, 
+            tmt_executor(), 
             lambda: _sync_translate(secret_id, secret_key, text)
         )
     except Exception as e:
     #    logger.error(f"翻译执行失败: {type(e).__name__} - {str(e)}")
         raise
 
-def is_need_translate(text):
-    try:
-        lang = detect(text)
-        # 只对英文、日文、韩文、阿拉伯文等非中文做翻译
-        return lang not in ("zh-cn", "zh-tw", "zh", "yue")
-    except LangDetectException:
-        return False
-    
 def is_mostly_symbols(text):
     """检查文本是否主要由符号、数字组成"""
     if not text:
@@ -585,15 +246,8 @@ def is_mostly_symbols(text):
 
 def _sync_translate(secret_id, secret_key, text):
     try:
-        cred = credential.Credential(secret_id, secret_key)
-        clientProfile = ClientProfile(httpProfile=HttpProfile(endpoint="tmt.tencentcloudapi.com"))
-        client = tmt_client.TmtClient(cred, TENCENT_REGION, clientProfile)
-        req = models.TextTranslateRequest()
-        req.SourceText = remove_html_tags(text)
-        req.Source = "auto"
-        req.Target = "zh"
-        req.ProjectId = 0
-        return client.TextTranslate(req).TargetText
+        # 复用该密钥的常驻客户端（keep-alive）
+        return get_translator(secret_id, secret_key, TENCENT_REGION).translate(remove_html_tags(text))
     except TencentCloudSDKException as e:
         error_details = {
             "code": getattr(e, "code", ""),
@@ -859,10 +513,10 @@ async def send_batch_messages(bot, chat_id, message_content, disable_web_page_pr
                         bot, chat_id, segment, 
                         disable_web_page_preview=disable_web_page_preview
                     )
-                    if i < len(message_content) - 1:  # 不是最后一条
-                        await asyncio.sleep(1)  # 避免发送过快
                 except Exception as e:
+                    # 整条消息算发送失败，条目留在待发送队列下次重发
                     logger.error(f"发送分段消息失败: {e}")
+                    raise
     else:  # 单条消息
         await send_single_message(
             bot, chat_id, message_content,
@@ -870,7 +524,7 @@ async def send_batch_messages(bot, chat_id, message_content, disable_web_page_pr
         )
 
 # 修改批量发送函数中的调用
-async def process_batch_send(group, db: RSSDatabase):
+async def process_batch_send(group, db: Storage):
     group_key = group["group_key"]
     bot_token = group["bot_token"]
     processor = group["processor"]
@@ -894,7 +548,7 @@ async def process_batch_send(group, db: RSSDatabase):
     for row in pending:
         feed_url_to_msgs[row["feed_url"]].append(row)
 
-    bot = Bot(token=bot_token)
+    bot = await get_bot(bot_token)
     sent_entry_ids = []
     
     for feed_url, msgs in feed_url_to_msgs.items():
@@ -909,24 +563,27 @@ async def process_batch_send(group, db: RSSDatabase):
                 self.title = row["translated_title"] or row["title"]
                 self.link = row["link"]
                 self.summary = row.get("summary", "") or ""  # ✅ 新增摘要支持
-        entries = [Entry(row) for row in msgs]
+        rows = {row["entry_id"]: row for row in msgs}
         
-        try:
+        async def render(ids):
             # 生成消息内容
-            feed_message = await generate_group_message(
-                DummyFeed, entries, {**processor, "translate": False}
+            entries = [Entry(rows[entry_id]) for entry_id in ids]
+            return await generate_group_message(DummyFeed, entries, {**processor, "translate": False})
+        
+        async def send(chat_id, ids, feed_message):
+            # 发送消息（支持分段）
+            await send_batch_messages(
+                bot,
+                chat_id,
+                feed_message,
+                disable_web_page_preview=not processor.get("preview", True)
             )
-            
-            if feed_message:
-                # 发送消息（支持分段）
-                await send_batch_messages(
-                    bot,
-                    TELEGRAM_CHAT_ID[0],
-                    feed_message,
-                    disable_web_page_preview=not processor.get("preview", True)
-                )
-                # 记录已发送的消息ID
-                sent_entry_ids.extend([row["entry_id"] for row in msgs])
+            return ids
+        
+        try:
+            complete = await tg_delivery.fan_out(db, group_key, TELEGRAM_CHAT_ID, list(rows), render, send)
+            # 记录已发送到全部聊天的消息ID
+            sent_entry_ids.extend(entry_id for entry_id in rows if entry_id in complete)
                 
         except Exception as e:
             logger.error(f"批量推送失败[{group_key}-{feed_url}]: {e}")
@@ -934,11 +591,12 @@ async def process_batch_send(group, db: RSSDatabase):
     # 标记已发送的消息
     if sent_entry_ids:
         await db.mark_pending_as_sent(group_key, sent_entry_ids)
+    await db.flush()  # 部分聊天的发送记录
     
     await db.save_last_batch_sent_time(group_key, now)
 
 # ========== 组采集（采集但可选择是否立即推送） ==========
-async def process_group(session, group_config, global_status, db: RSSDatabase):
+async def process_group(session, group_config, global_status, db: Storage):
     """在组处理中添加退出检查"""
     global SHOULD_EXIT
     
@@ -958,7 +616,7 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
         if (now - last_run) < group_config["interval"]:
             return
             
-        bot = Bot(token=bot_token)
+        bot = await get_bot(bot_token)
         for index, feed_url in enumerate(group_config["urls"]):
             try:
                 if index > 0:
@@ -968,7 +626,8 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                 if not feed_data or not feed_data.entries:
                     continue
                     
-                processed_ids = global_status.get(canonical_url, set())
+                processed_ids = await global_status.entry_ids(canonical_url)
+                content_index = await global_status.content_hashes(group_key)
                 new_entries = []
                 seen_in_batch = set()
                 new_hashes_in_batch = set()  # 当前批次的内容哈希去重
@@ -978,7 +637,7 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                     content_hash = get_entry_content_hash(entry)
                     
                     # 统一使用内容哈希去重（主要修复）
-                    if await db.has_content_hash(group_key, content_hash):
+                    if content_hash in content_index:
                         continue
                         
                     if entry_id in processed_ids or entry_id in seen_in_batch:
@@ -1020,31 +679,40 @@ async def process_group(session, group_config, global_status, db: RSSDatabase):
                             )
                             await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
                             processed_ids.add(entry_id)
-                            
-                        global_status[canonical_url] = processed_ids
+                            content_index.add(content_hash)
                     else:
-                        # 立即发送模式
-                        feed_message = await generate_group_message(feed_data, [e for e,_,_ in new_entries], processor)
-                        if feed_message:
-                            try:
-                                await send_single_message(
-                                    bot,
-                                    TELEGRAM_CHAT_ID[0],
-                                    feed_message,
-                                    disable_web_page_preview=not processor.get("preview", True)
-                                )
-                                for entry, content_hash, entry_id in new_entries:
-                                    await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
-                                    processed_ids.add(entry_id)
-                                global_status[canonical_url] = processed_ids
-                            except Exception as send_error:
-                                logger.error(f"❌ 发送消息失败 [{feed_url}]: {send_error}")
-                                raise
+                        # 立即发送模式：发送到全部聊天后才记录状态，失败的聊天下一轮补发
+                        entries_by_id = {entry_id: (entry, content_hash) for entry, content_hash, entry_id in new_entries}
+
+                        async def render(ids):
+                            return await generate_group_message(feed_data, [entries_by_id[i][0] for i in ids], processor)
+
+                        async def send(chat_id, ids, feed_message):
+                            await send_single_message(
+                                bot,
+                                chat_id,
+                                feed_message,
+                                disable_web_page_preview=not processor.get("preview", True)
+                            )
+                            return ids
+
+                        complete = await tg_delivery.fan_out(db, group_key, TELEGRAM_CHAT_ID, list(entries_by_id), render, send)
+                        for entry_id in complete:
+                            content_hash = entries_by_id[entry_id][1]
+                            await db.save_status(group_key, canonical_url, entry_id, content_hash, time.time())
+                            processed_ids.add(entry_id)
+                            content_index.add(content_hash)
+                        if len(complete) < len(entries_by_id):
+                            logger.error(f"❌ 发送消息失败 [{feed_url}]: {len(entries_by_id) - len(complete)} 条未发送到全部聊天")
                                 
             except Exception as e:
                 logger.error(f"❌ 处理失败 [{feed_url}]: {e}")
+            finally:
+                # 每个订阅源处理完即提交缓冲的状态/待发送记录
+                await db.flush()
                 
         await db.save_last_run_time(group_key, now)
+        await db.flush()
         
     except Exception as e:
         logger.critical(f"‼️ 处理组失败 [{group_key}]: {e}")
@@ -1054,7 +722,7 @@ async def main():
     
     # 快速数据库连接检查（60秒超时）
     try:
-        db_test = RSSDatabase()
+        db_test = create_storage(DATABASE_FILE, PG_URL)
         await asyncio.wait_for(db_test.open(), timeout=60)  # 60秒超时
         await db_test.ensure_initialized()
         await db_test.close()
@@ -1086,7 +754,7 @@ async def main():
 
 async def run_main_logic():
     lock_file = None
-    db = RSSDatabase()
+    db = create_storage(DATABASE_FILE, PG_URL)
     
     try:
         # 获取文件锁
@@ -1119,7 +787,7 @@ async def run_main_logic():
         # 主处理逻辑
         logger.info("🚀 开始处理 RSS 订阅...")
         async with aiohttp.ClientSession() as session:
-            status = await db.load_status()
+            status = EntryStatus(db)
             tasks = []
             
             for group in RSS_GROUPS:
@@ -1154,6 +822,7 @@ async def run_main_logic():
 
 async def cleanup_resources(db, lock_file):
     """清理资源"""
+    await tg_delivery.close_bots()
     try:
         if db:
             await db.close()
@@ -1170,6 +839,7 @@ async def cleanup_resources(db, lock_file):
         logger.error(f"释放文件锁失败: {e}")
 
 if __name__ == "__main__":
+    setup_logging()
     for s in (signal.SIGINT, signal.SIGTERM):
         signal.signal(s, signal_handler)
     try:
@@ -0,0 +1,274 @@
+# tencent_tmt.py
+"""腾讯云机器翻译（TMT）客户端池（rss.py / sql_rss.py / sql_rss2.py / mail.py 共用）
+
+每组密钥（主密钥 TENCENTCLOUD_* 和备用密钥 TENCENT_*）只创建一个 TmtClient，开启 keep-alive，
+避免每条文本都重新建立 TLS 连接；同步接口放到有界线程池里执行。
+
+每组密钥一个令牌桶，请求前预约令牌，超过 TMT_QPS 的请求在线程内等待；
+接口仍返回 LimitExceeded.LimitedAccessFrequency 时整个桶暂停一段时间（指数退避）后重新排队。
+
+TranslatorChain 按顺序使用多组密钥（主密钥、备用密钥），每组一个熔断器：
+- closed：正常请求；连续 threshold 次临时故障（网络、InternalError、限频）后 open
+- open：冷却期内直接跳过，请求交给下一组密钥；额度用尽、鉴权失败等密钥级错误立即 open，冷却更久
+- half_open：冷却期过后放行一个试探请求，成功恢复 closed，失败重新 open 且冷却时间加倍
+语言识别失败、参数错误等与密钥无关的错误不计入熔断。熔断状态可导出后由调用方持久化。
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tencentcloud.common import credential
+from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
+from tencentcloud.common.profile.client_profile import ClientProfile
+from tencentcloud.common.profile.http_profile import HttpProfile
+from tencentcloud.tmt.v20180321 import tmt_client, models
+
+logger = logging.getLogger(__name__)
+
+# 接口地址（可指向本地模拟服务测试）；线程数即同时在途的请求数
+TENCENT_TMT_ENDPOINT = os.getenv("TENCENT_TMT_ENDPOINT", "tmt.tencentcloudapi.com")
+TENCENT_TMT_PROTOCOL = os.getenv("TENCENT_TMT_PROTOCOL", "https")
+TMT_MAX_WORKERS = int(os.getenv("TMT_MAX_WORKERS", "5"))
+TMT_TIMEOUT = int(os.getenv("TMT_TIMEOUT", "30"))
+# 每组密钥每秒请求数（TMT 默认 5），被限频时最多重新排队的次数
+TMT_QPS = float(os.getenv("TMT_QPS", "5"))
+TMT_RATE_RETRIES = int(os.getenv("TMT_RATE_RETRIES", "3"))
+RATE_LIMIT_CODE = "LimitExceeded.LimitedAccessFrequency"
+# 熔断：连续临时故障次数、临时故障冷却秒数（half_open 失败后加倍，不超过上限）、密钥级错误冷却秒数
+BREAKER_THRESHOLD = int(os.getenv("TMT_BREAKER_THRESHOLD", "3"))
+BREAKER_COOLDOWN = float(os.getenv("TMT_BREAKER_COOLDOWN", "300"))
+BREAKER_MAX_COOLDOWN = float(os.getenv("TMT_BREAKER_MAX_COOLDOWN", "3600"))
+BREAKER_CREDENTIAL_COOLDOWN = float(os.getenv("TMT_BREAKER_CREDENTIAL_COOLDOWN", "3600"))
+# 错误码前缀分类：密钥本身不可用 / 与密钥无关（文本问题）；其余视为临时故障
+CREDENTIAL_ERRORS = (
+    "AuthFailure", "UnauthorizedOperation", "ResourceUnavailable",
+    "FailedOperation.NoFreeAmount", "FailedOperation.ServiceIsolate",
+    "FailedOperation.StopUsing", "FailedOperation.UserNotRegistered",
+)
+CONTENT_ERRORS = (
+    "FailedOperation.LanguageRecognitionErr", "InvalidParameter", "MissingParameter", "UnsupportedOperation",
+)
+
+_translators = {}
+_lock = threading.Lock()
+_executor = None
+
+
+def tmt_executor():
+    """翻译请求共用的有界线程池"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=TMT_MAX_WORKERS, thread_name_prefix="tmt")
+        return _executor
+
+
+def get_translator(secret_id, secret_key, region):
+    """按密钥和地域复用 TmtTranslator"""
+    key = (secret_id, secret_key, region)
+    with _lock:
+        translator = _translators.get(key)
+        if translator is None:
+            translator = _translators[key] = TmtTranslator(secret_id, secret_key, region)
+        return translator
+
+
+class TokenBucket:
+    """线程安全的令牌桶（GCRA）：reserve() 预约一个令牌，返回需要等待的秒数"""
+
+    def __init__(self, rate, burst=None):
+        self.interval = 1 / rate
+        self.tolerance = (max(1, burst or int(rate)) - 1) * self.interval
+        self._tat = 0.0  # 理论上下一个令牌的可用时间
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._tat - self.tolerance)
+            self._tat = max(self._tat, now) + self.interval
+            return start - now
+
+    def pause(self, seconds):
+        """被限频后 seconds 秒内不再放行"""
+        with self._lock:
+            self._tat = max(self._tat, time.monotonic() + seconds + self.tolerance)
+
+
+class TmtTranslator:
+    """单组密钥的常驻 TmtClient；同步方法可直接调用，异步方法在 tmt_executor() 中执行"""
+
+    def __init__(self, secret_id, secret_key, region):
+        http_profile = HttpProfile(
+            protocol=TENCENT_TMT_PROTOCOL, endpoint=TENCENT_TMT_ENDPOINT, reqTimeout=TMT_TIMEOUT, keepAlive=True
+        )
+        client_profile = ClientProfile(httpProfile=http_profile)
+        client_profile.signMethod = "TC3-HMAC-SHA256"
+        self.client = tmt_client.TmtClient(credential.Credential(secret_id, secret_key), region, client_profile)
+        self.bucket = TokenBucket(TMT_QPS)
+        self.rate_limited = 0
+
+    def _call(self, method, req):
+        """按令牌桶限速调用；被限频时退避后重新排队"""
+        for attempt in range(TMT_RATE_RETRIES + 1):
+            time.sleep(self.bucket.reserve())
+            try:
+                return method(req)
+            except TencentCloudSDKException as e:
+                if getattr(e, "code", "") != RATE_LIMIT_CODE or attempt == TMT_RATE_RETRIES:
+                    raise
+                self.rate_limited += 1
+                delay = min(2 ** attempt, 8) * (0.5 + random.random() / 2)
+                logger.warning(f"翻译接口限频，{delay:.1f}秒后重试（第 {attempt + 1} 次）")
+                self.bucket.pause(delay)
+
+    def translate(self, text, source="auto", target="zh"):
+        req = models.TextTranslateRequest()
+        req.SourceText = text
+        req.Source = source
+        req.Target = target
+        req.ProjectId = 0
+        return self._call(self.client.TextTranslate, req).TargetText
+
+    def translate_batch(self, texts, source="auto", target="zh"):
+        """TextTranslateBatch：一次请求翻译多条，返回与 texts 等长的译文列表"""
+        req = models.TextTranslateBatchRequest()
+        req.SourceTextList = texts
+        req.Source = source
+        req.Target = target
+        req.ProjectId = 0
+        return self._call(self.client.TextTranslateBatch, req).TargetTextList
+
+    async def run(self, func, *args):
+        """在翻译线程池中执行同步调用"""
+        return await asyncio.get_running_loop().run_in_executor(tmt_executor(), func, *args)
+
+    def warmup(self):
+        """预热：发一个极短的请求建立 keep-alive 连接（真实计费请求，经令牌桶限速）"""
+        return self.translate("hi", "en", "zh")
+
+
+def classify_error(error):
+    """按 TMT 错误码分类：credential / content / transient"""
+    code = getattr(error, "code", "") if isinstance(error, TencentCloudSDKException) else ""
+    if code and code.startswith(CREDENTIAL_ERRORS):
+        return "credential"
+    if code and code.startswith(CONTENT_ERRORS):
+        return "content"
+    return "transient"
+
+
+class TranslationUnavailable(Exception):
+    """所有密钥都处于熔断状态"""
+
+
+class CircuitBreaker:
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.open_until = 0.0
+        self.cooldown = cooldown
+        self._probing = False
+
+    def load(self, st):
+        self.state = st["state"]
+        self.failures = st["failures"]
+        self.open_until = st["open_until"]
+        self.cooldown = st["cooldown"]
+
+    def dump(self):
+        return {"state": self.state, "failures": self.failures, "open_until": self.open_until, "cooldown": self.cooldown}
+
+    def allow(self):
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.time() < self.open_until:
+                return False
+            self.state = "half_open"
+            self._probing = False
+            logger.info(f"翻译密钥 [{self.name}] 冷却结束，试探恢复")
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.warning(f"翻译密钥 [{self.name}] 已恢复")
+        self.state = "closed"
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        self._probing = False
+
+    def record_failure(self, kind):
+        if kind == "content":
+            # 文本本身的问题，密钥是好的
+            self.record_success()
+            return
+        self.failures += 1
+        if kind == "credential":
+            self._trip(max(BREAKER_CREDENTIAL_COOLDOWN, self.cooldown))
+        elif self.state == "half_open":
+            self.cooldown = min(self.cooldown * 2, BREAKER_MAX_COOLDOWN)
+            self._trip(self.cooldown)
+        elif self.failures >= self.threshold:
+            self._trip(self.cooldown)
+
+    def _trip(self, seconds):
+        self.state = "open"
+        self.open_until = time.time() + seconds
+        self._probing = False
+        logger.warning(f"翻译密钥 [{self.name}] 熔断 {seconds:.0f} 秒（连续失败 {self.failures} 次）")
+
+
+class TranslatorChain:
+    """按顺序尝试各组密钥，跳过熔断中的；credentials 为 [(名称, secret_id, secret_key)]，未配置的忽略"""
+
+    def __init__(self, credentials):
+        self.credentials = [(name, sid, skey) for name, sid, skey in credentials if sid and skey]
+        self.breakers = {name: CircuitBreaker(name) for name, _, _ in self.credentials}
+
+    def load(self, states):
+        for name, st in states.items():
+            if name in self.breakers:
+                self.breakers[name].load(st)
+
+    def states(self):
+        return {name: breaker.dump() for name, breaker in self.breakers.items()}
+
+    def summary(self):
+        return ", ".join(f"{name}={breaker.state}" for name, breaker in self.breakers.items()) or "未配置密钥"
+
+    async def call(self, func, *args):
+        """在翻译线程池中执行 func(secret_id, secret_key, *args)
+
+        与密钥无关的错误直接抛出；其它错误换下一组密钥，全部失败时抛出最后一个错误，
+        全部熔断时抛出 TranslationUnavailable。
+        """
+        loop = asyncio.get_running_loop()
+        last_error = None
+        for name, secret_id, secret_key in self.credentials:
+            breaker = self.breakers[name]
+            if not breaker.allow():
+                continue
+            try:
+                result = await loop.run_in_executor(tmt_executor(), func, secret_id, secret_key, *args)
+            except Exception as e:
+                kind = classify_error(e)
+                breaker.record_failure(kind)
+                if kind == "content":
+                    raise
+                last_error = e
+                continue
+            breaker.record_success()
+            return result
+        if last_error is not None:
+            raise last_error
+        raise TranslationUnavailable(self.summary())
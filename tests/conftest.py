@@ -0,0 +1,53 @@
+# tests/conftest.py
+"""测试公共设置：脚本在导入时读取环境变量，这里先给出默认值并把仓库根目录加入 sys.path"""
+import os
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("TELEGRAM_CHAT_ID", "1,2")
+os.environ.setdefault("RSS_STORAGE", "memory")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeBot:
+    """代替 telegram.Bot：记录发送的消息，不访问网络"""
+
+    def __init__(self, token="1:test", request=None):
+        self.token = token
+        self.sent = []
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def fake_bots(monkeypatch):
+    """tg_delivery.get_bot 返回 FakeBot；返回 {token: FakeBot}"""
+    import tg_delivery
+
+    bots = {}
+
+    def make_bot(token, request=None):
+        return bots.setdefault(token, FakeBot(token))
+
+    monkeypatch.setattr(tg_delivery, "Bot", make_bot)
+    monkeypatch.setattr(tg_delivery, "_bots", {})
+    monkeypatch.setattr(tg_delivery, "_schedulers", {})
+    return bots
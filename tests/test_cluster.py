@@ -0,0 +1,74 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+import rss
+from conftest import free_port
+from rss_storage import SQLiteStorage
+
+ITEM = "<item><title>{}</title><link>{}</link><guid>{}</guid></item>"
+FEEDS = {
+    "a": ("BBC", [
+        ("Israel and Hamas agree to ceasefire deal in Gaza", "http://bbc/1"),
+        ("Shared wire story about the European Central Bank rate decision", "http://wire/1"),
+    ]),
+    "b": ("NHK", [
+        ("Israel, Hamas agree ceasefire deal for Gaza", "http://nhk/1"),
+        # 与 a 源完全相同的条目（同一通讯社稿件出现在两个订阅源）
+        ("Shared wire story about the European Central Bank rate decision", "http://wire/1"),
+    ]),
+}
+
+
+def feed_body(name):
+    title, items = FEEDS[name]
+    xml = "".join(ITEM.format(t, link, link) for t, link in items)
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{title}</title>{xml}</channel></rss>'
+
+
+def test_same_entry_in_two_feeds_is_sent_once(tmp_path, monkeypatch, fake_bots):
+    port = free_port()
+    group = {
+        "name": "聚合", "group_key": "CLUSTER_TEST", "interval": 600, "bot_token": "1:test",
+        "cluster_window": 3600,
+        "urls": [f"http://127.0.0.1:{port}/feed?n={n}" for n in FEEDS],
+        "processor": {"translate": False, "template": "*{subject}*\n[more]({url})"},
+    }
+    monkeypatch.setattr(rss, "RSS_GROUPS", [group])
+    monkeypatch.setattr(rss, "TELEGRAM_CHAT_ID", ["1", "2"])
+
+    async def handler(request):
+        return web.Response(body=feed_body(request.query["n"]).encode(), content_type="application/rss+xml")
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/feed", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        db = SQLiteStorage(tmp_path / "rss.db")
+        await db.open()
+        await db.ensure_initialized()
+        try:
+            async with aiohttp.ClientSession() as session:
+                for _ in range(2):  # 第二轮不应再发送任何内容
+                    await rss.process_group(session, group, rss.EntryStatus(db), db, check_interval=False)
+            rows = await db.conn.execute_fetchall(
+                "SELECT feed_url, entry_content_hash FROM rss_status WHERE feed_group = 'CLUSTER_TEST'"
+            )
+        finally:
+            await db.close()
+            await runner.cleanup()
+        return rows
+
+    rows = asyncio.run(main())
+    sent = fake_bots["1:test"].sent
+    for chat_id in ("1", "2"):
+        text = "\n".join(t for c, t in sent if c == chat_id)
+        assert text.count("European Central Bank") == 1
+        assert text.count("ceasefire") == 1
+        assert "http://nhk/1" in text  # 改写的报道作为其它来源链接附在代表条目上
+    # 两个订阅源的 4 个条目：共享条目只在选中它的订阅源记录一次，内容哈希不重复
+    assert len(rows) == 3
+    assert len({content_hash for _, content_hash in rows}) == 3
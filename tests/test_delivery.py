@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from telegram.error import Forbidden, NetworkError, TimedOut
+
+import tg_delivery
+from conftest import FakeBot
+from rss_storage import MemoryStorage
+from tg_delivery import DeliveryScheduler
+
+
+class FlakyBot(FakeBot):
+    """前几次发送抛出给定的错误"""
+
+    def __init__(self, errors):
+        super().__init__()
+        self.errors = list(errors)
+        self.attempts = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        await super().send_message(chat_id, text, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def no_wait(monkeypatch):
+    async def wait(self, seconds):
+        pass
+
+    monkeypatch.setattr(DeliveryScheduler, "_wait", wait)
+
+
+def test_network_error_is_retried():
+    bot = FlakyBot([NetworkError("reset")])
+    scheduler = DeliveryScheduler()
+    asyncio.run(scheduler.send(bot, "1", "hello"))
+    assert bot.attempts == 2
+    assert bot.sent == [("1", "hello")]
+    assert (scheduler.sent, scheduler.retried, scheduler.failed) == (1, 1, 0)
+
+
+def test_timed_out_is_not_resent(monkeypatch):
+    # 超时的请求可能已经送达，重发会重复：按已发送处理
+    monkeypatch.setattr(tg_delivery, "TG_SEND_RETRIES", 5)
+    bot = FlakyBot([TimedOut()])
+    scheduler = DeliveryScheduler()
+    assert asyncio.run(scheduler.send(bot, "1", "hello")) is None
+    assert bot.attempts == 1
+    assert (scheduler.sent, scheduler.retried, scheduler.failed, scheduler.timed_out) == (0, 0, 0, 1)
+
+
+BATCH_GROUP = {
+    "name": "测试", "group_key": "BATCH_TEST", "bot_token": "1:test", "batch_send_interval": 60,
+    "processor": {"translate": False, "template": "*{subject}*\n[more]({url})"},
+}
+
+
+async def pending_storage():
+    db = MemoryStorage()
+    for n in range(2):
+        await db.add_pending_message("BATCH_TEST", "u", f"e{n}", f"h{n}", f"title {n}", "", f"http://x/{n}", "", n, "F")
+    await db.flush()
+    return db
+
+
+@pytest.mark.parametrize("script", ["sql_rss", "sql_rss2"])
+def test_batch_send_reaches_every_chat(monkeypatch, fake_bots, script):
+    module = __import__(script)
+    monkeypatch.setattr(module, "TELEGRAM_CHAT_ID", ["1", "2"])
+    bot = fake_bots["1:test"] = FlakyBot([Forbidden("blocked")])
+    group = BATCH_GROUP
+
+    async def main():
+        db = await pending_storage()
+        # 第一次：聊天 1 被拒，条目留在队列；第二次只补发给聊天 1
+        await module.process_batch_send(group, db)
+        assert len(await db.get_pending_messages("BATCH_TEST")) == 2
+        await db.save_last_batch_sent_time("BATCH_TEST", 0)
+        await module.process_batch_send(group, db)
+        assert await db.get_pending_messages("BATCH_TEST") == []
+
+    asyncio.run(main())
+    assert sorted(chat_id for chat_id, _ in bot.sent) == ["1", "2"]
+
+
+@pytest.mark.parametrize("script", ["sql_rss", "sql_rss2"])
+def test_batch_send_does_not_repeat_after_timeout(monkeypatch, fake_bots, script):
+    module = __import__(script)
+    monkeypatch.setattr(module, "TELEGRAM_CHAT_ID", ["1", "2"])
+    bot = fake_bots["1:test"] = FlakyBot([TimedOut()])
+
+    async def main():
+        db = await pending_storage()
+        # 聊天 1 超时、可能已送达：按已发送处理，条目出队，下次不再补发
+        await module.process_batch_send(BATCH_GROUP, db)
+        assert await db.get_pending_messages("BATCH_TEST") == []
+        await db.save_last_batch_sent_time("BATCH_TEST", 0)
+        await module.process_batch_send(BATCH_GROUP, db)
+
+    asyncio.run(main())
+    assert bot.attempts == 2
+    assert [chat_id for chat_id, _ in bot.sent] == ["2"]
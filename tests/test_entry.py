@@ -0,0 +1,36 @@
+import asyncio
+
+import rss
+from rss import NormalizedEntry, remove_html_tags
+
+
+def pending_row(title, translated_title):
+    return {
+        "entry_id": "e1", "content_hash": "h1", "entry_timestamp": 1.0, "title": title,
+        "link": "http://example.com/1", "summary": "", "translated_title": translated_title,
+    }
+
+
+def test_pending_translated_title_is_sanitized():
+    raw = "<b>美联储</b>维持利率不变 #财经# @reuters"
+    entry = NormalizedEntry.from_pending_row(pending_row("Fed holds rates", raw))
+    assert entry.translated_title == remove_html_tags(raw) == "美联储维持利率不变 财经"
+
+    # 译文清理后为空时退回原标题
+    entry = NormalizedEntry.from_pending_row(pending_row("Fed holds rates", "<br>"))
+    assert entry.translated_title is None
+
+
+def test_batch_render_matches_previous_output():
+    """批量推送渲染结果与改为 NormalizedEntry 之前一致：标题取 remove_html_tags(译文 or 原文)"""
+    processor = {"translate": False, "template": "*{subject}*\n[more]({url})"}
+
+    class Feed:
+        feed = {"title": "Reuters"}
+
+    rows = [pending_row("Fed <i>holds</i> rates", "美联储<br>维持利率 @x"), pending_row("Plain <b>title</b>", "")]
+    message = asyncio.run(rss.generate_group_message(
+        Feed, [NormalizedEntry.from_pending_row(row) for row in rows], processor
+    ))
+    assert "美联储维持利率" in message and "@x" not in message and "<br>" not in message
+    assert "Plain title" in message
@@ -0,0 +1,94 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+import rss
+from conftest import free_port
+from rss import HostLimiter, MirrorHealth
+from rss_storage import SQLiteStorage
+
+
+def test_cancelled_waiter_passes_its_slot_on():
+    async def main():
+        limiter = HostLimiter(10, initial=1, max_limit=1)
+        state = limiter._state("h")
+        state["in_flight"] = 1  # 名额已被占用
+        entered = []
+
+        async def fetch(name):
+            async with limiter.slot("h"):
+                entered.append(name)
+
+        a = asyncio.create_task(fetch("a"))
+        b = asyncio.create_task(fetch("b"))
+        await asyncio.sleep(0)
+        # 名额释放并分给 a，但 a 恢复前被取消（对冲落败）：b 不能一直等下去
+        state["in_flight"] = 0
+        limiter._wake(state)
+        a.cancel()
+        await asyncio.wait_for(b, 1)
+        assert entered == ["b"]
+        assert a.cancelled()
+        assert state["in_flight"] == 0 and not state["waiters"]
+
+    asyncio.run(main())
+
+
+def test_hedge_delay_uses_recent_latencies_only():
+    health = MirrorHealth(hedge_percentile=0.5, hedge_min=0.1, hedge_max=10.0, hedge_samples=10)
+    for _ in range(1000):
+        health.record("old.example", True, 8.0)
+    for _ in range(10):
+        health.record("new.example", True, 0.5)
+    assert len(health.latencies) == 10
+    assert health.hedge_delay() == 0.5
+
+
+def test_failed_fetch_does_not_stretch_poll_interval(tmp_path, monkeypatch, fake_bots):
+    port = free_port()
+    feed = f"http://127.0.0.1:{port}/feed"
+    group = {
+        "name": "自适应", "group_key": "ADAPTIVE_TEST", "interval": 600, "min_interval": 300, "max_interval": 86400,
+        "bot_token": "1:test", "urls": [feed],
+        "processor": {"translate": False, "template": "*{subject}*\n[more]({url})"},
+    }
+    monkeypatch.setattr(rss, "RSS_GROUPS", [group])
+    status = {"code": 200}
+
+    async def handler(request):
+        if status["code"] != 200:
+            return web.Response(status=status["code"])
+        body = '<?xml version="1.0"?><rss version="2.0"><channel><title>T</title></channel></rss>'
+        return web.Response(body=body.encode(), content_type="application/rss+xml")
+
+    async def poll(db, session):
+        await rss.process_group(session, group, rss.EntryStatus(db), db, check_interval=False)
+        schedule = (await db.load_feed_schedules("ADAPTIVE_TEST"))[("ADAPTIVE_TEST", feed)]
+        await db.save_feed_schedule("ADAPTIVE_TEST", feed, {**schedule, "next_poll": 0})  # 下次立即到期
+        return schedule
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/feed", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        db = SQLiteStorage(tmp_path / "rss.db")
+        await db.open()
+        await db.ensure_initialized()
+        try:
+            async with aiohttp.ClientSession() as session:
+                first = await poll(db, session)
+                # 源不可用或被限频：不算“没有新条目”，间隔和次数都不变
+                for code in (503, 429, 500):
+                    status["code"] = code
+                    assert await poll(db, session) == {**first, "next_poll": 0}
+                # 正常返回但没有新条目：间隔拉长
+                status["code"] = 200
+                assert (await poll(db, session))["poll_interval"] > first["poll_interval"]
+        finally:
+            await db.close()
+            await runner.cleanup()
+
+    asyncio.run(main())
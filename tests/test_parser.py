@@ -0,0 +1,47 @@
+import feedparser
+import pytest
+
+import rss
+from rss_parser import FastFeedParser
+
+RSS = """<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel><title>T</title>
+<item><title>  Tom &amp; Jerry &lt;b&gt;bold&lt;/b&gt; </title><link>http://x/1</link><guid>g1</guid>
+<description><![CDATA[<p onclick="x()">Hello <script>evil()</script><b>world</b> &amp; <a href="/rel">more</a></p>]]></description>
+<pubDate>Mon, 06 Jan 2025 10:00:00 GMT</pubDate></item>
+<item><title><![CDATA[CDATA <i>title</i> &amp; co]]></title><link>http://x/2</link>
+<description>plain &lt;br/&gt; text &lt;img src=x onerror=y&gt;</description><dc:date>2025-01-06T10:00:00Z</dc:date></item>
+<item><title>No summary</title><link>http://x/3</link><content:encoded><![CDATA[<p>full body</p>]]></content:encoded></item>
+<item><title>Entity &#8220;quotes&#8221; caf&#233; &lt;img src=x onerror=y&gt;</title><link>http://x/4</link>
+<description>a  b
+ c</description></item>
+</channel></rss>"""
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/"><title>A</title>
+<entry><id>a1</id><title type="html">A &amp;amp; B &lt;em&gt;x&lt;/em&gt;</title><link href="http://a/1"/>
+<summary type="html">&lt;p&gt;sum &lt;script&gt;x&lt;/script&gt;&lt;/p&gt;</summary>
+<published>2025-01-06T10:00:00Z</published><updated>2025-01-07T10:00:00Z</updated></entry>
+<entry><id>a2</id><title>Plain &lt;b&gt;text&lt;/b&gt;</title><link href="http://a/2"/>
+<content type="html">&lt;p&gt;content only&lt;/p&gt;</content><updated>2025-01-07T10:00:00Z</updated></entry>
+<entry><id>a3</id><title>XHTML</title><link href="http://a/3"/>
+<summary type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>x <b>y</b></p> tail</div></summary></entry>
+<entry><id>yt</id><title>Video</title><link rel="alternate" href="http://a/4"/>
+<media:group><media:title>Video</media:title><media:description>desc &amp; line
+two</media:description></media:group><published>2025-01-06T10:00:00+00:00</published></entry>
+</feed>"""
+
+
+@pytest.mark.parametrize("document", [RSS, ATOM], ids=["rss", "atom"])
+def test_fast_parser_hashes_match_feedparser(document):
+    # 开启 fast_parser 或解析失败回退 feedparser 时，同一条目的内容哈希不能变
+    expected = feedparser.parse(document).entries
+    parser = FastFeedParser()
+    parser.feed(document.encode())
+    parser.close()
+    entries = parser.result().entries
+    assert not parser.failed and len(entries) == len(expected)
+    for fast, slow in zip(entries, expected):
+        assert rss.get_entry_content_hash(fast) == rss.get_entry_content_hash(slow)
+        assert rss.get_entry_identifier(fast) == rss.get_entry_identifier(slow)
@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+import pytest
+
+import rss_storage
+from rss_dedup import hash_bytes
+from rss_storage import MemoryStorage, SQLiteStorage
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def open_sqlite(tmp_path):
+    db = SQLiteStorage(tmp_path / "rss.db")
+    await db.open()
+    await db.ensure_initialized()
+    return db
+
+
+def test_flush_drops_only_failing_rows(tmp_path):
+    async def main():
+        db = await open_sqlite(tmp_path)
+        try:
+            await db.save_status("G", "u", "e1", "h1", 1.0)
+            await db.save_status("G", "u", "e2", "h2", 1.0)
+            # 无法绑定的参数：整批失败，逐行重试后只丢弃这一行
+            await db.add_pending_message("G", "u", "e3", "h3", object(), "t", "l", "s", 1.0, "f")
+            await db.add_pending_message("G", "u", "e4", "h4", "title", "t", "l", "s", 1.0, "f")
+            await db.flush()
+            assert not any(db._writes.values())
+            assert sorted(await db.load_entry_ids("u")) == sorted([hash_bytes("e1"), hash_bytes("e2")])
+            assert [row["entry_id"] for row in await db.get_pending_messages("G")] == ["e4"]
+            await db.flush()  # 坏数据不会留在缓冲里让之后的 flush 继续失败
+        finally:
+            await db.close()
+
+    run(main())
+
+
+def test_flush_keeps_buffer_while_storage_unavailable(monkeypatch):
+    class BrokenStorage(MemoryStorage):
+        broken = True
+
+        async def _write_batch(self, **rows):
+            if self.broken:
+                raise ConnectionError("down")
+            await super()._write_batch(**rows)
+
+    monkeypatch.setattr(rss_storage, "STORAGE_FLUSH_RETRIES", 2)
+
+    async def main():
+        db = BrokenStorage()
+        await db.save_status("G", "u", "e1", "h1", 1.0)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await db.flush()
+            assert db._writes["status"]
+        db.broken = False
+        await db.flush()
+        assert await db.load_entry_ids("u") == [hash_bytes("e1")]
+
+        db.broken = True
+        await db.save_status("G", "u", "e2", "h2", 1.0)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await db.flush()
+        await db.flush()  # 超过重试次数后丢弃
+        assert not any(db._writes.values())
+
+    run(main())
+
+
+def test_concurrent_writes_share_one_connection(tmp_path):
+    async def main():
+        db = await open_sqlite(tmp_path)
+        try:
+            async def writer(n):
+                for i in range(20):
+                    await db.add_pending_message("G", "u", f"e{n}-{i}", f"h{n}-{i}", "t", "t", "l", "s", i, "f")
+                    await db.save_status("G", "u", f"e{n}-{i}", f"h{n}-{i}", i)
+                    await db.flush()
+                    await db.mark_pending_as_sent("G", [f"e{n}-{i}"])
+                    await db.save_last_batch_sent_time("G", i)
+
+            await asyncio.gather(*(writer(n) for n in range(5)))
+            assert len(await db.load_entry_ids("u")) == 100
+            assert await db.get_pending_messages("G") == []
+        finally:
+            await db.close()
+
+    run(main())
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "memory"])
+def test_cleanup_prunes_stories_by_cluster_window(tmp_path, backend):
+    async def main():
+        db = await open_sqlite(tmp_path) if backend == "sqlite" else MemoryStorage()
+        try:
+            now = time.time()
+            old, recent = now - 2 * 86400, now - 3600
+            await db.save_status("G", "u", "e-old", "h-old", old)
+            await db.save_story("G", "e-old", b"sig", "u", "src", "l-old", old)
+            await db.save_story("G", "e-new", b"sig", "u", "src", "l-new", recent)
+            await db.add_story_alternate("G", "e-old", "src2", "l2-old", old)
+            await db.add_story_alternate("G", "e-new", "src2", "l2-new", recent)
+            await db.flush()
+
+            # history_days=180 保留状态，报道签名按 12 小时聚合窗口清理
+            await db.cleanup_history(180, "G", 43200)
+            assert await db.load_entry_ids("u") == [hash_bytes("e-old")]
+            assert [row[0] for row in await db.load_stories("G", 0)] == ["e-new"]
+            assert await db.load_story_alternates("G", ["e-old", "e-new"]) == {"e-new": [("src2", "l2-new")]}
+        finally:
+            await db.close()
+
+    run(main())
@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+
+import rss
+import tencent_tmt
+from conftest import free_port
+from tencent_tmt import TranslationUnavailable, TranslatorChain, classify_error
+
+
+class TmtStandIn:
+    """本地 TMT 模拟服务：按 X-TC-Action 应答，errors[secret_id] 为该密钥要返回的错误码"""
+
+    def __init__(self):
+        self.calls = []
+        self.errors = {}
+
+    async def handle(self, request):
+        action = request.headers["X-TC-Action"]
+        secret_id = request.headers["Authorization"].split("Credential=")[1].split("/")[0]
+        body = json.loads(await request.read())
+        self.calls.append((secret_id, action, body))
+        code = self.errors.get(secret_id)
+        if code:
+            result = {"Error": {"Code": code, "Message": code}}
+        elif action == "TextTranslateBatch":
+            result = {"TargetTextList": [f"译:{text}" for text in body["SourceTextList"]]}
+        else:
+            result = {"TargetText": f"译:{body['SourceText']}"}
+        result["RequestId"] = f"req-{len(self.calls)}"
+        # SDK 只在 Content-Type 恰为 application/json 时解析错误码（与真实接口一致，不带 charset）
+        return web.Response(body=json.dumps({"Response": result}).encode(), headers={"Content-Type": "application/json"})
+
+
+@pytest.fixture
+def tmt(monkeypatch):
+    """启动模拟服务，TENCENT_TMT_ENDPOINT 指向它；rss 使用主/备两组密钥"""
+    port = free_port()
+    monkeypatch.setattr(tencent_tmt, "TENCENT_TMT_ENDPOINT", f"127.0.0.1:{port}")
+    monkeypatch.setattr(tencent_tmt, "TENCENT_TMT_PROTOCOL", "http")
+    monkeypatch.setattr(tencent_tmt, "_translators", {})
+    monkeypatch.setattr(rss, "translation_cache", None)
+    monkeypatch.setattr(rss, "translator_chain", TranslatorChain([("primary", "p", "pk"), ("backup", "b", "bk")]))
+    server = TmtStandIn()
+
+    async def serve(main):
+        app = web.Application()
+        app.router.add_post("/", server.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        try:
+            return await main()
+        finally:
+            await runner.cleanup()
+
+    server.run = lambda main: asyncio.run(serve(main))
+    return server
+
+
+def test_translate_titles_uses_batch_requests(tmt, monkeypatch):
+    monkeypatch.setattr(rss, "TRANSLATE_BATCH_SIZE", 3)
+    titles = [f"Headline number {n}" for n in range(7)] + ["Headline number 0"]
+
+    results = tmt.run(lambda: rss.translate_titles(titles))
+
+    assert results == [f"译:Headline number {n}" for n in range(7)] + ["译:Headline number 0"]
+    # 7 条不重复的标题按每包 3 条分成 3 个批量请求，全部由主密钥完成
+    assert [(secret_id, action) for secret_id, action, _ in tmt.calls] == [("p", "TextTranslateBatch")] * 3
+    assert sorted(len(body["SourceTextList"]) for _, _, body in tmt.calls) == [1, 3, 3]
+
+
+@pytest.mark.parametrize("code,kind", [
+    ("AuthFailure.SignatureFailure", "credential"),
+    ("FailedOperation.NoFreeAmount", "credential"),
+    ("FailedOperation.LanguageRecognitionErr", "content"),
+    ("InvalidParameter", "content"),
+    ("InternalError", "transient"),
+])
+def test_classify_sdk_errors(tmt, code, kind):
+    tmt.errors["p"] = code
+
+    async def main():
+        translator = tencent_tmt.get_translator("p", "pk", "ap-guangzhou")
+        with pytest.raises(tencent_tmt.TencentCloudSDKException) as raised:
+            await translator.run(translator.translate, "hello")
+        return raised.value
+
+    error = tmt.run(main)
+    assert error.code == code
+    assert classify_error(error) == kind
+
+
+def test_breaker_trips_and_falls_back(tmt):
+    chain = rss.translator_chain
+
+    async def main():
+        # 密钥级错误：主密钥立即熔断，本次及之后都由备用密钥翻译
+        tmt.errors["p"] = "FailedOperation.NoFreeAmount"
+        assert await rss.translate_titles(["Hello world"]) == ["译:Hello world"]
+        assert chain.breakers["primary"].state == "open"
+        assert await rss.translate_titles(["Good morning"]) == ["译:Good morning"]
+        assert [secret_id for secret_id, _, _ in tmt.calls] == ["p", "b", "b"]
+
+        # 临时故障：连续 BREAKER_THRESHOLD 次后备用密钥也熔断
+        tmt.errors["b"] = "InternalError"
+        for _ in range(tencent_tmt.BREAKER_THRESHOLD):
+            assert chain.breakers["backup"].state == "closed"
+            with pytest.raises(tencent_tmt.TencentCloudSDKException):
+                await chain.call(rss._sync_translate_batch, ["Good night"])
+        assert chain.breakers["backup"].state == "open"
+
+        # 全部熔断：不再发请求
+        calls = len(tmt.calls)
+        with pytest.raises(TranslationUnavailable):
+            await chain.call(rss._sync_translate_batch, ["Good night"])
+        assert len(tmt.calls) == calls
+
+    tmt.run(main)
+
+
+def test_warmup_skips_tripped_credentials(tmt, monkeypatch):
+    monkeypatch.setattr(rss, "RSS_GROUPS", [{"processor": {"translate": True}}])
+    chain = rss.translator_chain
+
+    async def main():
+        chain.breakers["primary"].record_failure("credential")
+        await rss.warmup_translator()
+        assert [(secret_id, action) for secret_id, action, _ in tmt.calls] == [("b", "TextTranslate")]
+        # 全部熔断时不发预热请求
+        chain.breakers["backup"].record_failure("credential")
+        await rss.warmup_translator()
+        assert len(tmt.calls) == 1
+
+    tmt.run(main)
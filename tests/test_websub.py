@@ -0,0 +1,119 @@
+import asyncio
+import hmac
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import rss
+from conftest import free_port
+from rss_storage import MemoryStorage
+from rss_websub import WebSubManager, parse_lease_seconds
+
+FEED = """<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>T</title>{}</feed>"""
+
+
+def entry(n):
+    return f"<entry><id>e{n}</id><title>title {n}</title><link href='http://example.com/{n}'/></entry>"
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("3600", 3600), (None, 100), ("", 100), ("abc", 100), ("1.5", 100),
+    ("0", 100), ("-5", 100), (str(10 ** 12), 100),
+])
+def test_parse_lease_seconds(value, expected):
+    assert parse_lease_seconds(value, 100) == expected
+
+
+async def start_hub(lease_seconds):
+    """本地 hub：收到订阅请求后回调校验，返回 (runner, hub_url, 请求记录)"""
+    requests = {}
+
+    async def hub(request):
+        form = await request.post()
+        requests.update(form)
+
+        async def verify():
+            params = {
+                "hub.mode": "subscribe",
+                "hub.topic": form["hub.topic"],
+                "hub.challenge": "challenge-1",
+            }
+            if lease_seconds is not None:
+                params["hub.lease_seconds"] = lease_seconds
+            async with aiohttp.ClientSession() as session:
+                async with session.get(form["hub.callback"], params=params) as response:
+                    requests["echo"] = await response.text()
+
+        asyncio.create_task(verify())
+        return web.Response(status=202)
+
+    app = web.Application()
+    app.router.add_post("/hub", hub)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    port = free_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner, f"http://127.0.0.1:{port}/hub", requests
+
+
+async def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "超时"
+        await asyncio.sleep(0.02)
+
+
+@pytest.mark.parametrize("hub_lease,expected_lease", [("600", 600), ("not-a-number", 864000), (None, 864000)])
+def test_subscribe_verify_notify(monkeypatch, fake_bots, hub_lease, expected_lease):
+    topic = "http://127.0.0.1:1/feed"
+    group = {
+        "name": "测试", "group_key": "WEBSUB_TEST", "interval": 600, "bot_token": "1:test",
+        "urls": [topic], "processor": {"translate": False, "template": "*{subject}*\n[more]({url})"},
+    }
+    monkeypatch.setattr(rss, "RSS_GROUPS", [group])
+    monkeypatch.setattr(rss, "TELEGRAM_CHAT_ID", ["1"])
+
+    async def main():
+        db = MemoryStorage()
+        await db.open()
+        await db.ensure_initialized()
+        status = rss.EntryStatus(db)
+        runner, hub_url, hub_requests = await start_hub(hub_lease)
+        port = free_port()
+        async with aiohttp.ClientSession() as session:
+            manager = WebSubManager(
+                db, session, f"http://127.0.0.1:{port}/websub",
+                lambda feed_group, topic, body: rss.handle_websub_notify(feed_group, topic, body, status, db),
+            )
+            await manager.start("127.0.0.1", port)
+            try:
+                # 订阅 → hub 回调校验 → 租约生效
+                await manager.subscribe("WEBSUB_TEST", topic, hub_url)
+                await wait_for(lambda: manager.is_active("WEBSUB_TEST", topic))
+                assert hub_requests["echo"] == "challenge-1"
+                sub = (await db.load_websub_subscriptions())[0]
+                assert sub["verified"] == 1
+                assert abs(sub["lease_expires"] - time.time() - expected_lease) < 5
+
+                # 推送：签名正确的内容走 handle_websub_notify 发送，签名错误的丢弃
+                callback, secret = hub_requests["hub.callback"], hub_requests["hub.secret"]
+                body = FEED.format(entry(1) + entry(2)).encode()
+                signature = "sha256=" + hmac.new(secret.encode(), body, "sha256").hexdigest()
+                async with session.post(callback, data=body, headers={"X-Hub-Signature": signature}) as response:
+                    assert response.status == 202
+                bad = FEED.format(entry(3)).encode()
+                async with session.post(callback, data=bad, headers={"X-Hub-Signature": "sha256=00"}) as response:
+                    assert response.status == 202
+                await wait_for(lambda: not manager.tasks)
+            finally:
+                await manager.stop()
+                await runner.cleanup()
+
+        sent = "\n".join(text for _, text in fake_bots["1:test"].sent)
+        assert "title 1" in sent and "title 2" in sent
+        assert "title 3" not in sent
+        assert await status.entry_ids(topic)
+
+    asyncio.run(main())
@@ -0,0 +1,241 @@
+# tg_delivery.py
+"""Telegram 发送调度（rss.py / sql_rss.py / sql_rss2.py / mail.py 共用）
+
+Telegram 的限频：同一聊天约每秒 1 条，同一机器人约每秒 30 条，超过后返回 429（RetryAfter）。
+原来各处用固定的 sleep 估计间隔，429 时这一段消息直接丢失。这里按机器人令牌各建一个调度器：
+- 每个聊天一个令牌桶（TG_CHAT_RATE），机器人整体一个令牌桶（TG_BOT_RATE），发送前先取令牌
+- 同一聊天的消息按调用顺序逐条发送（asyncio.Lock 先到先得），分段消息不会乱序
+- 收到 RetryAfter 时该聊天暂停 retry_after 秒后重新排队，最多 TG_RETRY_AFTER_RETRIES 次
+- 网络错误按指数退避重试 TG_SEND_RETRIES 次；BadRequest、Forbidden 等直接抛给调用方
+- 超时（TimedOut）不重试也不报错：请求可能已经送达，按已发送处理（至多一次），重发会产生重复消息
+
+fan_out() 把一批条目发送到多个聊天，按聊天记录发送结果，失败的聊天下次补发。
+
+get_bot() 按令牌共用一个已初始化的 Bot：多个组共用同一个机器人时只建一个 httpx 连接池，
+采集发送和批量发送都复用它的 keep-alive 连接；运行结束时由 close_bots() 统一关闭。
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger(__name__)
+
+# 每秒条数与突发条数：单个聊天 / 单个机器人
+TG_CHAT_RATE = float(os.getenv("TG_CHAT_RATE", "1"))
+TG_CHAT_BURST = int(os.getenv("TG_CHAT_BURST", "3"))
+TG_BOT_RATE = float(os.getenv("TG_BOT_RATE", "30"))
+# 429 后重新排队的次数；网络错误重试次数
+TG_RETRY_AFTER_RETRIES = int(os.getenv("TG_RETRY_AFTER_RETRIES", "5"))
+TG_SEND_RETRIES = int(os.getenv("TG_SEND_RETRIES", "2"))
+# 每个机器人的连接数（同时在途的请求数）、等待空闲连接的秒数、请求超时秒数
+TG_POOL_SIZE = int(os.getenv("TG_POOL_SIZE", "8"))
+TG_POOL_TIMEOUT = float(os.getenv("TG_POOL_TIMEOUT", "10"))
+TG_TIMEOUT = float(os.getenv("TG_TIMEOUT", "10"))
+
+_schedulers = {}
+_bots = {}
+_bot_locks = defaultdict(asyncio.Lock)
+
+
+class RateBucket:
+    """事件循环内使用的令牌桶（GCRA）：reserve() 预约一个令牌，返回需要等待的秒数"""
+
+    def __init__(self, rate, burst=None):
+        self.interval = 1 / rate
+        self.tolerance = (max(1, burst or int(rate)) - 1) * self.interval
+        self._tat = 0.0  # 理论上下一个令牌的可用时间
+
+    def reserve(self):
+        now = time.monotonic()
+        start = max(now, self._tat - self.tolerance)
+        self._tat = max(self._tat, now) + self.interval
+        return start - now
+
+    def pause(self, seconds):
+        """seconds 秒内不再放行，之后从空桶开始"""
+        self._tat = max(self._tat, time.monotonic() + seconds + self.tolerance)
+
+
+def retry_after_seconds(error):
+    """RetryAfter.retry_after 可能是整数秒或 timedelta"""
+    value = error.retry_after
+    return value.total_seconds() if hasattr(value, "total_seconds") else float(value)
+
+
+class DeliveryScheduler:
+    """单个机器人的发送调度"""
+
+    def __init__(self, chat_rate=TG_CHAT_RATE, chat_burst=TG_CHAT_BURST, bot_rate=TG_BOT_RATE):
+        self.bot_bucket = RateBucket(bot_rate)
+        self.chat_buckets = defaultdict(lambda: RateBucket(chat_rate, chat_burst))
+        self.chat_locks = defaultdict(asyncio.Lock)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.sent = 0
+        self.retry_after = 0   # 收到 429 的次数
+        self.retried = 0       # 网络错误重试次数
+        self.failed = 0
+        self.timed_out = 0     # 超时、按已发送处理的条数
+        self.waited = 0.0      # 令牌桶与 429 累计等待秒数
+
+    async def _wait(self, seconds):
+        if seconds > 0:
+            self.waited += seconds
+            await asyncio.sleep(seconds)
+
+    async def send(self, bot, chat_id, text, **kwargs):
+        """按限频发送一条消息，返回 Message（超时时为 None）；重试用尽后抛出最后一个错误"""
+        chat_bucket = self.chat_buckets[chat_id]
+        async with self.chat_locks[chat_id]:
+            flood_retries = network_retries = 0
+            while True:
+                await self._wait(chat_bucket.reserve())
+                await self._wait(self.bot_bucket.reserve())
+                try:
+                    message = await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                except RetryAfter as e:
+                    delay = retry_after_seconds(e)
+                    self.retry_after += 1
+                    if flood_retries >= TG_RETRY_AFTER_RETRIES:
+                        self.failed += 1
+                        raise
+                    flood_retries += 1
+                    logger.warning(f"Telegram 限频，聊天 {chat_id} 暂停 {delay:.0f} 秒后重发（第 {flood_retries} 次）")
+                    chat_bucket.pause(delay)
+                    continue
+                except TimedOut as e:
+                    # TimedOut 也是 NetworkError，但消息可能已送达：不重发，调用方按已发送记录，下次也不补发
+                    self.timed_out += 1
+                    logger.warning(f"Telegram 发送到聊天 {chat_id} 超时: {e}，可能已送达，按已发送处理")
+                    return None
+                except (BadRequest, Forbidden):
+                    self.failed += 1
+                    raise
+                except NetworkError as e:
+                    if network_retries >= TG_SEND_RETRIES:
+                        self.failed += 1
+                        raise
+                    network_retries += 1
+                    self.retried += 1
+                    delay = 2 ** network_retries
+                    logger.warning(f"Telegram 发送失败: {e}，{delay}秒后重试（第 {network_retries} 次）")
+                    await self._wait(delay)
+                    continue
+                self.sent += 1
+                return message
+
+    def summary(self):
+        return (
+            f"发送 {self.sent} 条，429 {self.retry_after} 次，网络重试 {self.retried} 次，"
+            f"失败 {self.failed} 条，超时 {self.timed_out} 条，限频等待 {self.waited:.1f} 秒"
+        )
+
+
+async def get_bot(token):
+    """按令牌复用已初始化的 Bot；初始化（getMe）失败只记录日志，Bot 仍可用于发送"""
+    bot = _bots.get(token)
+    if bot is not None:
+        return bot
+    async with _bot_locks[token]:
+        bot = _bots.get(token)
+        if bot is None:
+            request = HTTPXRequest(
+                connection_pool_size=TG_POOL_SIZE,
+                pool_timeout=TG_POOL_TIMEOUT,
+                connect_timeout=TG_TIMEOUT,
+                read_timeout=TG_TIMEOUT,
+                write_timeout=TG_TIMEOUT,
+            )
+            bot = Bot(token=token, request=request)
+            try:
+                await bot.initialize()
+            except Exception as e:
+                logger.warning(f"机器人 {token.split(':')[0]} 初始化失败: {e}")
+            _bots[token] = bot
+        return bot
+
+
+async def close_bots():
+    """关闭所有机器人的连接池"""
+    bots = list(_bots.values())
+    _bots.clear()
+    for bot in bots:
+        try:
+            await bot.shutdown()
+        except Exception as e:
+            logger.error(f"关闭机器人连接失败: {e}")
+
+
+def get_scheduler(bot):
+    """按机器人令牌复用 DeliveryScheduler"""
+    scheduler = _schedulers.get(bot.token)
+    if scheduler is None:
+        scheduler = _schedulers[bot.token] = DeliveryScheduler()
+    return scheduler
+
+
+async def send_message(bot, chat_id, text, **kwargs):
+    """经调度器发送，参数同 Bot.send_message"""
+    return await get_scheduler(bot).send(bot, chat_id, text, **kwargs)
+
+
+async def fan_out(db, group_key, chat_ids, entry_ids, render, send):
+    """把条目发送到 chat_ids 中的全部聊天，返回已发送到全部聊天的条目ID集合
+
+    db 为 rss_storage.Storage。之前已发送成功的聊天（chat_deliveries）跳过；待发送条目相同的聊天共用一次
+    render(ids) 生成的消息，各聊天并发调用 send(chat_id, ids, message)，返回其中发送成功的条目ID。限频由 tg_delivery 按聊天控制，
+    某个聊天慢或被封不影响其它聊天。未发送到全部聊天的条目记下已成功的聊天，下次只补发给失败的聊天；
+    发送超时的聊天按已发送记录，不会补发。
+    """
+    delivered = await db.load_chat_deliveries(group_key, entry_ids)
+    targets = defaultdict(list)  # 待发送的条目ID -> 聊天
+    for chat_id in chat_ids:
+        ids = tuple(entry_id for entry_id in entry_ids if chat_id not in delivered.get(entry_id, ()))
+        if ids:
+            targets[ids].append(chat_id)
+
+    jobs = []
+    for ids, target_chats in targets.items():
+        message = await render(ids)
+        if message:
+            jobs += [(chat_id, send(chat_id, ids, message)) for chat_id in target_chats]
+    results = await asyncio.gather(*(job for _, job in jobs), return_exceptions=True)
+
+    sent = defaultdict(set)
+    for (chat_id, _), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            logger.error(f"发送到聊天 {chat_id} 失败: {result}")
+            continue
+        for entry_id in result:
+            sent[entry_id].add(chat_id)
+
+    complete = set()
+    now = time.time()
+    for entry_id in entry_ids:
+        chats = delivered.get(entry_id, set()) | sent[entry_id]
+        if all(chat_id in chats for chat_id in chat_ids):
+            complete.add(entry_id)
+        else:
+            for chat_id in sent[entry_id]:
+                await db.add_chat_delivery(group_key, entry_id, chat_id, now)
+    return complete
+
+
+def summary():
+    """各机器人的发送统计，没有发送过时为空字符串"""
+    return "；".join(
+        f"{token.split(':')[0]}: {scheduler.summary()}"
+        for token, scheduler in _schedulers.items()
+        if scheduler.sent or scheduler.failed or scheduler.timed_out
+    )
+
+
+def reset_stats():
+    for scheduler in _schedulers.values():
+        scheduler.reset_stats()
@@ -14,6 +14,7 @@ import os
 from dotenv import load_dotenv
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from md2tgmd import escape
 
 # 加载环境变量
@@ -47,6 +48,7 @@ class CloudConeMonitor:
         self.config = config
         self.last_data_hash = None
         self.last_offers = {}
+        self.pending_chats = []  # 上次有聊天发送失败时，只补发给这些聊天
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -69,35 +71,50 @@ class CloudConeMonitor:
         
         logging.info(f"配置验证成功，将发送到 {len(self.config['TELEGRAM_CHAT_IDS'])} 个聊天")
     
-    def send_telegram_message(self, message, chat_id=None):
-        """发送 Telegram 消息到指定聊天或所有聊天"""
+    def send_telegram_message(self, message, chat_id):
+        """发送 Telegram 消息到指定聊天，被限频（429）时按 retry_after 等待后重发"""
         url = f"https://api.telegram.org/bot{self.config['TELEGRAM_API_KEY']}/sendMessage"
+        payload = {
+            'chat_id': chat_id,
+            'text': message,
+            'parse_mode': 'MarkdownV2',
+            'disable_web_page_preview': False
+        }
         
-        if chat_id:
-            chat_ids = [chat_id]
-        else:
-            chat_ids = self.config['TELEGRAM_CHAT_IDS']
-        
-        success_count = 0
-        for cid in chat_ids:
-            payload = {
-                'chat_id': cid,
-                'text': message,
-                'parse_mode': 'MarkdownV2',
-                'disable_web_page_preview': False
-            }
-            
+        for attempt in range(3):
             try:
                 response = requests.post(url, json=payload, timeout=10)
+                if response.status_code == 429:
+                    retry_after = response.json().get('parameters', {}).get('retry_after', 5)
+                    logging.warning(f"发送到 {chat_id} 被限频，{retry_after}秒后重发")
+                    time.sleep(retry_after)
+                    continue
                 response.raise_for_status()
-                success_count += 1
-                logging.info(f"Telegram 消息发送到 {cid} 成功")
+                logging.info(f"Telegram 消息发送到 {chat_id} 成功")
+                return True
             except requests.RequestException as e:
-                logging.error(f"发送 Telegram 消息到 {cid} 失败: {e}")
+                logging.error(f"发送 Telegram 消息到 {chat_id} 失败: {e}")
                 if hasattr(e, 'response') and e.response is not None:
                     logging.error(f"响应内容: {e.response.text}")
-        
-        return success_count > 0
+                return False
+        return False
+    
+    def send_parts_to_chat(self, parts, chat_id):
+        """按顺序发送各部分到一个聊天，某部分失败则停止"""
+        for i, part in enumerate(parts):
+            logging.info(f"发送消息第 {i+1}/{len(parts)} 部分到 {chat_id}")
+            if not self.send_telegram_message(part, chat_id):
+                return False
+            # 同一聊天约每秒 1 条
+            if i < len(parts) - 1:
+                time.sleep(1)
+        return True
+    
+    def send_to_chats(self, parts, chat_ids):
+        """同时发送到多个聊天（各聊天互不等待），返回发送成功的聊天ID列表"""
+        with ThreadPoolExecutor(max_workers=len(chat_ids)) as executor:
+            results = list(executor.map(lambda cid: self.send_parts_to_chat(parts, cid), chat_ids))
+        return [cid for cid, ok in zip(chat_ids, results) if ok]
     
     def get_data_hash(self, data):
         """生成数据的哈希值用于比较，专注于 Flash Sale 相关数据"""
@@ -312,13 +329,14 @@ class CloudConeMonitor:
         logging.info(f"生成 Flash Sale 消息长度: {len(full_message)} 字符")
         return full_message
         
-    def save_data(self, data_hash, offers):
-        """保存数据到文件"""
+    def save_data(self, data_hash, offers, pending_chats=None):
+        """保存数据到文件；pending_chats 为这份数据还没发送成功的聊天"""
         try:
             with open(self.config['DATA_FILE'], 'w', encoding='utf-8') as f:
                 json.dump({
                     'last_hash': data_hash,
                     'last_offers': offers,
+                    'pending_chats': pending_chats or [],
                     'last_update': datetime.now().isoformat(),
                     'last_check': datetime.now().isoformat()
                 }, f, ensure_ascii=False, indent=2)
@@ -333,6 +351,8 @@ class CloudConeMonitor:
                 data = json.load(f)
                 self.last_data_hash = data.get('last_hash')
                 self.last_offers = data.get('last_offers', {})
+                # 只补发给仍在配置中的聊天
+                self.pending_chats = [c for c in data.get('pending_chats', []) if c in self.config['TELEGRAM_CHAT_IDS']]
                 last_update = data.get('last_update', '未知')
                 logging.info(f"加载历史数据，上次更新时间: {last_update}")
                 logging.info(f"上次数据哈希: {self.last_data_hash}")
@@ -385,10 +405,14 @@ class CloudConeMonitor:
         
         # 检查是否有变化
         if current_hash == self.last_data_hash:
-            logging.info("数据无变化，跳过发送")
-            # 即使无变化也更新检查时间
-            self.save_data(current_hash, self.last_offers)
-            return False
+            if not self.pending_chats:
+                logging.info("数据无变化，跳过发送")
+                # 即使无变化也更新检查时间
+                self.save_data(current_hash, self.last_offers)
+                return False
+            # 上次部分聊天发送失败，只补发给这些聊天
+            logging.info(f"数据无变化，补发给上次失败的 {len(self.pending_chats)} 个聊天")
+            return self.deliver(current_hash, self.last_offers, self.pending_chats)
         
         logging.info("检测到数据变化！准备发送 Flash Sale 套餐")
         
@@ -409,34 +433,31 @@ class CloudConeMonitor:
             self.save_data(current_hash, current_offers)
             return True
         
+        return self.deliver(current_hash, current_offers, self.config['TELEGRAM_CHAT_IDS'])
+    
+    def deliver(self, current_hash, current_offers, chat_ids):
+        """消息只生成一次，同时发送到 chat_ids；记录发送失败的聊天，下次只补发给它们"""
         # 格式化所有优惠消息
         all_offers_message = self.format_all_offers_message(current_offers)
         
-        # 发送消息（由于消息可能很长，分成多个部分发送）
-        message_parts = self.split_message(all_offers_message)
-        
-        success = True
-        for i, part in enumerate(message_parts):
-            logging.info(f"发送消息第 {i+1}/{len(message_parts)} 部分")
-            # 在发送前统一用 md2tgmd 转义
-            escaped_part = escape(part)  # 直接使用 escape，不需要重复导入
-            if not self.send_telegram_message(escaped_part):
-                success = False
-                logging.error("发送消息失败")
-                break
-            # 消息间短暂延迟，避免发送过快
-            time.sleep(1)
+        # 发送消息（由于消息可能很长，分成多个部分发送），在发送前统一用 md2tgmd 转义
+        message_parts = [escape(part) for part in self.split_message(all_offers_message)]
+        delivered = self.send_to_chats(message_parts, chat_ids)
+        failed = [cid for cid in chat_ids if cid not in delivered]
         
-        if success:
-            logging.info(f"成功发送 {len(current_offers)} 个 Flash Sale 套餐")
-            # 更新数据
-            self.last_data_hash = current_hash
-            self.last_offers = current_offers
-            self.save_data(current_hash, current_offers)
-        else:
+        if not delivered:
             logging.error("发送消息失败，数据未更新")
+            return False
         
-        return success
+        logging.info(f"成功发送 {len(current_offers)} 个 Flash Sale 套餐到 {len(delivered)}/{len(chat_ids)} 个聊天")
+        if failed:
+            logging.error(f"发送到 {failed} 失败，下次检查时补发")
+        # 更新数据
+        self.last_data_hash = current_hash
+        self.last_offers = current_offers
+        self.pending_chats = failed
+        self.save_data(current_hash, current_offers, failed)
+        return True
     
     def split_message(self, message, max_length=4000):
         """将长消息分割成多个部分（Telegram 消息长度限制）"""